@@ -0,0 +1,170 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+TOKEN_CACHE_DEFAULTS = {
+    'LOCAL_SIZE': 1024,  # tokens kept per process
+    'LOCAL_TTL': 10,     # seconds a process trusts its own copy
+    'SHARED_TTL': 300,   # seconds a snapshot lives in the shared cache
+}
+
+def token_cache_setting(name):
+    return getattr(settings, 'TOKEN_AUTH_CACHE', {}).get(name, TOKEN_CACHE_DEFAULTS[name])
+
+class TokenLRU:
+    """
+    Thread-safe, size-bounded LRU of token key -> Token snapshot with a per-entry TTL.
+    """
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            token, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token
+
+    def set(self, key, token):
+        with self._lock:
+            self._entries[key] = (token, time.monotonic() + token_cache_setting('LOCAL_TTL'))
+            self._entries.move_to_end(key)
+            while len(self._entries) > token_cache_setting('LOCAL_SIZE'):
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [key for key, (token, _) in self._entries.items() if token.user_id == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+local_tokens = TokenLRU()
+
+def shared_cache_key(key):
+    # Only this digest of a token is ever written to the shared cache, as a key or a value.
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+def user_cache_key(user_id):
+    # Maps a user to the digest of their cached token so user changes can be invalidated without a query.
+    return f'auth:user:{user_id}'
+
+def snapshot_user_fields():
+    # The password hash stays in the database; it is loaded lazily on the rare check_password()
+    return [field.attname for field in get_user_model()._meta.concrete_fields if field.name != 'password']
+
+def token_snapshot(token):
+    """
+    What the shared cache stores for a token: its creation time and the user's fields.
+    """
+    return {
+        'created': token.created,
+        'user': {field: getattr(token.user, field) for field in snapshot_user_fields()},
+    }
+
+def token_from_snapshot(key, snapshot):
+    """
+    Rebuilds the Token and User from token_snapshot(), with the user's password deferred.
+    """
+    fields = snapshot['user']
+    user = get_user_model().from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
+    token = Token.from_db(DEFAULT_DB_ALIAS, ['key', 'user_id', 'created'], [key, user.pk, snapshot['created']])
+    token.user = user
+    return token
+
+def invalidate_token(key):
+    """
+    Drops a token from this process and from the shared cache.
+
+    Other processes may keep trusting their own copy for up to LOCAL_TTL seconds.
+    """
+    local_tokens.discard(key)
+    cache.delete(shared_cache_key(key))
+
+def invalidate_user_tokens(user):
+    """
+    Drops every cached token of `user`, e.g. after their details changed.
+    """
+    local_tokens.discard_user(user.pk)
+    digest = cache.get(user_cache_key(user.pk))
+    if digest is not None:
+        cache.delete_many([digest, user_cache_key(user.pk)])
+
+def issue_token(user):
+    """
+    Gives `user` a fresh token key, replacing any previous one, and returns it.
+
+    The usual case is one UPDATE of the existing row; a first login falls back
+    to one INSERT. The previous key stops working once the change commits.
+    """
+    key = Token.generate_key()
+    if not Token.objects.filter(user=user).update(key=key, created=timezone.now()):
+        try:
+            with transaction.atomic():
+                Token.objects.create(user=user, key=key)
+        except IntegrityError:
+            # A concurrent login created the row first; take it over.
+            Token.objects.filter(user=user).update(key=key, created=timezone.now())
+    # Only once the new key is committed (right away in autocommit): invalidating
+    # earlier would let a request still reading the old row cache it for SHARED_TTL
+    transaction.on_commit(lambda: invalidate_user_tokens(user))
+    return key
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that remembers token -> user snapshots.
+
+    Lookups go to a per-process LRU first, then to the shared cache, and only
+    hit the database (one Token + User join) on a miss. The shared cache holds
+    neither the raw key nor the password hash, only a snapshot under the key's
+    digest; users rebuilt from it load their password on first use. Each request
+    gets its own copy of the cached objects, so views can modify request.user safely.
+    """
+
+    def authenticate_credentials(self, key):
+        token = local_tokens.get(key)
+        if token is None:
+            snapshot = cache.get(shared_cache_key(key))
+            if snapshot is None:
+                model = self.get_model()
+                try:
+                    token = model.objects.select_related('user').get(key=key)
+                except model.DoesNotExist:
+                    raise exceptions.AuthenticationFailed(_('Invalid token.'))
+                cache.set_many({
+                    shared_cache_key(key): token_snapshot(token),
+                    user_cache_key(token.user_id): shared_cache_key(key),
+                }, token_cache_setting('SHARED_TTL'))
+            else:
+                token = token_from_snapshot(key, snapshot)
+            local_tokens.set(key, token)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+        return (token.user, token)
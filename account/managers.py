@@ -1,3 +1,4 @@
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import BaseUserManager
 
@@ -21,3 +22,37 @@ class CustomUserManager(BaseUserManager):
             raise ValueError(_('Superuser must have is_superuser=True.'))
 
         return self.create_user(email, name, phone_number, password, **extra_fields)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        # bulk_create() skips save(), so fill the lowercase shadow columns here
+        for obj in objs:
+            obj.normalize_identifiers()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def get_by_identifier(self, identifier):
+        """
+        Resolves an email, phone number or username to a user with one indexed query.
+
+        Email and username are matched case-insensitively through their lowercase
+        shadow columns. When the identifier matches different users in several
+        columns, email wins over phone number, and phone number over username.
+        """
+        identifier = (identifier or '').strip()
+        if not identifier:
+            return None
+        lowered = identifier.lower()
+        # Not capped: the lowercase shadow columns are not unique, so a fixed LIMIT
+        # could drop the email match in favour of several username matches
+        candidates = list(self.filter(
+            Q(email_lower=lowered) | Q(phone_number=identifier) | Q(username_lower=lowered)
+        ))
+        for matches in (
+            lambda user: user.email_lower == lowered,
+            lambda user: user.phone_number == identifier,
+            lambda user: user.username_lower == lowered,
+        ):
+            for user in candidates:
+                if matches(user):
+                    return user
+        return None
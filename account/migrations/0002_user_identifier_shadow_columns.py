@@ -0,0 +1,28 @@
+# Generated by Django 5.0.7 on 2026-10-17 01:25
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+def fill_identifier_shadow_columns(apps, schema_editor):
+    User = apps.get_model('account', 'User')
+    User.objects.update(email_lower=Lower('email'), username_lower=Lower('username'))
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_lower',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='username_lower',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255, null=True),
+        ),
+        migrations.RunPython(fill_identifier_shadow_columns, migrations.RunPython.noop),
+    ]
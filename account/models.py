@@ -40,6 +40,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
 
+    # Lowercased copies of email/username so case-insensitive logins can use a plain index
+    email_lower = models.CharField(max_length=254, null=True, blank=True, editable=False, db_index=True)
+    username_lower = models.CharField(max_length=255, null=True, blank=True, editable=False, db_index=True)
+
     reset_otp = models.CharField(max_length=7, null=True, blank=True)
     otp_created_at = models.DateTimeField(null=True, blank=True)
 
@@ -48,6 +52,12 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = CustomUserManager()
 
+    class Meta:
+        indexes = [
+            # Staff and customer lists filter on role and page by id
+            models.Index(fields=['role', '-id'], name='user_role_id_idx'),
+        ]
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name', 'phone_number', 'role']
 
@@ -59,7 +69,24 @@ class User(AbstractBaseUser, PermissionsMixin):
             self.slug = slugify(self.name)
         if not self.username:
             self.username = self.create_username(self.name)
+        self.normalize_identifiers()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # Keep the shadow columns in step with partial saves of email/username
+            update_fields = set(update_fields)
+            if 'email' in update_fields:
+                update_fields.add('email_lower')
+            if 'username' in update_fields:
+                update_fields.add('username_lower')
+            kwargs['update_fields'] = update_fields
         super(User, self).save(*args, **kwargs)
+
+    def normalize_identifiers(self):
+        """
+        Refreshes the lowercased shadow columns used by CustomUserManager.get_by_identifier().
+        """
+        self.email_lower = self.email.lower() if self.email else None
+        self.username_lower = self.username.lower() if self.username else None
     
     def create_username(self, name):
         """
@@ -71,4 +98,19 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.name
 
     def get_short_name(self):
-        return self.name.split()[0] if self.name else self.email
\ No newline at end of file
+        return self.name.split()[0] if self.name else self.email
+
+class RateLimitCounter(models.Model):
+    """
+    One attempt or statistics counter of account.throttling.DatabaseRateLimitBackend.
+
+    Incremented with a single UPDATE ... SET count = count + 1, so concurrent
+    workers never lose hits. Rows past `expires_at` are no longer read and are
+    removed by the purge_rate_limit_counters command.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.count}"
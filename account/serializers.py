@@ -1,6 +1,5 @@
 import re
 from account.models import *
-from django.db.models import Q
 from datetime import timedelta
 from django.utils import timezone
 from rest_framework import serializers
@@ -40,18 +39,16 @@ class LoginSerializer(serializers.Serializer):
         if not password:
             raise serializers.ValidationError("Password is required.")
 
-        User = get_user_model()
-        try:
-            # Find user by email, phone number, or username
-            user = User.objects.get(
-                Q(email__iexact=identifier) | Q(phone_number=identifier) | Q(username__iexact=identifier)
-            )
-        except User.DoesNotExist:
-            raise serializers.ValidationError("No user found with the provided email, phone number, or username.")
+        # LoginView resolves and checks the user itself and hands it over to avoid a second lookup
+        user = self.context.get('user')
+        if user is None:
+            user = get_user_model().objects.get_by_identifier(identifier)
+            if user is None:
+                raise serializers.ValidationError("No user found with the provided email, phone number, or username.")
 
-        # Check if password is correct
-        if not user.check_password(password):
-            raise serializers.ValidationError("Incorrect password. Please check your credentials.")
+            # Check if password is correct
+            if not user.check_password(password):
+                raise serializers.ValidationError("Incorrect password. Please check your credentials.")
 
         attrs['user'] = user  # Store the user object for later use in the view
         return attrs
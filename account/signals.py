@@ -0,0 +1,22 @@
+from account.authentication import invalidate_token, invalidate_user_tokens
+from account.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    """
+    Cached token snapshots carry the user; refresh them once a save of the user commits.
+    """
+    if not created:
+        transaction.on_commit(lambda: invalidate_user_tokens(instance))
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """
+    Covers tokens removed outside the auth views (admin, shell), once the delete commits.
+    """
+    key = instance.key  # delete() clears the primary key before the callback runs
+    transaction.on_commit(lambda: invalidate_token(key))
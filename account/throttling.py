@@ -0,0 +1,295 @@
+import abc
+import hashlib
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import PyLibMCCache, PyMemcacheCache
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+from account.models import RateLimitCounter
+
+RATE_LIMIT_DEFAULTS = {
+    'BACKEND': 'account.throttling.MemoryRateLimitBackend',
+    'RATES': {
+        'login': '10/min',
+        'password_reset': '5/min',
+        'password_reset_confirm': '10/min',
+    },
+    # Minutes of per-minute counters kept for the stats endpoint.
+    'STATS_MINUTES': 60,
+}
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+def rate_limit_setting(name):
+    return getattr(settings, 'RATE_LIMIT', {}).get(name, RATE_LIMIT_DEFAULTS[name])
+
+def scope_rate(scope):
+    # Scopes missing from a project's RATES fall back to the defaults
+    return {**RATE_LIMIT_DEFAULTS['RATES'], **rate_limit_setting('RATES')}[scope]
+
+def parse_rate(rate):
+    """
+    '10/min' -> (10, 60).
+    """
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+class MemoryRateLimitBackend:
+    """
+    Exact sliding-window log kept in process memory; the default backend.
+
+    Query-free, so a rejected attempt costs no database work at all. Every
+    worker process counts on its own, though, so with N workers a client can
+    make up to N times the limit; switch to CacheRateLimitBackend there.
+    """
+    # Keys idle for a full window are swept once this many are tracked
+    max_keys = 10000
+
+    def __init__(self):
+        self._hits = defaultdict(deque)
+        self._stats = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window):
+        """
+        Records an attempt for `key`; returns (allowed, seconds until a slot frees up).
+        """
+        now = time.time()
+        with self._lock:
+            if len(self._hits) > self.max_keys:
+                for idle in [k for k, v in self._hits.items() if not v or v[-1] <= now - window]:
+                    del self._hits[idle]
+            hits = self._hits[key]
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) >= limit:
+                return False, hits[0] + window - now
+            hits.append(now)
+            return True, 0
+
+    def attempt(self, scope, keys, limit, window):
+        """
+        Records an attempt against every key; returns (allowed, seconds until a slot frees up).
+        """
+        results = [self.hit(key, limit, window) for key in keys]
+        allowed = all(key_allowed for key_allowed, _ in results)
+        self.count(scope, int(time.time() // 60), 'allowed' if allowed else 'rejected')
+        return allowed, max(retry_after for _, retry_after in results)
+
+    def count(self, scope, minute, outcome):
+        with self._lock:
+            self._stats[(scope, minute, outcome)] += 1
+            # Drop counters older than the stats horizon
+            horizon = minute - rate_limit_setting('STATS_MINUTES')
+            for stale in [k for k in self._stats if k[1] <= horizon]:
+                del self._stats[stale]
+
+    def counts(self, scope, minutes):
+        with self._lock:
+            return {
+                minute: {outcome: self._stats.get((scope, minute, outcome), 0) for outcome in ('allowed', 'rejected')}
+                for minute in minutes
+            }
+
+    def reset(self):
+        with self._lock:
+            self._hits.clear()
+            self._stats.clear()
+
+class WindowCounterBackend(abc.ABC):
+    """
+    Sliding-window counter shared by every process; subclasses store the counters.
+
+    Each key keeps a counter for the current and the previous window; the
+    previous one is weighted by how much of it still overlaps the sliding
+    window. An attempt is counted before it is judged, on the totals read back
+    afterwards, so parallel attempts cannot all pass one check before any of
+    them is recorded. Rejected attempts count too, which keeps a client that
+    goes on trying locked out.
+    """
+    prefix = 'ratelimit'
+
+    @abc.abstractmethod
+    def _add_many(self, timeouts):
+        """
+        Adds one to each counter in {key: seconds to keep it}, creating missing ones.
+        """
+
+    @abc.abstractmethod
+    def _get_many(self, keys):
+        """
+        Current values of the counters among `keys`, as {key: count}; missing ones are left out.
+        """
+
+    def _stats_key(self, scope, minute, outcome):
+        return f'{self.prefix}:stats:{scope}:{minute}:{outcome}'
+
+    def attempt(self, scope, keys, limit, window):
+        """
+        Records an attempt against every key; returns (allowed, seconds until a slot frees up).
+        """
+        now = time.time()
+        current = int(now // window)
+        elapsed = now - current * window
+        minute = int(now // 60)
+        stats_ttl = rate_limit_setting('STATS_MINUTES') * 60
+        windows = [(f'{self.prefix}:{key}:{current - 1}', f'{self.prefix}:{key}:{current}') for key in keys]
+        self._add_many({
+            **{present: window * 2 for _, present in windows},
+            self._stats_key(scope, minute, 'attempts'): stats_ttl,
+        })
+        counts = self._get_many([key for pair in windows for key in pair])
+        if all(counts.get(previous, 0) * (window - elapsed) / window + counts.get(present, 0) <= limit for previous, present in windows):
+            return True, 0
+        self._add_many({self._stats_key(scope, minute, 'rejected'): stats_ttl})
+        # Conservative: by the end of the current window the previous one no longer counts
+        return False, window - elapsed
+
+    def counts(self, scope, minutes):
+        keys = {
+            (minute, outcome): self._stats_key(scope, minute, outcome)
+            for minute in minutes for outcome in ('attempts', 'rejected')
+        }
+        values = self._get_many(list(keys.values()))
+        counts = {}
+        for minute in minutes:
+            attempts, rejected = (values.get(keys[(minute, outcome)], 0) for outcome in ('attempts', 'rejected'))
+            counts[minute] = {'allowed': attempts - rejected, 'rejected': rejected}
+        return counts
+
+    def reset(self):
+        pass
+
+class CacheRateLimitBackend(WindowCounterBackend):
+    """
+    Counters kept in the default cache, which must increment atomically.
+
+    Redis and Memcached do; the file and database cache backends read, add
+    and write back, losing concurrent hits, so they are refused. LocMemCache is
+    atomic within one process only.
+    """
+    atomic_caches = (RedisCache, PyMemcacheCache, PyLibMCCache, LocMemCache)
+
+    def __init__(self):
+        backend = caches[DEFAULT_CACHE_ALIAS]
+        if not isinstance(backend, self.atomic_caches):
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} needs a cache with atomic increments (Redis or Memcached), "
+                f"not {type(backend).__name__}; use account.throttling.DatabaseRateLimitBackend instead."
+            )
+
+    def _add_many(self, timeouts):
+        for key, timeout in timeouts.items():
+            cache.add(key, 0, timeout)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Expired between add() and incr()
+                cache.add(key, 1, timeout)
+
+    def _get_many(self, keys):
+        return cache.get_many(keys)
+
+class DatabaseRateLimitBackend(WindowCounterBackend):
+    """
+    Counters kept as RateLimitCounter rows, for deployments whose only shared service is the database.
+
+    An attempt costs three statements whatever the number of keys: an INSERT
+    that skips existing counters, one UPDATE ... SET count = count + 1 and one
+    SELECT of both windows; a rejected one adds two more for the statistics.
+    Each runs in autocommit, so no lock outlives it. Rejected requests still
+    write to the database, so a login storm becomes write load on it: opt in
+    only where neither process memory nor Redis/Memcached will do.
+    """
+
+    def _add_many(self, timeouts):
+        now = timezone.now()
+        RateLimitCounter.objects.bulk_create([
+            RateLimitCounter(key=key, expires_at=now + timedelta(seconds=timeout)) for key, timeout in timeouts.items()
+        ], ignore_conflicts=True)
+        RateLimitCounter.objects.filter(key__in=list(timeouts)).update(count=F('count') + 1)
+
+    def _get_many(self, keys):
+        return dict(RateLimitCounter.objects.filter(key__in=keys).values_list('key', 'count'))
+
+def purge_expired_counters():
+    """
+    Deletes RateLimitCounter rows past their expiry; returns the number removed.
+    """
+    deleted, _ = RateLimitCounter.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(rate_limit_setting('BACKEND'))()
+        return _backend
+
+def scope_counts(scope, minutes=None):
+    """
+    Allowed/rejected attempts for `scope` per minute, newest first, as {epoch_minute: {...}}.
+    """
+    minutes = minutes or rate_limit_setting('STATS_MINUTES')
+    now = int(time.time() // 60)
+    return get_backend().counts(scope, [now - n for n in range(minutes)])
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Limits attempts per identifier and per client IP over a sliding window.
+
+    Throttles run in APIView.initial(), before the handler, so a rejected
+    request costs no password hashing, database lookup or email. Subclasses set
+    `scope` (a key of RATE_LIMIT['RATES']) and `identifier_field`, the request
+    field naming the account being tried.
+    """
+    scope = None
+    identifier_field = None
+
+    def allow_request(self, request, view):
+        limit, window = parse_rate(scope_rate(self.scope))
+        keys = [f'{self.scope}:ip:{self.get_ident(request)}']
+        identifier = self.get_identifier(request)
+        if identifier:
+            # Hashed so arbitrary user input is always a valid cache key
+            keys.append(f'{self.scope}:id:{hashlib.sha1(identifier.encode()).hexdigest()}')
+
+        allowed, self.retry_after = get_backend().attempt(self.scope, keys, limit, window)
+        return allowed
+
+    def get_identifier(self, request):
+        try:
+            value = request.data.get(self.identifier_field)
+        except Exception:
+            return None
+        if not isinstance(value, str):
+            return None
+        return value.strip().lower()[:254] or None
+
+    def wait(self):
+        return self.retry_after
+
+class LoginRateThrottle(SlidingWindowThrottle):
+    scope = 'login'
+    identifier_field = 'identifier'
+
+class PasswordResetRateThrottle(SlidingWindowThrottle):
+    scope = 'password_reset'
+    identifier_field = 'email'
+
+class PasswordResetConfirmRateThrottle(SlidingWindowThrottle):
+    # Its own budget, so requesting OTPs cannot lock out entering one and vice versa
+    scope = 'password_reset_confirm'
+    identifier_field = 'email'
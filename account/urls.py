@@ -12,4 +12,5 @@ urlpatterns = [
     path('update-password/', UpdatePasswordView.as_view(), name='updatePassword'),
     path('password-reset-request/', PasswordResetRequestView.as_view(), name='passwordResetRequest'),
     path('password-reset-confirm/', PasswordResetConfirmView.as_view(), name='passwordResetConfirm'),
+    path('rate-limits/', RateLimitStatsView.as_view(), name='rateLimitStats'),
 ]  + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)+ static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -1,8 +1,12 @@
 import random
+from datetime import datetime, timezone as dt_timezone
 from account.serializers import *
-from django.core.mail import send_mail
+from account.authentication import invalidate_token, invalidate_user_tokens, issue_token
+from account.throttling import LoginRateThrottle, PasswordResetConfirmRateThrottle, PasswordResetRateThrottle, rate_limit_setting, scope_counts, scope_rate
+from base.mailer import queue_email
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.db import transaction
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
@@ -19,6 +23,7 @@ class LoginView(APIView):
     If a user with a "Customer" role attempts to login, an error is returned.
     """
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginRateThrottle]
 
     def post(self, request, *args, **kwargs):
         # First, ensure that the identifier is provided
@@ -27,20 +32,8 @@ class LoginView(APIView):
             return Response({"error": "Identifier (email, phone number, or username) is required."},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        User = get_user_model()
-        user = None
-
-        # Try to locate the user by email (case-insensitive)
-        if "@" in identifier:
-            user = User.objects.filter(email__iexact=identifier).first()
-
-        # If not found by email, try phone number
-        if not user:
-            user = User.objects.filter(phone_number=identifier).first()
-
-        # If still not found, try username (case-insensitive)
-        if not user:
-            user = User.objects.filter(username__iexact=identifier).first()
+        # One indexed query over email, phone number and username
+        user = get_user_model().objects.get_by_identifier(identifier)
 
         if not user:
             return Response({"error": "No user found with the provided identifier."},
@@ -55,7 +48,7 @@ class LoginView(APIView):
             )
 
         # Now proceed with full validation using the serializer
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={'user': user})
         if not serializer.is_valid():
             return Response(
                 {"error": "Validation error", "details": serializer.errors},
@@ -70,12 +63,11 @@ class LoginView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Successful authentication: Invalidate any existing token and generate a new one
-        Token.objects.filter(user=user).delete()
-        token, created = Token.objects.get_or_create(user=user)
+        # Successful authentication: replace any existing token with a new one
+        token_key = issue_token(user)
 
         return Response({
-            'token': token.key,
+            'token': token_key,
             'user': UserSerializer(user).data,
             'message': 'Login successful.'
         }, status=status.HTTP_200_OK)
@@ -85,8 +77,12 @@ class LogoutView(APIView):
 
     def post(self, request, *args, **kwargs):
         try:
-            if hasattr(request.user, 'auth_token'):
-                request.user.auth_token.delete()
+            # request.auth is the token this request authenticated with
+            if request.auth is not None:
+                key = request.auth.key
+                request.auth.delete()
+                # After the delete commits, so a concurrent request cannot re-cache the old row
+                transaction.on_commit(lambda: invalidate_token(key))
             return Response({
                 "message": "Logout successful."
             }, status=status.HTTP_200_OK)
@@ -153,8 +149,9 @@ class UpdatePasswordView(APIView):
         user.set_password(new_password)
         user.save()
 
-        # Invalidate the current token by deleting it
+        # Invalidate the current token by deleting it, and drop cached copies once that commits
         Token.objects.filter(user=user).delete()
+        transaction.on_commit(lambda: invalidate_user_tokens(user))
 
         return Response({"detail": "Password updated successfully. You have been logged out."}, status=status.HTTP_200_OK)
 
@@ -163,6 +160,7 @@ class PasswordResetRequestView(APIView):
     Initiate the password reset process by sending a 5-digit OTP to the user's email address.
     """
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [PasswordResetRateThrottle]
 
     def post(self, request, *args, **kwargs):
         serializer = PasswordResetRequestSerializer(data=request.data)
@@ -180,7 +178,7 @@ class PasswordResetRequestView(APIView):
             message = f"Your OTP for password reset is: {otp}"
             from_email = None
             recipient_list = [user.email]
-            send_mail(subject, message, from_email, recipient_list)
+            queue_email(subject, message, recipient_list, from_email)
 
             return Response({"detail": "OTP sent to your email address."}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -191,6 +189,7 @@ class PasswordResetConfirmView(APIView):
     After successfully resetting the password, sends a confirmation email to the user.
     """
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [PasswordResetConfirmRateThrottle]
 
     def post(self, request, *args, **kwargs):
         serializer = PasswordResetConfirmSerializer(data=request.data)
@@ -201,6 +200,40 @@ class PasswordResetConfirmView(APIView):
             message = f"Hi {user.name or 'there'}, your password has been changed successfully. If you did not perform this action, please contact support immediately."
             from_email = None
             recipient_list = [user.email]
-            send_mail(subject, message, from_email, recipient_list)
+            queue_email(subject, message, recipient_list, from_email)
             return Response({"detail": "Password reset successfully."}, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class RateLimitStatsView(APIView):
+    """
+    Per-minute allowed/rejected attempt counters for the login, password reset
+    request and password reset confirm rate limits, newest minute first. Admins only.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role != 'Admin':
+            raise PermissionDenied("Only admins can view rate limit statistics.")
+
+        horizon = rate_limit_setting('STATS_MINUTES')
+        try:
+            minutes = min(max(int(request.query_params.get('minutes', 15)), 1), horizon)
+        except ValueError:
+            return Response({"detail": "minutes must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {}
+        for throttle in (LoginRateThrottle, PasswordResetRateThrottle, PasswordResetConfirmRateThrottle):
+            data[throttle.scope] = {
+                "rate": scope_rate(throttle.scope),
+                "minutes": [
+                    {
+                        "minute": datetime.fromtimestamp(minute * 60, tz=dt_timezone.utc).isoformat(),
+                        **counts
+                    }
+                    for minute, counts in scope_counts(throttle.scope, minutes).items()
+                ],
+            }
+        return Response({
+            "detail": "Rate limit statistics retrieved successfully.",
+            "data": data
+        }, status=status.HTTP_200_OK)
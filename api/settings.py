@@ -1,4 +1,5 @@
 import os
+import sys
 from os import getenv
 from pathlib import Path
 from dotenv import load_dotenv
@@ -99,6 +100,33 @@ DATABASES =  {
     }
 }
 
+# Shared cache for data every worker process reads (e.g. the Settings singleton).
+# The file backend needs no extra service and is shared by all processes on a host.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')),
+    }
+}
+
+# The test suite (including the endpoint benchmarks in base/tests.py) runs on SQLite.
+# TEST_MYSQL=1 keeps the configured MySQL database instead, so select_for_update,
+# collations and gap locks can be checked as deployed; that run needs mysqlclient and
+# skips the benchmarks until a MySQL baseline is recorded. The cache is process-local.
+if 'test' in sys.argv:
+    if os.getenv('TEST_MYSQL') != '1':
+        DATABASES = {
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': BASE_DIR / 'db.sqlite3',
+            }
+        }
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -157,13 +185,41 @@ APPEND_SLASH = False
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'account.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Reverse proxies in front of the app; with 0 the client IP used for rate limits is
+    # REMOTE_ADDR and X-Forwarded-For, which any client can forge, is ignored. Behind a
+    # proxy set it to the number of proxies, or every client shares the proxy's limit.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
+}
+
+# Token -> user snapshots kept by CachedTokenAuthentication (see account/authentication.py)
+TOKEN_AUTH_CACHE = {
+    'LOCAL_SIZE': 1024,
+    'LOCAL_TTL': 10,
+    'SHARED_TTL': 300,
+}
+
+# Sliding-window limits for the anonymous auth endpoints (see account/throttling.py).
+# The in-memory backend counts per process and rejects without touching the database;
+# with several workers use CacheRateLimitBackend, which needs Redis or Memcached as the
+# default cache. DatabaseRateLimitBackend works anywhere but writes on every attempt.
+RATE_LIMIT = {
+    'BACKEND': 'account.throttling.MemoryRateLimitBackend',
+    'RATES': {
+        'login': '10/min',
+        'password_reset': '5/min',
+        'password_reset_confirm': '10/min',
+    },
+    'STATS_MINUTES': 60,
 }
 
+# Seconds a stored Idempotency-Key response is replayed for (see base/idempotency.py)
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
 CSRF_TRUSTED_ORIGINS = [
     'http://localhost:5173'
     'https://garagify-lime.vercel.app',
@@ -184,7 +240,12 @@ CORS_ALLOW_CREDENTIALS = True
 
 CORS_ALLOW_HEADERS = [
     'authorization',
-    'content-type'
+    'content-type',
+    'idempotency-key',
+]
+
+CORS_EXPOSE_HEADERS = [
+    'idempotent-replayed',
 ]
 
 # Twilio Credentials
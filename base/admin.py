@@ -1,6 +1,8 @@
 from base.models import *
+from base.stock import record_movements, set_stock_level
 from django.urls import reverse
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 
 @admin.register(Vehicle)
@@ -32,17 +34,51 @@ class VehicleIssueAdmin(admin.ModelAdmin):
 
 @admin.register(Inventory)
 class InventoryAdmin(admin.ModelAdmin):
-    list_display = ('item_name', 'item_type', 'quantity', 'unit_price', 'created_by', 'created_at', 'view_actions')
+    list_display = ('item_name', 'item_type', 'quantity', 'reorder_level', 'is_low_stock', 'unit_price', 'created_by', 'created_at', 'view_actions')
     search_fields = ('item_name',)
-    list_filter = ('item_type',)
+    list_filter = ('item_type', 'is_low_stock')
     ordering = ('-created_at',)
 
+    def save_model(self, request, obj, form, change):
+        # Stock edits go through the ledger like the inventory API; the admin
+        # already wraps this in a transaction
+        if not change:
+            super().save_model(request, obj, form, change)
+            record_movements({obj.id: obj.quantity}, 'Initial')
+            return
+        fields = [field for field in form.changed_data if field != 'quantity']
+        if fields:
+            obj.save(update_fields=fields)
+        if 'quantity' in form.changed_data:
+            set_stock_level(obj, obj.quantity)
+
     def view_actions(self, obj):
         edit_url = reverse('admin:base_inventory_change', args=[obj.pk])
         delete_url = reverse('admin:base_inventory_delete', args=[obj.pk])
         return format_html(f'<a class="button" href="{edit_url}">Edit</a> <a class="button" style="color:red;" href="{delete_url}">Delete</a>')
     view_actions.short_description = 'Actions'
 
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('inventory_item', 'delta', 'reason', 'vehicle_solution_id', 'created_at', 'view_actions')
+    search_fields = ('inventory_item__item_name',)
+    list_filter = ('reason',)
+    ordering = ('-id',)
+    list_select_related = ('inventory_item',)
+    # The ledger is append-only; corrections are new Adjustment rows
+    readonly_fields = ('inventory_item', 'delta', 'reason', 'vehicle_solution', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def view_actions(self, obj):
+        view_url = reverse('admin:base_stockmovement_change', args=[obj.pk])
+        return format_html(f'<a class="button" href="{view_url}">View</a>')
+    view_actions.short_description = 'Actions'
+
 @admin.register(VehicleSolution)
 class VehicleSolutionAdmin(admin.ModelAdmin):
     list_display = ('vehicle_issue', 'solution_date', 'total_cost', 'view_actions')
@@ -142,4 +178,74 @@ class PaymentAdmin(admin.ModelAdmin):
         edit_url = reverse('admin:base_payment_change', args=[obj.pk])
         delete_url = reverse('admin:base_payment_delete', args=[obj.pk])
         return format_html(f'<a class="button" href="{edit_url}">Edit</a> <a class="button" style="color:red;" href="{delete_url}">Delete</a>')
-    view_actions.short_description = 'Actions'
\ No newline at end of file
+    view_actions.short_description = 'Actions'
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at', 'view_actions')
+    search_fields = ('subject', 'recipients')
+    list_filter = ('status',)
+    ordering = ('-created_at',)
+    actions = ['retry_now']
+
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='Sent').update(status='Pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"{updated} emails queued for another attempt.")
+    retry_now.short_description = 'Retry selected emails now'
+
+    def view_actions(self, obj):
+        edit_url = reverse('admin:base_outboundemail_change', args=[obj.pk])
+        delete_url = reverse('admin:base_outboundemail_delete', args=[obj.pk])
+        return format_html(f'<a class="button" href="{edit_url}">Edit</a> <a class="button" style="color:red;" href="{delete_url}">Delete</a>')
+    view_actions.short_description = 'Actions'
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'issues_opened', 'quotations_created', 'quotations_awaiting_payment', 'payments_received', 'revenue', 'view_actions')
+    ordering = ('-date',)
+    date_hierarchy = 'date'
+    # Maintained by signals and rebuild_daily_rollups; edits here would drift from the source tables
+    readonly_fields = [field.name for field in DailyRollup._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def view_actions(self, obj):
+        view_url = reverse('admin:base_dailyrollup_change', args=[obj.pk])
+        return format_html(f'<a class="button" href="{view_url}">View</a>')
+    view_actions.short_description = 'Actions'
+
+@admin.register(MonthlyRevenue)
+class MonthlyRevenueAdmin(admin.ModelAdmin):
+    list_display = ('month', 'payment_method', 'payments', 'revenue', 'tax', 'view_actions')
+    list_filter = ('payment_method',)
+    ordering = ('-month', 'payment_method')
+    # Computed by base.reports; deleting a month's rows makes the next report recompute them
+    readonly_fields = [field.name for field in MonthlyRevenue._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def view_actions(self, obj):
+        view_url = reverse('admin:base_monthlyrevenue_change', args=[obj.pk])
+        delete_url = reverse('admin:base_monthlyrevenue_delete', args=[obj.pk])
+        return format_html(f'<a class="button" href="{view_url}">View</a> <a class="button" style="color:red;" href="{delete_url}">Delete</a>')
+    view_actions.short_description = 'Actions'
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'user', 'status_code', 'created_at', 'expires_at', 'view_actions')
+    list_filter = ('status_code',)
+    search_fields = ('key', 'user__name')
+    ordering = ('-created_at',)
+    # Written by base.idempotency; deleting a key lets the next request with it run again
+    readonly_fields = [field.name for field in IdempotencyKey._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def view_actions(self, obj):
+        view_url = reverse('admin:base_idempotencykey_change', args=[obj.pk])
+        delete_url = reverse('admin:base_idempotencykey_delete', args=[obj.pk])
+        return format_html(f'<a class="button" href="{view_url}">View</a> <a class="button" style="color:red;" href="{delete_url}">Delete</a>')
+    view_actions.short_description = 'Actions'
@@ -0,0 +1,63 @@
+import threading
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+from base.models import Settings
+
+SETTINGS_VERSION_KEY = 'base:settings:version'
+SETTINGS_DATA_KEY = 'base:settings:data:{version}'
+SETTINGS_TIMEOUT = 24 * 60 * 60
+
+# Marks "no Settings row yet" in the shared cache, where None means a miss.
+NOT_CONFIGURED = 'not-configured'
+
+_lock = threading.Lock()
+_process_copy = {'version': None, 'instance': None}
+
+def _current_version():
+    version = cache.get(SETTINGS_VERSION_KEY)
+    if version is None:
+        # First reader after a restart or eviction; add() keeps a concurrent writer's version.
+        cache.add(SETTINGS_VERSION_KEY, uuid.uuid4().hex, SETTINGS_TIMEOUT)
+        version = cache.get(SETTINGS_VERSION_KEY)
+    return version
+
+def get_app_settings():
+    """
+    Returns the Settings singleton (or None when it is not configured yet).
+
+    Each process keeps its own copy and only compares a version key with the
+    shared cache, so repeated reads cost no database queries. The row is loaded
+    from the shared cache, or the database on a miss, only after the version
+    has changed. Treat the returned object as read-only; load a fresh instance
+    with Settings.objects.first() to modify it.
+    """
+    version = _current_version()
+    with _lock:
+        if version is not None and _process_copy['version'] == version:
+            return _process_copy['instance']
+
+    instance = cache.get(SETTINGS_DATA_KEY.format(version=version)) if version is not None else None
+    if instance is None:
+        instance = Settings.objects.first() or NOT_CONFIGURED
+        if version is not None:
+            cache.set(SETTINGS_DATA_KEY.format(version=version), instance, SETTINGS_TIMEOUT)
+    if instance == NOT_CONFIGURED:
+        instance = None
+
+    with _lock:
+        _process_copy.update(version=version, instance=instance)
+    return instance
+
+def invalidate_app_settings():
+    """
+    Moves every process to a new settings version once the current transaction commits.
+
+    Waiting for the commit keeps other processes from caching the old row under
+    the new version while the write is still in flight.
+    """
+    def bump():
+        cache.set(SETTINGS_VERSION_KEY, uuid.uuid4().hex, SETTINGS_TIMEOUT)
+        with _lock:
+            _process_copy.update(version=None, instance=None)
+    transaction.on_commit(bump)
@@ -0,0 +1,192 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from base.models import *
+
+ISSUE_STATUS_FIELDS = {
+    'Pending': 'issues_pending',
+    'In Progress': 'issues_in_progress',
+    'Completed': 'issues_completed',
+    'Rejected': 'issues_rejected',
+}
+OPEN_ISSUE_STATUSES = ('Pending', 'In Progress')
+TODAY_FIELDS = ('issues_opened', 'quotations_created', 'payments_received', 'revenue')
+ZERO = Decimal('0.00')
+
+# Seconds the dashboard's stock value may lag behind stock changes
+STOCK_VALUE_KEY = 'base:dashboard:stock_value'
+STOCK_VALUE_TIMEOUT = 60
+
+# Fields each model's rollup contribution is computed from
+ROLLUP_FIELDS = {
+    VehicleIssue: ('created_at', 'status'),
+    Quotation: ('created_at', 'payment_status', 'grand_total'),
+    Payment: ('payment_date', 'amount_paid'),
+}
+
+def _money(value):
+    # Unsaved instances may still hold floats or unrounded values; keep the rollup exact
+    return Decimal(str(value or 0)).quantize(Decimal('0.01'))
+
+def contribution(model, state):
+    """
+    What one row adds to the rollup, as {(date, field): amount}, from its ROLLUP_FIELDS values.
+    """
+    if state is None:
+        return {}
+    values = dict(zip(ROLLUP_FIELDS[model], state))
+    if model is VehicleIssue:
+        day = timezone.localdate(values['created_at'])
+        changes = {(day, 'issues_opened'): 1}
+        if values['status'] in ISSUE_STATUS_FIELDS:
+            changes[(day, ISSUE_STATUS_FIELDS[values['status']])] = 1
+        return changes
+    if model is Quotation:
+        day = timezone.localdate(values['created_at'])
+        changes = {(day, 'quotations_created'): 1}
+        if values['payment_status'] != 'Paid':
+            changes[(day, 'quotations_awaiting_payment')] = 1
+            changes[(day, 'awaiting_payment_value')] = _money(values['grand_total'])
+        return changes
+    day = timezone.localdate(values['payment_date'])
+    return {(day, 'payments_received'): 1, (day, 'revenue'): _money(values['amount_paid'])}
+
+def rollup_difference(new, old):
+    """
+    new - old for two contributions, dropping entries that cancel out.
+    """
+    changes = dict(new)
+    for key, amount in old.items():
+        changes[key] = changes.get(key, 0) - amount
+    return {key: amount for key, amount in changes.items() if amount}
+
+def apply_rollup(changes):
+    """
+    Adds {(date, field): amount} to the rollup with one UPDATE per day touched.
+
+    The day's row is created on first use; a concurrent creator is caught by
+    the unique date and the increment retried as an UPDATE.
+    """
+    by_day = defaultdict(dict)
+    for (day, field), amount in changes.items():
+        if amount:
+            by_day[day][field] = by_day[day].get(field, 0) + amount
+    for day, deltas in sorted(by_day.items()):
+        increments = {field: F(field) + amount for field, amount in deltas.items()}
+        if DailyRollup.objects.filter(date=day).update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                DailyRollup.objects.create(date=day, **deltas)
+        except IntegrityError:
+            DailyRollup.objects.filter(date=day).update(**increments)
+
+def record_rollups(instances):
+    """
+    Adds freshly inserted rows to the rollup; for bulk_create(), which sends no signals.
+    """
+    changes = {}
+    for instance in instances:
+        state = tuple(getattr(instance, field) for field in ROLLUP_FIELDS[type(instance)])
+        for key, amount in contribution(type(instance), state).items():
+            changes[key] = changes.get(key, 0) + amount
+    apply_rollup(changes)
+
+def rebuild_rollups():
+    """
+    Recomputes every DailyRollup row from the source tables; returns the number of days written.
+
+    One grouped query per table; the whole rewrite is one transaction, so the
+    dashboard never sees a half-built table.
+    """
+    rows = defaultdict(dict)
+
+    def add(day, field, amount):
+        rows[day][field] = rows[day].get(field, 0) + amount
+
+    issues = (
+        VehicleIssue.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'status').annotate(count=Count('id')).order_by()
+    )
+    for row in issues:
+        add(row['day'], 'issues_opened', row['count'])
+        if row['status'] in ISSUE_STATUS_FIELDS:
+            add(row['day'], ISSUE_STATUS_FIELDS[row['status']], row['count'])
+
+    unpaid = ~Q(payment_status='Paid')
+    quotations = (
+        Quotation.objects.annotate(day=TruncDate('created_at')).values('day').order_by()
+        .annotate(
+            count=Count('id'),
+            awaiting=Count('id', filter=unpaid),
+            awaiting_value=Coalesce(Sum('grand_total', filter=unpaid), ZERO, output_field=DecimalField()),
+        )
+    )
+    for row in quotations:
+        add(row['day'], 'quotations_created', row['count'])
+        add(row['day'], 'quotations_awaiting_payment', row['awaiting'])
+        add(row['day'], 'awaiting_payment_value', row['awaiting_value'])
+
+    payments = (
+        Payment.objects.annotate(day=TruncDate('payment_date')).values('day').order_by()
+        .annotate(count=Count('id'), total=Sum('amount_paid'))
+    )
+    for row in payments:
+        add(row['day'], 'payments_received', row['count'])
+        add(row['day'], 'revenue', row['total'])
+
+    with transaction.atomic():
+        DailyRollup.objects.all().delete()
+        DailyRollup.objects.bulk_create([DailyRollup(date=day, **fields) for day, fields in sorted(rows.items())], batch_size=1000)
+    return len(rows)
+
+def stock_value():
+    """
+    Value of the stock on hand, cached for STOCK_VALUE_TIMEOUT seconds.
+
+    Stock changes through bulk UPDATEs, imports and reconciles that no signal
+    sees, so the figure is not kept in the rollup. The full Inventory aggregate
+    runs at most once per timeout instead of on every dashboard load.
+    """
+    value = cache.get(STOCK_VALUE_KEY)
+    if value is None:
+        value = Inventory.objects.aggregate(
+            value=Sum(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=20, decimal_places=2))
+        )['value'] or ZERO
+        cache.set(STOCK_VALUE_KEY, value, STOCK_VALUE_TIMEOUT)
+    return value
+
+def dashboard_summary(today=None):
+    """
+    Front desk figures from the rollup in one aggregate query, plus the cached stock value.
+
+    The rollup has one row per day, so the aggregate stays cheap however large
+    the issue, quotation and payment tables grow; the stock value is the one
+    figure read from Inventory itself, at most once a minute (see stock_value()).
+    """
+    today = today or timezone.localdate()
+    cumulative = [*ISSUE_STATUS_FIELDS.values(), 'quotations_awaiting_payment', 'awaiting_payment_value']
+    totals = DailyRollup.objects.aggregate(
+        **{field: Sum(field) for field in cumulative},
+        **{f'today_{field}': Sum(field, filter=Q(date=today)) for field in TODAY_FIELDS},
+    )
+
+    issues_by_status = {status: totals[field] or 0 for status, field in ISSUE_STATUS_FIELDS.items()}
+    return {
+        "date": today,
+        "issues_by_status": issues_by_status,
+        "open_issues": sum(issues_by_status[status] for status in OPEN_ISSUE_STATUSES),
+        "today": {
+            field: totals[f'today_{field}'] or (ZERO if field == 'revenue' else 0)
+            for field in TODAY_FIELDS
+        },
+        "awaiting_payment": {
+            "count": totals['quotations_awaiting_payment'] or 0,
+            "value": totals['awaiting_payment_value'] or ZERO,
+        },
+        "stock_value": stock_value(),
+    }
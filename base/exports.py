@@ -0,0 +1,123 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from base.models import *
+
+# Rows fetched per query while streaming an export
+EXPORT_CHUNK_SIZE = 2000
+
+# Column header -> values_list() lookup; related columns are joined in the same query
+EXPORTS = {
+    'inventory': (Inventory, [
+        ('id', 'id'),
+        ('item_name', 'item_name'),
+        ('item_type', 'item_type'),
+        ('quantity', 'quantity'),
+        ('unit_price', 'unit_price'),
+        ('reorder_level', 'reorder_level'),
+        ('created_by', 'created_by__name'),
+        ('created_at', 'created_at'),
+    ]),
+    'vehicles': (Vehicle, [
+        ('id', 'id'),
+        ('license_plate', 'license_plate'),
+        ('vin', 'vin'),
+        ('make', 'make'),
+        ('model', 'model'),
+        ('year', 'year'),
+        ('color', 'color'),
+        ('customer_id', 'customer_id'),
+        ('customer_name', 'customer__name'),
+        ('customer_phone', 'customer__phone_number'),
+        ('created_at', 'created_at'),
+    ]),
+    'vehicle_issues': (VehicleIssue, [
+        ('id', 'id'),
+        ('vehicle_id', 'vehicle_id'),
+        ('license_plate', 'vehicle__license_plate'),
+        ('status', 'status'),
+        ('reported_issue', 'reported_issue'),
+        ('diagnosed_issue', 'diagnosed_issue'),
+        ('estimated_cost', 'estimated_cost'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]),
+    'quotations': (Quotation, [
+        ('id', 'id'),
+        ('vehicle_solution_id', 'vehicle_solution_id'),
+        ('license_plate', 'vehicle_solution__vehicle_issue__vehicle__license_plate'),
+        ('customer_name', 'vehicle_solution__vehicle_issue__vehicle__customer__name'),
+        ('grand_total', 'grand_total'),
+        ('payment_status', 'payment_status'),
+        ('created_at', 'created_at'),
+    ]),
+    'payments': (Payment, [
+        ('id', 'id'),
+        ('quotation_id', 'quotation_id'),
+        ('amount_paid', 'amount_paid'),
+        ('tax_rate', 'tax_rate'),
+        ('payment_method', 'payment_method'),
+        ('paid_by_id', 'paid_by_id'),
+        ('paid_by_name', 'paid_by__name'),
+        ('payment_date', 'payment_date'),
+    ]),
+}
+
+class Echo:
+    """
+    File-like object whose write() returns the line instead of buffering it, for csv.writer.
+    """
+    def write(self, value):
+        return value
+
+def export_rows(model, lookups, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields value tuples for every row of `model`, in id order; `lookups` must start with 'id'.
+
+    Rows are read in keyset-paginated chunks (`id > last id LIMIT chunk_size`),
+    so memory stays flat however large the table is. QuerySet.iterator() alone
+    would not do that on MySQL, whose driver loads the whole result set.
+    """
+    queryset = model.objects.order_by('id').values_list(*lookups)
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+def csv_lines(headers, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(['' if value is None else value for value in row])
+
+def ndjson_lines(headers, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
+
+EXPORT_FORMATS = {
+    'csv': (csv_lines, 'text/csv'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+}
+
+def streaming_download(filename, headers, rows, output='csv'):
+    """
+    Returns a StreamingHttpResponse rendering the `rows` iterable as CSV or NDJSON, as an attachment.
+    """
+    render, content_type = EXPORT_FORMATS[output]
+    response = StreamingHttpResponse(render(headers, rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    return response
+
+def stream_export(name, output='csv'):
+    """
+    Returns a StreamingHttpResponse with every row of the `name` export as CSV or NDJSON.
+    """
+    model, columns = EXPORTS[name]
+    headers = [header for header, _ in columns]
+    rows = export_rows(model, [lookup for _, lookup in columns])
+    return streaming_download(f"{name}-{timezone.localdate():%Y%m%d}", headers, rows, output)
@@ -0,0 +1,107 @@
+from datetime import datetime, time, timedelta
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+def choice_of(choices):
+    """
+    Parser accepting one of a model field's choices, case-insensitively.
+    """
+    values = {value.lower(): value for value, _ in choices}
+
+    def parse(raw):
+        try:
+            return values[raw.strip().lower()]
+        except KeyError:
+            raise ValueError(f"Must be one of: {', '.join(values.values())}.")
+    return parse
+
+def positive_int(raw):
+    try:
+        value = int(raw)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise ValueError("Must be a positive integer.")
+    return value
+
+def day(raw):
+    try:
+        value = parse_date(raw.strip())
+    except ValueError:
+        # Well-formed but impossible, e.g. 2024-02-30
+        value = None
+    if value is None:
+        raise ValueError("Must be a date formatted YYYY-MM-DD.")
+    return value
+
+def day_start(raw):
+    """
+    Parser for the inclusive lower bound of a datetime range given as a date.
+
+    Comparing against midnight keeps the filter a plain range on the column,
+    which an index can serve, unlike a `__date` lookup.
+    """
+    return timezone.make_aware(datetime.combine(day(raw), time.min))
+
+def day_end(raw):
+    """
+    Parser for the exclusive upper bound (midnight after the given date); use with `__lt`.
+    """
+    return timezone.make_aware(datetime.combine(day(raw) + timedelta(days=1), time.min))
+
+class ListQuery:
+    """
+    Whitelisted filtering, search and sorting for a list endpoint.
+
+    `filters` maps a query parameter to (lookup, parse), where parse turns the
+    raw string into the lookup value or raises ValueError with a message for
+    the client. `search_fields` are the lookups OR-ed together for `?search=`,
+    and `ordering_fields` the fields `?ordering=` may name (prefix with '-' for
+    descending). Results are always tie-broken on id so orderings are stable.
+    Invalid parameters raise a ValidationError (400) naming the parameter.
+    """
+    search_param = 'search'
+    ordering_param = 'ordering'
+
+    def __init__(self, filters=None, search_fields=(), ordering_fields=(), default_ordering='-id'):
+        self.filters = filters or {}
+        self.search_fields = search_fields
+        self.ordering_fields = set(ordering_fields) | {'id'}
+        self.default_ordering = default_ordering
+
+    def filter(self, queryset, request):
+        conditions, errors = {}, {}
+        for param, (lookup, parse) in self.filters.items():
+            raw = request.query_params.get(param)
+            if not raw:
+                continue
+            try:
+                conditions[lookup] = parse(raw)
+            except ValueError as e:
+                errors[param] = str(e)
+        if errors:
+            raise ValidationError(errors)
+        queryset = queryset.filter(**conditions)
+
+        search = request.query_params.get(self.search_param, '').strip()
+        if search and self.search_fields:
+            condition = Q()
+            for lookup in self.search_fields:
+                condition |= Q(**{lookup: search})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_param) or self.default_ordering
+        if ordering.lstrip('-') not in self.ordering_fields:
+            raise ValidationError({
+                self.ordering_param: f"Must be one of: {', '.join(sorted(self.ordering_fields))} (prefix '-' for descending)."
+            })
+        if ordering.lstrip('-') == 'id':
+            return (ordering,)
+        return (ordering, '-id')
+
+    def apply(self, queryset, request):
+        return self.filter(queryset, request).order_by(*self.get_ordering(request))
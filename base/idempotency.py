@@ -0,0 +1,123 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, OperationalError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from base.models import *
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+def request_fingerprint(request):
+    """
+    SHA-256 of the method, full path and body, so a key reused for a different request can be told apart.
+    """
+    data = request.data
+    if hasattr(data, 'lists'):
+        # Form and multipart bodies arrive as a QueryDict
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(f"{request.method} {request.get_full_path()}\n{body}".encode()).hexdigest()
+
+def _in_progress():
+    return Response({
+        "detail": f"A request with this {IDEMPOTENCY_HEADER} is still being processed."
+    }, status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response({
+            "detail": f"This {IDEMPOTENCY_HEADER} was already used for a different request."
+        }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if record.status_code is None:
+        return _in_progress()
+    return Response(record.response_body, status=record.status_code, headers={REPLAYED_HEADER: 'true'})
+
+def _claim(user, key, fingerprint, now, expired=None):
+    """
+    Inserts the key row for this request, or takes over the `expired` row read for it.
+
+    Returns the row, or None when another request got there first. An expired
+    row is reused with an UPDATE by primary key: deleting by (user, key) before
+    inserting would lock the index gap on MySQL, and two duplicates holding
+    that gap would deadlock on each other's INSERT.
+    """
+    values = {'fingerprint': fingerprint, 'status_code': None, 'response_body': None,
+              'expires_at': now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)}
+    if expired is None:
+        return IdempotencyKey.objects.create(user=user, key=key, **values)
+    if not IdempotencyKey.objects.filter(pk=expired.pk, expires_at__lte=now).update(created_at=now, **values):
+        return None
+    for field, value in {'created_at': now, **values}.items():
+        setattr(expired, field, value)
+    return expired
+
+def idempotent(handler):
+    """
+    Makes an APIView `post` safe to retry when the client sends an Idempotency-Key header.
+
+    The first response for a (user, key) pair is stored and replayed, without
+    running the handler again, until IDEMPOTENCY_KEY_TTL seconds have passed;
+    reusing the key with a different body is a 422. The key row is written in
+    the same transaction as the handler's writes, so a concurrent duplicate
+    waits on the row until the first request commits and then replays its
+    response, or gets a 409 to retry if the database broke the wait off with a
+    deadlock. A handler that raises leaves no key behind, and server errors
+    (5xx) are not stored. Requests without the header are untouched.
+    """
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response({
+                "detail": f"{IDEMPOTENCY_HEADER} must be between 1 and {MAX_KEY_LENGTH} characters."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_fingerprint(request)
+        now = timezone.now()
+        records = IdempotencyKey.objects.filter(user=request.user, key=key)
+        record = records.first()
+        if record is not None and record.expires_at > now:
+            return _replay(record, fingerprint)
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    record = _claim(request.user, key, fingerprint, now, expired=record)
+            except (IntegrityError, OperationalError):
+                # A duplicate key, or a deadlock that rolled the whole transaction back
+                record = None
+            if record is not None:
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code >= 500:
+                    record.delete()
+                else:
+                    record.status_code = response.status_code
+                    # Stored as rendered, so a replay returns the same JSON the first client got
+                    record.response_body = json.loads(JSONRenderer().render(response.data))
+                    record.save(update_fields=['status_code', 'response_body'])
+                return response
+
+        # Another request with this key got there first; answer with its response
+        record = records.filter(expires_at__gt=now).first()
+        if record is None:
+            return _in_progress()
+        return _replay(record, fingerprint)
+    return wrapper
+
+def purge_expired_keys(now=None):
+    """
+    Deletes stored responses past their expiry, over the expires_at index; returns the number removed.
+    """
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
@@ -0,0 +1,188 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from django.db import connection, transaction
+from base.models import *
+from base.stock import record_movements
+
+# Rows written per INSERT ... ON CONFLICT/ON DUPLICATE KEY statement
+IMPORT_CHUNK_SIZE = 1000
+# Row errors listed in a report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+IMPORT_MODES = ('set', 'add')
+
+MAX_QUANTITY = 2147483647
+MAX_UNIT_PRICE = Decimal('99999999.99')
+ITEM_TYPES = {value.lower(): value for value, _ in Inventory.ITEM_TYPES}
+
+class InventoryImportError(Exception):
+    """
+    The uploaded file could not be read at all; `detail` is safe to return to the client.
+    """
+    def __init__(self, detail):
+        super().__init__(detail)
+        self.detail = detail
+
+def read_rows(content, output='csv'):
+    """
+    Parses CSV (with a header row) or JSON (a list, or {"items": [...]}) into a list of dicts.
+    """
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise InventoryImportError("The file must be UTF-8 encoded.")
+    if output == 'json':
+        try:
+            rows = json.loads(content)
+        except ValueError as e:
+            raise InventoryImportError(f"Invalid JSON: {e}")
+        if isinstance(rows, dict):
+            rows = rows.get('items')
+        if not isinstance(rows, list):
+            raise InventoryImportError("JSON must be a list of items or an object with an 'items' list.")
+        return rows
+    try:
+        return list(csv.DictReader(io.StringIO(content)))
+    except csv.Error as e:
+        raise InventoryImportError(f"Invalid CSV: {e}")
+
+def item_key(name, item_type):
+    """
+    An item's identity as the unique (item_name, item_type) index compares it.
+
+    MySQL's default collation ignores case and trailing spaces in names; SQLite
+    and PostgreSQL compare them exactly, so there a case variant is a new item.
+    """
+    if connection.vendor == 'mysql':
+        name = name.rstrip().casefold()
+    return (name, item_type)
+
+def _clean_row(row):
+    """
+    Returns (cleaned values, field errors) for one import row.
+    """
+    if not isinstance(row, dict):
+        return None, {"row": "Must be an object with item_name, item_type, quantity and unit_price."}
+    errors = {}
+    name = row.get('item_name')
+    name = name.strip() if isinstance(name, str) else ''
+    if not name:
+        errors['item_name'] = "This field is required."
+    elif len(name) > 255:
+        errors['item_name'] = "Ensure this field has no more than 255 characters."
+
+    item_type = ITEM_TYPES.get(str(row.get('item_type') or '').strip().lower())
+    if item_type is None:
+        errors['item_type'] = f"Must be one of: {', '.join(ITEM_TYPES.values())}."
+
+    try:
+        quantity = int(str(row.get('quantity', '')).strip())
+        if not 0 <= quantity <= MAX_QUANTITY:
+            raise ValueError
+    except ValueError:
+        errors['quantity'] = "Must be a whole number of at least 0."
+
+    try:
+        unit_price = Decimal(str(row.get('unit_price', '')).strip().replace(',', ''))
+        if not unit_price.is_finite() or not 0 <= unit_price <= MAX_UNIT_PRICE:
+            raise InvalidOperation
+        unit_price = unit_price.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        errors['unit_price'] = f"Must be a number between 0 and {MAX_UNIT_PRICE}."
+
+    if errors:
+        return None, errors
+    return {'item_name': name, 'item_type': item_type, 'quantity': quantity, 'unit_price': unit_price}, None
+
+def validate_rows(rows):
+    """
+    Validates every row up front, without touching the database.
+
+    Returns ({item_key(): cleaned row}, errors), where errors is a list of
+    {"row": <1-based row number>, "errors": {field: message}}. A name and type
+    appearing twice in one file, as the unique index compares them, is an error
+    on the later row.
+    """
+    items, errors, seen = {}, [], {}
+    for number, row in enumerate(rows, start=1):
+        cleaned, row_errors = _clean_row(row)
+        if cleaned is not None:
+            key = item_key(cleaned['item_name'], cleaned['item_type'])
+            if key in seen:
+                row_errors = {"item_name": f"Duplicate of row {seen[key]}."}
+            else:
+                seen[key] = number
+                items[key] = cleaned
+        if row_errors:
+            errors.append({"row": number, "errors": row_errors})
+    return items, errors
+
+def _chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def import_inventory(rows, user=None, mode='set', chunk_size=IMPORT_CHUNK_SIZE, dry_run=False):
+    """
+    Validates `rows` and upserts them into Inventory by (item_name, item_type).
+
+    With mode 'set' quantity and unit_price replace the stored values; with
+    'add' the quantity is added to the current stock. Nothing is written if
+    any row is invalid or `dry_run` is set. Each chunk locks and reads the
+    existing rows in one query, writes them with one
+    bulk_create(update_conflicts=True) and appends the stock changes to the
+    ledger with one INSERT (plus one query for the ids of new items).
+
+    Returns a report: {"received", "created", "updated", "failed", "errors"}.
+    """
+    if mode not in IMPORT_MODES:
+        raise InventoryImportError(f"Unsupported mode '{mode}'. Use one of: {', '.join(IMPORT_MODES)}.")
+    items, errors = validate_rows(rows)
+    report = {"received": len(rows), "created": 0, "updated": 0, "failed": len(errors), "errors": errors[:MAX_REPORTED_ERRORS]}
+    if errors:
+        return report
+
+    # MySQL's ON DUPLICATE KEY UPDATE cannot name the conflict target
+    unique_fields = ['item_name', 'item_type'] if connection.features.supports_update_conflicts_with_target else None
+    with transaction.atomic():
+        for chunk in _chunks(list(items.values()), chunk_size):
+            names = {item['item_name'] for item in chunk}
+            # Locked so the ledger deltas below match what the upsert overwrites
+            existing = Inventory.objects.select_for_update().filter(item_name__in=names).order_by('id')
+            # Keyed like the unique index, so a case variant updates the stored item instead of counting as new
+            stock = {
+                item_key(name, item_type): (inventory_id, quantity)
+                for inventory_id, name, item_type, quantity in existing.values_list('id', 'item_name', 'item_type', 'quantity')
+            }
+
+            objs, changes, created = [], {}, []
+            for item in chunk:
+                key = item_key(item['item_name'], item['item_type'])
+                if key in stock:
+                    report['updated'] += 1
+                    inventory_id, current = stock[key]
+                    if mode == 'add':
+                        item['quantity'] = min(current + item['quantity'], MAX_QUANTITY)
+                    changes[inventory_id] = item['quantity'] - current
+                else:
+                    report['created'] += 1
+                    created.append(item)
+                objs.append(Inventory(created_by=user, **item))
+            if dry_run:
+                continue
+
+            Inventory.objects.bulk_create(
+                objs, update_conflicts=True, unique_fields=unique_fields, update_fields=['quantity', 'unit_price']
+            )
+            if created:
+                # MySQL does not return ids from the upsert, so new items are looked up by key
+                ids = {
+                    item_key(name, item_type): inventory_id
+                    for inventory_id, name, item_type in Inventory.objects.filter(item_name__in={item['item_name'] for item in created})
+                    .values_list('id', 'item_name', 'item_type')
+                }
+                for item in created:
+                    changes[ids[item_key(item['item_name'], item['item_type'])]] = item['quantity']
+            record_movements(changes, 'Import')
+    return report
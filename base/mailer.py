@@ -0,0 +1,26 @@
+from django.db import transaction
+from base.models import OutboundEmail
+
+def _build(subject, body, recipients, from_email=None):
+    return OutboundEmail(subject=subject, body=body, recipients=list(recipients), from_email=from_email)
+
+def queue_email(subject, body, recipients, from_email=None):
+    """
+    Queues one email for the `send_queued_emails` worker.
+
+    The outbox row is written once the surrounding transaction commits, so a
+    rolled back request never mails anybody and the request itself never waits
+    on SMTP. Outside a transaction the row is written immediately.
+    """
+    email = _build(subject, body, recipients, from_email)
+    transaction.on_commit(email.save)
+    return email
+
+def queue_emails(messages):
+    """
+    Queues several (subject, body, recipients[, from_email]) messages with one INSERT after commit.
+    """
+    emails = [_build(*message) for message in messages]
+    if emails:
+        transaction.on_commit(lambda: OutboundEmail.objects.bulk_create(emails))
+    return emails
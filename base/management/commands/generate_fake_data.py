@@ -0,0 +1,339 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from base.dashboard import rebuild_rollups
+from base.models import *
+from base.reports import rebuild_monthly_revenue
+
+MAKES = {
+    'Toyota': ['Corolla', 'RAV4', 'Land Cruiser', 'Hilux', 'Vitz'],
+    'Nissan': ['Patrol', 'X-Trail', 'Note', 'Navara'],
+    'Honda': ['Civic', 'Fit', 'CR-V'],
+    'Mitsubishi': ['Pajero', 'L200', 'Outlander'],
+    'Suzuki': ['Swift', 'Vitara', 'Jimny'],
+}
+COLORS = ['White', 'Black', 'Silver', 'Blue', 'Red', 'Grey', 'Green']
+FIRST_NAMES = ['Aline', 'Eric', 'Grace', 'Jean', 'Diane', 'Patrick', 'Claudine', 'Olivier', 'Sandrine', 'Emmanuel']
+LAST_NAMES = ['Uwase', 'Mugisha', 'Niyonzima', 'Habimana', 'Ingabire', 'Nshuti', 'Umutoni', 'Kayitesi']
+PARTS = ['Brake Pad', 'Oil Filter', 'Air Filter', 'Spark Plug', 'Timing Belt', 'Shock Absorber', 'Clutch Plate',
+         'Radiator Hose', 'Fuel Pump', 'Wiper Blade', 'Head Lamp', 'Battery', 'Engine Oil', 'Coolant']
+ISSUES = ['Engine knocking', 'Brakes squeaking', 'Overheating', 'Battery drains overnight', 'Steering vibration',
+          'Check engine light on', 'Gearbox slipping', 'Suspension noise', 'AC not cooling', 'Oil leak']
+PAYMENT_METHODS = [choice for choice, _ in Payment.PAYMENT_METHODS]
+STATUSES = [choice for choice, _ in VehicleIssue.STATUS_CHOICES]
+
+# Models whose primary keys are pre-allocated so shards can insert children
+# without reading generated ids back (MySQL's bulk_create does not return them).
+ID_MODELS = {
+    'user': User,
+    'inventory': Inventory,
+    'vehicle': Vehicle,
+    'issue': VehicleIssue,
+    'solution': VehicleSolution,
+    'solution_item': SolutionItem,
+    'assignment': VehicleSolutionMechanic,
+    'quotation': Quotation,
+    'quoted_item': QuotedItem,
+    'quoted_mechanic': QuotedMechanic,
+    'payment': Payment,
+}
+
+# auto_now/auto_now_add fields that would otherwise stamp every row with "now".
+TIMESTAMP_FIELDS = [
+    (Vehicle, 'created_at'), (Vehicle, 'updated_at'),
+    (VehicleIssue, 'created_at'), (VehicleIssue, 'updated_at'),
+    (Quotation, 'created_at'), (Quotation, 'updated_at'),
+    (Payment, 'payment_date'),
+]
+
+
+@contextmanager
+def explicit_timestamps():
+    """
+    Lets bulk_create keep the back-dated timestamps set on generated rows.
+    """
+    saved = []
+    for model, name in TIMESTAMP_FIELDS:
+        field = model._meta.get_field(name)
+        saved.append((field, field.auto_now, field.auto_now_add))
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def person_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def generate_shard(shard, start, stop, plan):
+    """
+    Generates customers [start, stop) and everything hanging off them.
+
+    Every id is derived from the global customer index, so the output is the
+    same no matter how the customers are split across worker processes.
+    """
+    rng = random.Random(f"{plan['seed']}-{shard}")
+    ids = plan['ids']
+    batch_size = plan['batch_size']
+    now = plan['now']
+    vehicles_per_customer = plan['vehicles_per_customer']
+    issues_per_vehicle = plan['issues_per_vehicle']
+    items_per_solution = plan['items_per_solution']
+    mechanics_per_solution = plan['mechanics_per_solution']
+    mechanic_ids = plan['mechanic_ids']
+    inventory = plan['inventory']
+    inventory_ids = list(inventory)
+    password = plan['password']
+
+    customers, vehicles, issues, solutions = [], [], [], []
+    solution_items, assignments = [], []
+    quotations, quoted_items, quoted_mechanics, payments = [], [], [], []
+
+    for c in range(start, stop):
+        customer_id = ids['customer'] + c
+        name = person_name(rng)
+        customers.append(User(
+            id=customer_id, name=name, username=f'customer-{customer_id}', slug=f'customer-{customer_id}',
+            email=f'customer{customer_id}@fake.garagify.test', phone_number=f'07{customer_id:010d}',
+            role='Customer', address=f'KG {rng.randint(1, 999)} St', password=password,
+        ))
+        for j in range(vehicles_per_customer):
+            v = c * vehicles_per_customer + j
+            vehicle_id = ids['vehicle'] + v
+            make = rng.choice(list(MAKES))
+            vehicle_created = now - timedelta(days=rng.uniform(0, plan['days']))
+            vehicles.append(Vehicle(
+                id=vehicle_id, customer_id=customer_id, make=make, model=rng.choice(MAKES[make]),
+                year=rng.randint(2000, now.year), color=rng.choice(COLORS),
+                license_plate=f'RF{vehicle_id:08d}', vin=f'FAKEVIN{vehicle_id:010d}',
+                created_at=vehicle_created, updated_at=vehicle_created,
+            ))
+            for k in range(issues_per_vehicle):
+                i = v * issues_per_vehicle + k
+                issue_id = ids['issue'] + i
+                issue_created = vehicle_created + (now - vehicle_created) * rng.random()
+                has_solution = rng.random() < plan['solution_ratio']
+                issues.append(VehicleIssue(
+                    id=issue_id, vehicle_id=vehicle_id, reported_issue=rng.choice(ISSUES),
+                    diagnosed_issue='Diagnosed during inspection',
+                    status='Completed' if has_solution else rng.choice(STATUSES),
+                    estimated_cost=Decimal(rng.randint(10, 500) * 1000),
+                    created_at=issue_created, updated_at=issue_created,
+                ))
+                if not has_solution:
+                    continue
+
+                solution_id = ids['solution'] + i
+                solution_date = min(now, issue_created + timedelta(hours=rng.uniform(1, 72)))
+                solutions.append(VehicleSolution(
+                    id=solution_id, vehicle_issue_id=issue_id, solution_description='Repaired and tested',
+                    solution_date=solution_date,
+                ))
+                lines = []
+                for n, inventory_id in enumerate(rng.sample(inventory_ids, items_per_solution)):
+                    quantity = rng.randint(1, 4)
+                    lines.append((n, inventory_id, quantity, inventory[inventory_id]))
+                    solution_items.append(SolutionItem(
+                        id=ids['solution_item'] + i * items_per_solution + n, vehicle_solution_id=solution_id,
+                        inventory_item_id=inventory_id, quantity_used=quantity, item_cost=inventory[inventory_id],
+                    ))
+                chosen = rng.sample(mechanic_ids, mechanics_per_solution)
+                for n, mechanic_id in enumerate(chosen):
+                    assignments.append(VehicleSolutionMechanic(
+                        id=ids['assignment'] + i * mechanics_per_solution + n,
+                        vehicle_solution_id=solution_id, mechanic_id=mechanic_id,
+                    ))
+
+                if rng.random() >= plan['quotation_ratio']:
+                    continue
+                quotation_id = ids['quotation'] + i
+                quoted_at = min(now, solution_date + timedelta(hours=rng.uniform(1, 48)))
+                parts_total = Decimal('0')
+                for n, inventory_id, quantity, unit_price in lines:
+                    line_total = unit_price * quantity
+                    parts_total += line_total
+                    quoted_items.append(QuotedItem(
+                        id=ids['quoted_item'] + i * items_per_solution + n, quotation_id=quotation_id,
+                        inventory_item_id=inventory_id, quantity_used=quantity,
+                        unit_price=unit_price, item_total=line_total,
+                    ))
+                labor_total = Decimal('0')
+                for n, mechanic_id in enumerate(chosen):
+                    share = Decimal(rng.randint(5, 50) * 1000)
+                    labor_total += share
+                    quoted_mechanics.append(QuotedMechanic(
+                        id=ids['quoted_mechanic'] + i * mechanics_per_solution + n, quotation_id=quotation_id,
+                        mechanic_id=mechanic_id, labor_share=share,
+                    ))
+                grand_total = parts_total + labor_total
+                is_paid = rng.random() < plan['payment_ratio']
+                quotations.append(Quotation(
+                    id=quotation_id, vehicle_solution_id=solution_id, grand_total=grand_total,
+                    payment_status='Paid' if is_paid else 'Pending',
+                    created_at=quoted_at, updated_at=quoted_at,
+                ))
+                if is_paid:
+                    tax_rate = Decimal('18.00')
+                    payments.append(Payment(
+                        id=ids['payment'] + i, quotation_id=quotation_id,
+                        amount_paid=(grand_total * (1 + tax_rate / 100)).quantize(Decimal('0.01')),
+                        tax_rate=tax_rate, payment_method=rng.choice(PAYMENT_METHODS), paid_by_id=customer_id,
+                        payment_date=min(now, quoted_at + timedelta(days=rng.uniform(0, 14))),
+                    ))
+
+    with explicit_timestamps(), transaction.atomic():
+        for model, rows in (
+            (User, customers), (Vehicle, vehicles), (VehicleIssue, issues), (VehicleSolution, solutions),
+            (SolutionItem, solution_items), (VehicleSolutionMechanic, assignments), (Quotation, quotations),
+            (QuotedItem, quoted_items), (QuotedMechanic, quoted_mechanics), (Payment, payments),
+        ):
+            model.objects.bulk_create(rows, batch_size=batch_size)
+
+    return {
+        'customers': len(customers), 'vehicles': len(vehicles), 'issues': len(issues),
+        'solutions': len(solutions), 'solution_items': len(solution_items), 'assignments': len(assignments),
+        'quotations': len(quotations), 'payments': len(payments),
+    }
+
+
+def generate_shard_in_worker(*args):
+    """
+    Worker-process entry point: generates one shard and releases its connection.
+    """
+    try:
+        return generate_shard(*args)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic dataset for load testing: customers, vehicles, issues, "
+        "solutions, solution items, mechanic assignments, quotations and payments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help="Random seed; the same seed on the same database gives the same data.")
+        parser.add_argument('--scale', type=float, default=1.0, help="Multiplier applied to --customers, --mechanics and --inventory.")
+        parser.add_argument('--customers', type=int, default=1000, help="Number of customers to create.")
+        parser.add_argument('--mechanics', type=int, default=20, help="Number of mechanics to create.")
+        parser.add_argument('--inventory', type=int, default=500, help="Number of inventory items to create.")
+        parser.add_argument('--vehicles-per-customer', type=int, default=2)
+        parser.add_argument('--issues-per-vehicle', type=int, default=2)
+        parser.add_argument('--solution-ratio', type=float, default=0.75, help="Share of issues that receive a solution.")
+        parser.add_argument('--items-per-solution', type=int, default=3)
+        parser.add_argument('--mechanics-per-solution', type=int, default=2)
+        parser.add_argument('--quotation-ratio', type=float, default=0.6, help="Share of solutions that receive a quotation.")
+        parser.add_argument('--payment-ratio', type=float, default=0.5, help="Share of quotations that are paid.")
+        parser.add_argument('--days', type=int, default=365, help="Spread generated activity over this many past days.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk_create statement.")
+        parser.add_argument('--shard-size', type=int, default=1000, help="Customers generated per unit of work.")
+        parser.add_argument('--workers', type=int, default=1, help="Parallel worker processes (server databases only).")
+
+    def handle(self, *args, **options):
+        scale = options['scale']
+        customers = int(options['customers'] * scale)
+        mechanics = max(int(options['mechanics'] * scale), options['mechanics_per_solution'])
+        inventory_count = max(int(options['inventory'] * scale), options['items_per_solution'])
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING("SQLite allows a single writer; falling back to one worker."))
+            workers = 1
+        if options['batch_size'] < 1 or options['shard_size'] < 1:
+            raise CommandError("--batch-size and --shard-size must be positive.")
+
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        ids = {
+            key: (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+            for key, model in ID_MODELS.items()
+        }
+        # Mechanics take the first user ids, customers follow.
+        ids['customer'] = ids['user'] + mechanics
+        password = make_password(None)
+
+        mechanic_rows = [
+            User(
+                id=ids['user'] + m, name=person_name(rng), username=f'mechanic-{ids["user"] + m}',
+                slug=f'mechanic-{ids["user"] + m}', email=f'mechanic{ids["user"] + m}@fake.garagify.test',
+                phone_number=f'07{ids["user"] + m:010d}', role='Mechanic', password=password,
+            )
+            for m in range(mechanics)
+        ]
+        inventory_rows = [
+            Inventory(
+                id=ids['inventory'] + n, item_name=f"{rng.choice(PARTS)} {ids['inventory'] + n}",
+                item_type=rng.choice(Inventory.ITEM_TYPES)[0], quantity=rng.randint(500, 5000),
+                unit_price=Decimal(rng.randint(1000, 50000)).quantize(Decimal('0.01')),
+            )
+            for n in range(inventory_count)
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(mechanic_rows, batch_size=options['batch_size'])
+            Inventory.objects.bulk_create(inventory_rows, batch_size=options['batch_size'])
+            StockMovement.objects.bulk_create(
+                [StockMovement(inventory_item_id=row.id, delta=row.quantity, reason='Initial') for row in inventory_rows],
+                batch_size=options['batch_size'],
+            )
+
+        plan = {
+            'seed': options['seed'],
+            'ids': ids,
+            'now': now,
+            'days': options['days'],
+            'batch_size': options['batch_size'],
+            'password': password,
+            'vehicles_per_customer': options['vehicles_per_customer'],
+            'issues_per_vehicle': options['issues_per_vehicle'],
+            'items_per_solution': options['items_per_solution'],
+            'mechanics_per_solution': options['mechanics_per_solution'],
+            'solution_ratio': options['solution_ratio'],
+            'quotation_ratio': options['quotation_ratio'],
+            'payment_ratio': options['payment_ratio'],
+            'mechanic_ids': [row.id for row in mechanic_rows],
+            'inventory': {row.id: row.unit_price for row in inventory_rows},
+        }
+        shard_size = options['shard_size']
+        shards = [
+            (shard, start, min(start + shard_size, customers), plan)
+            for shard, start in enumerate(range(0, customers, shard_size))
+        ]
+
+        totals = {}
+        if workers > 1:
+            # Children must open their own connections rather than share the parent's socket.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('fork')) as pool:
+                futures = [pool.submit(generate_shard_in_worker, *shard) for shard in shards]
+                for number, future in enumerate(futures, start=1):
+                    self._report(number, len(shards), future.result(), totals)
+        else:
+            for number, shard in enumerate(shards, start=1):
+                self._report(number, len(shards), generate_shard(*shard), totals)
+
+        # Rows were bulk inserted, which bypasses the signals maintaining the dashboard and reports
+        rebuild_rollups()
+        rebuild_monthly_revenue()
+
+        summary = ', '.join(f"{count} {name}" for name, count in totals.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {mechanics} mechanics, {inventory_count} inventory items and {summary or 'no customers'}."
+        ))
+
+    def _report(self, number, total, counts, totals):
+        for name, count in counts.items():
+            totals[name] = totals.get(name, 0) + count
+        self.stdout.write(f"Shard {number}/{total}: {counts['customers']} customers, {counts['issues']} issues.")
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from base.imports import IMPORT_CHUNK_SIZE, IMPORT_MODES, InventoryImportError, import_inventory, read_rows
+from base.models import User
+
+class Command(BaseCommand):
+    help = (
+        "Create or update inventory items from a CSV or JSON file, matched by item name and type. "
+        "Every row is validated first; nothing is written if any row is invalid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (with a header row) or JSON file with item_name, item_type, quantity and unit_price.")
+        parser.add_argument('--format', choices=['csv', 'json'], default=None, help="File format; guessed from the extension by default.")
+        parser.add_argument('--mode', choices=IMPORT_MODES, default='set', help="'set' replaces stored quantities, 'add' adds to them.")
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help="Rows written per upsert statement.")
+        parser.add_argument('--user', default=None, help="Email of the user recorded as creator of new items.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate and report without saving anything.")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        user = None
+        if options['user']:
+            user = User.objects.get_by_identifier(options['user'])
+            if user is None:
+                raise CommandError(f"No user found for {options['user']}.")
+
+        output = options['format'] or ('json' if options['path'].lower().endswith('.json') else 'csv')
+        try:
+            with open(options['path'], 'rb') as fh:
+                rows = read_rows(fh.read(), output)
+            report = import_inventory(
+                rows, user=user, mode=options['mode'], chunk_size=options['chunk_size'], dry_run=options['dry_run']
+            )
+        except (OSError, InventoryImportError) as e:
+            raise CommandError(getattr(e, 'detail', str(e)))
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: " + "; ".join(f"{field}: {message}" for field, message in error['errors'].items()))
+        if report['failed']:
+            raise CommandError(f"{report['failed']} of {report['received']} rows are invalid; nothing was imported.")
+        if options['dry_run']:
+            message = f"Dry run: {report['created']} items would be created and {report['updated']} updated; nothing was saved."
+        else:
+            message = f"Created {report['created']} and updated {report['updated']} inventory items."
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from base.idempotency import purge_expired_keys
+
+class Command(BaseCommand):
+    help = (
+        "Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL. Expired keys are already "
+        "ignored by the API; run this from cron to keep the table small."
+    )
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired idempotency keys."))
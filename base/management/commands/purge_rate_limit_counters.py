@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from account.throttling import purge_expired_counters
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired login and password reset rate-limit counters kept by DatabaseRateLimitBackend. "
+        "Expired counters are never read again; run this from cron to keep the table small."
+    )
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_counters()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired rate-limit counters."))
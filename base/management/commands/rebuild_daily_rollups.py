@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from base.dashboard import rebuild_rollups
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the dashboard's DailyRollup table from vehicle issues, quotations and payments. "
+        "Signals keep it current; run this after bulk loads or raw SQL writes that bypass them."
+    )
+
+    def handle(self, *args, **options):
+        days = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt daily rollups for {days} days."))
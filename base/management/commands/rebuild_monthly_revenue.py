@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from base.reports import rebuild_monthly_revenue
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the stored MonthlyRevenue totals for every closed month. Reports close months on "
+        "first use; run this after bulk loads or raw SQL writes to payments, or from cron at the start of a month."
+    )
+
+    def handle(self, *args, **options):
+        months = rebuild_monthly_revenue()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt revenue totals for {months} closed months."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from base.stock import reconcile_stock, stock_drift
+
+class Command(BaseCommand):
+    help = (
+        "Compare every inventory item's stored quantity with the sum of its stock ledger, and with --fix "
+        "rewrite drifted quantities to their ledger balance (a negative ledger is adjusted back to zero)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Set drifted quantities to their ledger balance.")
+
+    def handle(self, *args, **options):
+        drift = reconcile_stock() if options['fix'] else stock_drift()
+        for inventory_id, quantity, balance in drift:
+            self.stdout.write(f"Inventory {inventory_id}: stored {quantity}, ledger {balance} ({balance - quantity:+d})")
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Stock matches the ledger."))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"Reconciled {len(drift)} items to their ledger balance."))
+        else:
+            raise CommandError(f"{len(drift)} items differ from the ledger; rerun with --fix to correct them.")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from base.stock import scan_low_stock
+
+class Command(BaseCommand):
+    help = (
+        "Queue one digest email listing inventory items that reached their reorder level since the "
+        "previous scan. Only items whose low-stock state changed are read; run it from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="List newly low items without alerting or updating them.")
+
+    def handle(self, *args, **options):
+        items, cleared = scan_low_stock(dry_run=options['dry_run'])
+        for item in items:
+            self.stdout.write(f"{item.item_name} ({item.item_type}): {item.quantity} left, reorder level {item.reorder_level}")
+        if options['dry_run']:
+            self.stdout.write(f"Dry run: {len(items)} items would be alerted, {cleared} restocked alerts cleared.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Alerted {len(items)} low-stock items, cleared {cleared} restocked alerts."))
@@ -0,0 +1,123 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from base.models import OutboundEmail
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued outbound emails over one reused SMTP connection, retrying failures "
+        "with exponential backoff. Run it from cron, or with --loop as a long-lived worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Emails claimed and sent per batch.")
+        parser.add_argument('--max-attempts', type=int, default=5, help="Attempts before an email is marked Failed.")
+        parser.add_argument('--backoff', type=int, default=60, help="Base retry delay in seconds; doubles after every failed attempt.")
+        parser.add_argument('--max-backoff', type=int, default=6 * 60 * 60, help="Upper bound for the retry delay in seconds.")
+        parser.add_argument('--lease', type=int, default=600, help="Seconds a claimed email stays reserved before another worker may retry it.")
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new emails instead of exiting when the queue is empty.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls with --loop.")
+        parser.add_argument('--purge-days', type=int, default=None, help="Delete Sent emails older than this many days before sending.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['max_attempts'] < 1:
+            raise CommandError("--batch-size and --max-attempts must be positive.")
+
+        if options['purge_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['purge_days'])
+            purged, _ = OutboundEmail.objects.filter(status='Sent', sent_at__lt=cutoff).delete()
+            self.stdout.write(f"Purged {purged} sent emails older than {options['purge_days']} days.")
+
+        sent = failed = 0
+        while True:
+            batch = self.claim_batch(options)
+            if batch:
+                batch_sent, batch_failed = self.send_batch(batch, options)
+                sent += batch_sent
+                failed += batch_failed
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} emails, {failed} failed attempts."))
+
+    def claim_batch(self, options):
+        """
+        Reserves the next due emails for this worker.
+
+        Rows are locked with skip_locked so parallel workers take disjoint
+        batches. Claiming pushes next_attempt_at forward by the lease, so an
+        email held by a worker that dies is picked up again once the lease ends.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                OutboundEmail.objects.select_for_update(skip_locked=True)
+                .filter(status__in=['Pending', 'Sending'], next_attempt_at__lte=now)
+                .order_by('next_attempt_at', 'id')[:options['batch_size']]
+            )
+            if batch:
+                OutboundEmail.objects.filter(id__in=[email.id for email in batch]).update(
+                    status='Sending', next_attempt_at=now + timedelta(seconds=options['lease'])
+                )
+        return batch
+
+    def send_batch(self, batch, options):
+        """
+        Sends a claimed batch over a single connection and records each outcome.
+        """
+        delivered, retry, failed = [], [], []
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            # The server is unreachable: every email in the batch counts as a failed attempt.
+            for email in batch:
+                self.record_failure(email, e, options, retry, failed)
+        else:
+            try:
+                for email in batch:
+                    message = EmailMessage(
+                        email.subject,
+                        email.body,
+                        email.from_email or settings.DEFAULT_FROM_EMAIL,
+                        email.recipients,
+                        connection=connection,
+                    )
+                    try:
+                        message.send()
+                    except Exception as e:
+                        self.record_failure(email, e, options, retry, failed)
+                    else:
+                        email.status = 'Sent'
+                        email.attempts += 1
+                        email.sent_at = timezone.now()
+                        email.last_error = None
+                        delivered.append(email)
+            finally:
+                connection.close()
+
+        fields = ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at']
+        OutboundEmail.objects.bulk_update(delivered + retry + failed, fields)
+        for email in failed:
+            self.stderr.write(f"Giving up on email {email.id} after {email.attempts} attempts: {email.last_error}")
+        return len(delivered), len(retry) + len(failed)
+
+    def record_failure(self, email, error, options, retry, failed):
+        email.attempts += 1
+        email.last_error = str(error) or error.__class__.__name__
+        if email.attempts >= options['max_attempts']:
+            email.status = 'Failed'
+            failed.append(email)
+        else:
+            delay = min(options['backoff'] * 2 ** (email.attempts - 1), options['max_backoff'])
+            email.status = 'Pending'
+            email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            retry.append(email)
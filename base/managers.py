@@ -0,0 +1,82 @@
+from decimal import Decimal
+from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+__all__ = ['InventoryQuerySet', 'SolutionItemQuerySet', 'VehicleSolutionQuerySet']
+
+MONEY = models.DecimalField(max_digits=14, decimal_places=2)
+ZERO = Value(Decimal('0.00'), output_field=MONEY)
+
+class InventoryQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Annotates every item with `stock_value` (quantity * unit_price).
+        """
+        return self.annotate(stock_value=models.ExpressionWrapper(F('quantity') * F('unit_price'), output_field=MONEY))
+
+    def with_summary(self):
+        """
+        with_totals() plus `created_by_name` and `usage_count`, the number of solution items using the item.
+
+        The count is a correlated subquery on the indexed inventory_item_id, so
+        the list needs no JOIN + GROUP BY over solution items.
+        """
+        from base.models import SolutionItem
+
+        usage = (
+            SolutionItem.objects.filter(inventory_item=OuterRef('pk'))
+            .order_by()
+            .values('inventory_item')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        return self.with_totals().annotate(
+            created_by_name=F('created_by__name'),
+            usage_count=Coalesce(Subquery(usage, output_field=models.IntegerField()), 0),
+        )
+
+    def valuation(self):
+        """
+        Total value of the stock in this queryset, computed in a single aggregate query.
+        """
+        return self.aggregate(
+            total=Coalesce(Sum(F('quantity') * F('unit_price'), output_field=MONEY), ZERO, output_field=MONEY)
+        )['total']
+
+class SolutionItemQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Annotates every item with `line_total` (quantity_used * current unit price).
+        """
+        return self.annotate(
+            line_total=models.ExpressionWrapper(F('quantity_used') * F('inventory_item__unit_price'), output_field=MONEY)
+        )
+
+    def total(self):
+        """
+        Sum of the line totals in this queryset, computed in a single aggregate query.
+        """
+        return self.aggregate(
+            total=Coalesce(Sum(F('quantity_used') * F('inventory_item__unit_price'), output_field=MONEY), ZERO, output_field=MONEY)
+        )['total']
+
+class VehicleSolutionQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Annotates every solution with `items_total`, the value of its solution items.
+
+        A correlated subquery is used instead of a JOIN + GROUP BY so the
+        annotation can be combined with select_related() and other annotations
+        without multiplying rows.
+        """
+        from base.models import SolutionItem
+
+        items = (
+            SolutionItem.objects.filter(vehicle_solution=OuterRef('pk'))
+            .order_by()
+            .values('vehicle_solution')
+            .annotate(total=Sum(F('quantity_used') * F('inventory_item__unit_price'), output_field=MONEY))
+            .values('total')
+        )
+        return self.annotate(items_total=Coalesce(Subquery(items, output_field=MONEY), ZERO, output_field=MONEY))
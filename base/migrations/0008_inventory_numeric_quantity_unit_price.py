@@ -0,0 +1,57 @@
+from decimal import Decimal, InvalidOperation
+from django.db import migrations, models
+
+MAX_UNIT_PRICE = Decimal('99999999.99')
+
+def _parse_decimal(value):
+    """
+    Parses a legacy free-text number such as ' 1,250.50 '; returns None when it is unusable.
+    """
+    if value is None:
+        return None
+    text = str(value).strip().replace(',', '').replace(' ', '')
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        return None
+    if not number.is_finite() or number < 0:
+        return None
+    return number
+
+def clean_inventory_numbers(apps, schema_editor):
+    """
+    Rewrites quantity/unit_price as canonical numeric strings so the column
+    type change below cannot fail; unparseable or negative values become 0.
+    """
+    Inventory = apps.get_model('base', 'Inventory')
+    rows = []
+    for item in Inventory.objects.only('id', 'quantity', 'unit_price').iterator(chunk_size=2000):
+        quantity = _parse_decimal(item.quantity)
+        unit_price = _parse_decimal(item.unit_price)
+        if unit_price is None or unit_price > MAX_UNIT_PRICE:
+            unit_price = Decimal('0')
+        cleaned = (str(int(quantity or 0)), str(unit_price.quantize(Decimal('0.01'))))
+        if (item.quantity, item.unit_price) != cleaned:
+            item.quantity, item.unit_price = cleaned
+            rows.append(item)
+    Inventory.objects.bulk_update(rows, ['quantity', 'unit_price'], batch_size=2000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_settings_stamp_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(clean_inventory_numbers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='inventory',
+            name='quantity',
+            field=models.PositiveIntegerField(default=0, help_text='Units currently in stock.'),
+        ),
+        migrations.AlterField(
+            model_name='inventory',
+            name='unit_price',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Price per unit.', max_digits=10),
+        ),
+    ]
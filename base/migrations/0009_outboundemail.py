@@ -0,0 +1,36 @@
+# Generated by Django 5.0.7 on 2026-10-17 01:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0008_inventory_numeric_quantity_unit_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(help_text='Subject line of the email.', max_length=255)),
+                ('body', models.TextField(help_text='Plain text body of the email.')),
+                ('from_email', models.CharField(blank=True, help_text='Sender address; DEFAULT_FROM_EMAIL when empty.', max_length=255, null=True)),
+                ('recipients', models.JSONField(default=list, help_text='List of recipient addresses.')),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Sending', 'Sending'), ('Sent', 'Sent'), ('Failed', 'Failed')], default='Pending', help_text='Delivery status of the email.', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of delivery attempts made so far.')),
+                ('last_error', models.TextField(blank=True, help_text='Error raised by the last failed attempt.', null=True)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time the worker may (re)try this email.')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the email was queued.')),
+                ('sent_at', models.DateTimeField(blank=True, help_text='Timestamp when the email was delivered.', null=True)),
+            ],
+            options={
+                'verbose_name': 'Outbound Email',
+                'verbose_name_plural': 'Outbound Emails',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbound_email_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+def merge_duplicate_items(apps, schema_editor):
+    """
+    Folds inventory rows sharing an item name and type into the oldest one, so
+    the unique constraint below can be added. Stock is summed and solution and
+    quoted items are repointed at the surviving row.
+    """
+    Inventory = apps.get_model('base', 'Inventory')
+    SolutionItem = apps.get_model('base', 'SolutionItem')
+    QuotedItem = apps.get_model('base', 'QuotedItem')
+    groups = (
+        Inventory.objects.filter(item_name__isnull=False, item_type__isnull=False)
+        .values('item_name', 'item_type')
+        .annotate(rows=Count('id'), keep_id=Min('id'), total=Sum('quantity'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for group in groups:
+        duplicates = Inventory.objects.filter(
+            item_name=group['item_name'], item_type=group['item_type']
+        ).exclude(id=group['keep_id'])
+        duplicate_ids = list(duplicates.values_list('id', flat=True))
+        SolutionItem.objects.filter(inventory_item_id__in=duplicate_ids).update(inventory_item_id=group['keep_id'])
+        QuotedItem.objects.filter(inventory_item_id__in=duplicate_ids).update(inventory_item_id=group['keep_id'])
+        Inventory.objects.filter(id=group['keep_id']).update(quantity=group['total'])
+        Inventory.objects.filter(id__in=duplicate_ids).delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0009_outboundemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='inventory',
+            constraint=models.UniqueConstraint(fields=('item_name', 'item_type'), name='inventory_item_name_type_uniq'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.7 on 2026-10-17 01:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0010_inventory_unique_item_name_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['item_type', '-id'], name='inventory_type_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quotation',
+            index=models.Index(fields=['payment_status', '-created_at'], name='quotation_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['-created_at'], name='vehicle_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['customer', '-created_at'], name='vehicle_customer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicleissue',
+            index=models.Index(fields=['-created_at'], name='issue_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicleissue',
+            index=models.Index(fields=['status', '-created_at'], name='issue_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclesolution',
+            index=models.Index(fields=['-solution_date'], name='solution_date_idx'),
+        ),
+    ]
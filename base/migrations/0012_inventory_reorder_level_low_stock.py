@@ -0,0 +1,32 @@
+# Generated by Django 5.0.7 on 2026-10-17 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0011_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventory',
+            name='reorder_level',
+            field=models.PositiveIntegerField(default=0, help_text='Stock at or below this quantity counts as low and triggers a reorder alert.'),
+        ),
+        migrations.AddField(
+            model_name='inventory',
+            name='low_stock_alerted_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the current low-stock alert was sent; cleared once the item is restocked.', null=True),
+        ),
+        migrations.AddField(
+            model_name='inventory',
+            name='is_low_stock',
+            field=models.GeneratedField(db_persist=True, expression=models.ExpressionWrapper(models.Q(('quantity__lte', models.F('reorder_level'))), output_field=models.BooleanField()), output_field=models.BooleanField()),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['is_low_stock', 'low_stock_alerted_at'], name='inventory_low_stock_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.7 on 2026-10-17 01:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+def record_opening_balances(apps, schema_editor):
+    """
+    Starts the ledger with one opening movement per item holding its current stock.
+    """
+    Inventory = apps.get_model('base', 'Inventory')
+    StockMovement = apps.get_model('base', 'StockMovement')
+    now = django.utils.timezone.now()
+    movements = [
+        StockMovement(inventory_item_id=item_id, delta=quantity, reason='Initial', created_at=now)
+        for item_id, quantity in Inventory.objects.exclude(quantity=0).values_list('id', 'quantity').iterator(chunk_size=2000)
+    ]
+    StockMovement.objects.bulk_create(movements, batch_size=2000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0012_inventory_reorder_level_low_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField(help_text='Change in stock: negative when stock was taken, positive when added.')),
+                ('reason', models.CharField(choices=[('Initial', 'Opening balance'), ('Usage', 'Used in a solution'), ('Return', 'Returned from a solution'), ('Import', 'Bulk import'), ('Adjustment', 'Manual adjustment')], help_text='Why the stock changed.', max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Timestamp when the movement was recorded.')),
+                ('inventory_item', models.ForeignKey(help_text='The inventory item whose stock changed.', on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='base.inventory')),
+                ('vehicle_solution', models.ForeignKey(blank=True, db_constraint=False, help_text='The vehicle solution that used or returned the stock, if any.', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='base.vehiclesolution')),
+            ],
+            options={
+                'verbose_name': 'Stock Movement',
+                'verbose_name_plural': 'Stock Movements',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['inventory_item', 'delta'], name='stock_movement_item_delta_idx'), models.Index(fields=['created_at'], name='stock_movement_created_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.0.7 on 2026-10-17 01:43
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+ISSUE_STATUS_FIELDS = {
+    'Pending': 'issues_pending',
+    'In Progress': 'issues_in_progress',
+    'Completed': 'issues_completed',
+    'Rejected': 'issues_rejected',
+}
+
+def build_rollups(apps, schema_editor):
+    # A frozen copy of base.dashboard.rebuild_rollups as of this migration
+    VehicleIssue = apps.get_model('base', 'VehicleIssue')
+    Quotation = apps.get_model('base', 'Quotation')
+    Payment = apps.get_model('base', 'Payment')
+    DailyRollup = apps.get_model('base', 'DailyRollup')
+    rows = defaultdict(lambda: defaultdict(int))
+
+    issues = VehicleIssue.objects.annotate(day=TruncDate('created_at')).values('day', 'status').annotate(count=Count('id')).order_by()
+    for row in issues:
+        rows[row['day']]['issues_opened'] += row['count']
+        if row['status'] in ISSUE_STATUS_FIELDS:
+            rows[row['day']][ISSUE_STATUS_FIELDS[row['status']]] += row['count']
+
+    unpaid = ~Q(payment_status='Paid')
+    quotations = Quotation.objects.annotate(day=TruncDate('created_at')).values('day').order_by().annotate(
+        count=Count('id'),
+        awaiting=Count('id', filter=unpaid),
+        awaiting_value=Coalesce(Sum('grand_total', filter=unpaid), Decimal('0.00'), output_field=DecimalField()),
+    )
+    for row in quotations:
+        rows[row['day']]['quotations_created'] += row['count']
+        rows[row['day']]['quotations_awaiting_payment'] += row['awaiting']
+        rows[row['day']]['awaiting_payment_value'] += row['awaiting_value']
+
+    payments = Payment.objects.annotate(day=TruncDate('payment_date')).values('day').order_by().annotate(count=Count('id'), total=Sum('amount_paid'))
+    for row in payments:
+        rows[row['day']]['payments_received'] += row['count']
+        rows[row['day']]['revenue'] += row['total'] or 0
+
+    DailyRollup.objects.bulk_create([DailyRollup(date=day, **fields) for day, fields in sorted(rows.items())], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0013_stockmovement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='The day these figures cover.', unique=True)),
+                ('issues_opened', models.PositiveIntegerField(default=0, help_text='Vehicle issues reported on this day.')),
+                ('issues_pending', models.IntegerField(default=0, help_text='Issues reported on this day that are pending.')),
+                ('issues_in_progress', models.IntegerField(default=0, help_text='Issues reported on this day that are in progress.')),
+                ('issues_completed', models.IntegerField(default=0, help_text='Issues reported on this day that are completed.')),
+                ('issues_rejected', models.IntegerField(default=0, help_text='Issues reported on this day that were rejected.')),
+                ('quotations_created', models.PositiveIntegerField(default=0, help_text='Quotations generated on this day.')),
+                ('quotations_awaiting_payment', models.IntegerField(default=0, help_text='Quotations generated on this day that are not paid yet.')),
+                ('awaiting_payment_value', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Grand total of those unpaid quotations.', max_digits=14)),
+                ('payments_received', models.PositiveIntegerField(default=0, help_text='Payments made on this day.')),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Total amount paid on this day.', max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Daily Rollup',
+                'verbose_name_plural': 'Daily Rollups',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.7 on 2026-10-17 01:44
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0014_dailyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month.')),
+                ('payment_method', models.CharField(help_text='Payment method these totals are for.', max_length=30)),
+                ('payments', models.PositiveIntegerField(default=0, help_text='Number of payments made.')),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Total amount paid, tax included.', max_digits=14)),
+                ('tax', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Tax included in the revenue.', max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Monthly Revenue',
+                'verbose_name_plural': 'Monthly Revenue',
+                'ordering': ['month', 'payment_method'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_date'], name='payment_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyrevenue',
+            constraint=models.UniqueConstraint(fields=('month', 'payment_method'), name='monthly_revenue_month_method_uniq'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.7 on 2026-10-17 01:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0015_payment_date_index_monthlyrevenue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Client-chosen Idempotency-Key header value.', max_length=255)),
+                ('fingerprint', models.CharField(help_text='SHA-256 of the method, path and body the key was first used with.', max_length=64)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, help_text='Status of the stored response; empty while the request is running.', null=True)),
+                ('response_body', models.JSONField(blank=True, help_text='Body of the stored response, as rendered.', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the key was first used.')),
+                ('expires_at', models.DateTimeField(help_text='The stored response is replayed until this time.')),
+                ('user', models.ForeignKey(help_text='User who sent the request.', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Idempotency Key',
+                'verbose_name_plural': 'Idempotency Keys',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['expires_at'], name='idempotency_expires_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='idempotency_user_key_uniq'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.7 on 2026-10-17 02:06
+
+from django.db import migrations, models
+
+def add_closed_months(apps, schema_editor):
+    # Months closed before lock rows existed need one, or a payment write could not lock them
+    MonthlyRevenue = apps.get_model('base', 'MonthlyRevenue')
+    RevenueMonth = apps.get_model('base', 'RevenueMonth')
+    months = MonthlyRevenue.objects.order_by().values_list('month', flat=True).distinct()
+    RevenueMonth.objects.bulk_create([RevenueMonth(month=month) for month in months])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0016_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month.', unique=True)),
+            ],
+            options={
+                'verbose_name': 'Revenue Month',
+                'verbose_name_plural': 'Revenue Months',
+                'ordering': ['month'],
+            },
+        ),
+        migrations.RunPython(add_closed_months, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,21 @@
 from account.models import *
-from django.db import models
+from base.managers import *
+from decimal import Decimal
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 
+class TransactionalSaveModel(models.Model):
+    """
+    Saves inside a transaction, so row locks taken by pre_save receivers last until the write commits.
+    """
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
 class Vehicle(models.Model):
     """
     Model representing a customer's vehicle brought in for repairs.
@@ -24,11 +37,15 @@ class Vehicle(models.Model):
         ordering = ['-created_at']
         verbose_name = "Vehicle"
         verbose_name_plural = "Vehicles"
+        indexes = [
+            models.Index(fields=['-created_at'], name='vehicle_created_idx'),
+            models.Index(fields=['customer', '-created_at'], name='vehicle_customer_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.make} {self.model} ({self.license_plate})"
 
-class VehicleIssue(models.Model):
+class VehicleIssue(TransactionalSaveModel):
     """
     Model representing an issue reported for a specific vehicle.
     
@@ -55,6 +72,10 @@ class VehicleIssue(models.Model):
         ordering = ['-created_at']
         verbose_name = "Vehicle Issue"
         verbose_name_plural = "Vehicle Issues"
+        indexes = [
+            models.Index(fields=['-created_at'], name='issue_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='issue_status_created_idx'),
+        ]
 
     def __str__(self):
         return f"Issue for {self.vehicle} - Status: {self.status}"
@@ -67,8 +88,16 @@ class Inventory(models.Model):
     )
     item_name = models.CharField(max_length=255, null=True, blank=True)
     item_type = models.CharField(max_length=30, choices=ITEM_TYPES, null=True, blank=True)
-    quantity = models.CharField(max_length=255, null=True, blank=True)
-    unit_price = models.CharField(max_length=255, null=True, blank=True)
+    quantity = models.PositiveIntegerField(default=0, help_text="Units currently in stock.")
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), help_text="Price per unit.")
+    reorder_level = models.PositiveIntegerField(default=0, help_text="Stock at or below this quantity counts as low and triggers a reorder alert.")
+    # Stored so the low-stock list and scanner can use an index instead of comparing two columns row by row
+    is_low_stock = models.GeneratedField(
+        expression=models.ExpressionWrapper(models.Q(quantity__lte=models.F('reorder_level')), output_field=models.BooleanField()),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
+    low_stock_alerted_at = models.DateTimeField(null=True, blank=True, editable=False, help_text="When the current low-stock alert was sent; cleared once the item is restocked.")
     created_by = models.ForeignKey(
         User,
         null=True,
@@ -77,9 +106,19 @@ class Inventory(models.Model):
     )
     created_at = models.DateField(default=timezone.now)
 
+    objects = InventoryQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Quotation of Item"
+        constraints = [
+            # Upsert key for bulk imports
+            models.UniqueConstraint(fields=['item_name', 'item_type'], name='inventory_item_name_type_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['item_type', '-id'], name='inventory_type_id_idx'),
+            models.Index(fields=['is_low_stock', 'low_stock_alerted_at'], name='inventory_low_stock_idx'),
+        ]
 
     def __str__(self):
         return f"Inventory ({self.item_name}) on {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
@@ -98,10 +137,15 @@ class VehicleSolution(models.Model):
     solution_date = models.DateTimeField(default=timezone.now, help_text="The date and time when the solution was provided.")
     total_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="The total cost incurred for the repair solution.")
 
+    objects = VehicleSolutionQuerySet.as_manager()
+
     class Meta:
         ordering = ['-solution_date']
         verbose_name = "Vehicle Solution"
         verbose_name_plural = "Vehicle Solutions"
+        indexes = [
+            models.Index(fields=['-solution_date'], name='solution_date_idx'),
+        ]
 
     def __str__(self):
         return f"Solution for {self.vehicle_issue} on {self.solution_date.strftime('%Y-%m-%d')}"
@@ -119,6 +163,8 @@ class SolutionItem(models.Model):
     quantity_used = models.PositiveIntegerField(help_text="The quantity of the inventory item used for the repair.")
     item_cost = models.DecimalField(max_digits=10, null=True, blank=True, decimal_places=2, help_text="Cost per unit of the inventory item at the time of usage.")
 
+    objects = SolutionItemQuerySet.as_manager()
+
     class Meta:
         ordering = ['id']
         verbose_name = "Solution Item"
@@ -128,6 +174,50 @@ class SolutionItem(models.Model):
         return f"{self.quantity_used} x {self.inventory_item.item_name} for {self.vehicle_solution}"
 
 
+class StockMovement(models.Model):
+    """
+    One change to an inventory item's stock.
+
+    Rows are only ever inserted. Inventory.quantity is the materialized running
+    balance; the sum of an item's deltas must always equal it (see the
+    reconcile_stock command).
+    """
+    REASON_CHOICES = [
+        ('Initial', 'Opening balance'),
+        ('Usage', 'Used in a solution'),
+        ('Return', 'Returned from a solution'),
+        ('Import', 'Bulk import'),
+        ('Adjustment', 'Manual adjustment'),
+    ]
+
+    inventory_item = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='stock_movements', help_text="The inventory item whose stock changed.")
+    delta = models.IntegerField(help_text="Change in stock: negative when stock was taken, positive when added.")
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, help_text="Why the stock changed.")
+    # Kept without a database constraint so the history survives deleted solutions
+    vehicle_solution = models.ForeignKey(
+        VehicleSolution,
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        help_text="The vehicle solution that used or returned the stock, if any."
+    )
+    created_at = models.DateTimeField(default=timezone.now, help_text="Timestamp when the movement was recorded.")
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Stock Movement"
+        verbose_name_plural = "Stock Movements"
+        indexes = [
+            # Covers the per-item SUM(delta) of the reconcile query
+            models.Index(fields=['inventory_item', 'delta'], name='stock_movement_item_delta_idx'),
+            models.Index(fields=['created_at'], name='stock_movement_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.delta:+d} x {self.inventory_item_id} ({self.reason})"
+
 class VehicleSolutionMechanic(models.Model):
     """
     Model representing the association between a vehicle solution and a mechanic.
@@ -182,7 +272,7 @@ class Settings(models.Model):
     def __str__(self):
         return "Application Settings"
 
-class Quotation(models.Model):
+class Quotation(TransactionalSaveModel):
     PAYMENT_STATUS_CHOICES = [
         ('Pending', 'Pending'),
         ('Paid', 'Paid'),
@@ -212,6 +302,9 @@ class Quotation(models.Model):
         ordering = ['-created_at']
         verbose_name = "Quotation"
         verbose_name_plural = "Quotations"
+        indexes = [
+            models.Index(fields=['payment_status', '-created_at'], name='quotation_status_created_idx'),
+        ]
 
     def __str__(self):
         return f"Quotation for {self.vehicle_solution.vehicle_issue} - Total: {self.grand_total}"
@@ -274,7 +367,7 @@ class QuotedMechanic(models.Model):
     def __str__(self):
         return f"{self.mechanic.name} - Labor: {self.labor_share}"
 
-class Payment(models.Model):
+class Payment(TransactionalSaveModel):
     PAYMENT_METHODS = [
         ('Cash', 'Cash'),
         ('Mobile Money', 'Mobile Money'),
@@ -320,6 +413,148 @@ class Payment(models.Model):
         ordering = ['-payment_date']
         verbose_name = "Payment"
         verbose_name_plural = "Payments"
+        indexes = [
+            # Range scans of the revenue reports
+            models.Index(fields=['payment_date'], name='payment_date_idx'),
+        ]
 
     def __str__(self):
         return f"Payment for Quotation #{self.quotation.id} - Amount: {self.amount_paid}"
+
+class OutboundEmail(models.Model):
+    """
+    Outbox row for an email that is delivered by the `send_queued_emails` worker
+    instead of inside the request that produced it.
+    """
+    STATUS_CHOICES = [
+        ('Pending', 'Pending'),
+        ('Sending', 'Sending'),
+        ('Sent', 'Sent'),
+        ('Failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255, help_text="Subject line of the email.")
+    body = models.TextField(help_text="Plain text body of the email.")
+    from_email = models.CharField(max_length=255, null=True, blank=True, help_text="Sender address; DEFAULT_FROM_EMAIL when empty.")
+    recipients = models.JSONField(default=list, help_text="List of recipient addresses.")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending', help_text="Delivery status of the email.")
+    attempts = models.PositiveIntegerField(default=0, help_text="Number of delivery attempts made so far.")
+    last_error = models.TextField(null=True, blank=True, help_text="Error raised by the last failed attempt.")
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="Earliest time the worker may (re)try this email.")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp when the email was queued.")
+    sent_at = models.DateTimeField(null=True, blank=True, help_text="Timestamp when the email was delivered.")
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Outbound Email"
+        verbose_name_plural = "Outbound Emails"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbound_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.status})"
+
+class DailyRollup(models.Model):
+    """
+    Pre-aggregated dashboard figures for one calendar day.
+
+    Every issue, quotation and payment contributes to the row of the day it
+    was created (paid), counted under its current state, so summing the rows
+    gives the live totals and a status change only moves counts between
+    columns of that row. Kept up to date by base.signals; the
+    rebuild_daily_rollups command recomputes the table from scratch.
+    """
+    date = models.DateField(unique=True, help_text="The day these figures cover.")
+    issues_opened = models.PositiveIntegerField(default=0, help_text="Vehicle issues reported on this day.")
+    issues_pending = models.IntegerField(default=0, help_text="Issues reported on this day that are pending.")
+    issues_in_progress = models.IntegerField(default=0, help_text="Issues reported on this day that are in progress.")
+    issues_completed = models.IntegerField(default=0, help_text="Issues reported on this day that are completed.")
+    issues_rejected = models.IntegerField(default=0, help_text="Issues reported on this day that were rejected.")
+    quotations_created = models.PositiveIntegerField(default=0, help_text="Quotations generated on this day.")
+    quotations_awaiting_payment = models.IntegerField(default=0, help_text="Quotations generated on this day that are not paid yet.")
+    awaiting_payment_value = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), help_text="Grand total of those unpaid quotations.")
+    payments_received = models.PositiveIntegerField(default=0, help_text="Payments made on this day.")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), help_text="Total amount paid on this day.")
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name = "Daily Rollup"
+        verbose_name_plural = "Daily Rollups"
+
+    def __str__(self):
+        return f"Rollup for {self.date}"
+
+class MonthlyRevenue(models.Model):
+    """
+    Payment totals for one closed calendar month and payment method.
+
+    Written by base.reports the first time a report covers the month, with a
+    row for every payment method (zeros included), so a month either has all
+    of its rows or none. Later writes to a payment in a closed month delete the
+    month's rows so they are recomputed on the next report.
+    """
+    month = models.DateField(help_text="First day of the month.")
+    payment_method = models.CharField(max_length=30, help_text="Payment method these totals are for.")
+    payments = models.PositiveIntegerField(default=0, help_text="Number of payments made.")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), help_text="Total amount paid, tax included.")
+    tax = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), help_text="Tax included in the revenue.")
+
+    class Meta:
+        ordering = ['month', 'payment_method']
+        verbose_name = "Monthly Revenue"
+        verbose_name_plural = "Monthly Revenue"
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'payment_method'], name='monthly_revenue_month_method_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.payment_method} revenue for {self.month:%Y-%m}"
+
+class RevenueMonth(models.Model):
+    """
+    Lock row for one month whose revenue has been closed at least once.
+
+    Closing the month (base.reports.close_months) and a payment write reopening
+    it both lock this row, so totals computed before the payment commits are
+    deleted by it rather than stored after it.
+    """
+    month = models.DateField(unique=True, help_text="First day of the month.")
+
+    class Meta:
+        ordering = ['month']
+        verbose_name = "Revenue Month"
+        verbose_name_plural = "Revenue Months"
+
+    def __str__(self):
+        return f"{self.month:%Y-%m}"
+
+class IdempotencyKey(models.Model):
+    """
+    The first response to a request sent with an Idempotency-Key header, replayed for retries.
+
+    Keys are scoped to the user. A row without a status code belongs to a
+    request that is still running. Rows past `expires_at` are ignored and
+    removed by the purge_idempotency_keys command.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+', help_text="User who sent the request.")
+    key = models.CharField(max_length=255, help_text="Client-chosen Idempotency-Key header value.")
+    fingerprint = models.CharField(max_length=64, help_text="SHA-256 of the method, path and body the key was first used with.")
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Status of the stored response; empty while the request is running.")
+    response_body = models.JSONField(null=True, blank=True, help_text="Body of the stored response, as rendered.")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp when the key was first used.")
+    expires_at = models.DateTimeField(help_text="The stored response is replayed until this time.")
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.status_code or 'in progress'})"
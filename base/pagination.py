@@ -0,0 +1,50 @@
+from rest_framework.pagination import CursorPagination
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key, newest first.
+
+    The cursor encodes the last seen id, so every page is a single indexed
+    range scan no matter how deep the client pages.
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+def paginated_response_data(paginator, data, detail):
+    """
+    Builds the standard response body for a paginated list endpoint.
+    """
+    return {
+        "detail": detail,
+        "data": data,
+        "next": paginator.get_next_link(),
+        "previous": paginator.get_previous_link(),
+    }
+
+def resolve_expand_depth(request, levels):
+    """
+    Resolves how deep a list response should nest related objects.
+
+    `levels` is the ordered list of expansion names, e.g. ['vehicles', 'vehicles.issues'].
+    Clients opt in with either `?depth=<n>` or `?expand=<name>`; the deepest of the two wins
+    and anything unknown falls back to 0 (flat rows).
+    """
+    depth = 0
+
+    raw_depth = request.query_params.get('depth')
+    if raw_depth is not None:
+        try:
+            depth = max(depth, int(raw_depth))
+        except (TypeError, ValueError):
+            pass
+
+    raw_expand = request.query_params.get('expand')
+    if raw_expand:
+        for name in raw_expand.split(','):
+            name = name.strip()
+            if name in levels:
+                depth = max(depth, levels.index(name) + 1)
+
+    return min(depth, len(levels))
@@ -0,0 +1,113 @@
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+def _resolve_relation(model, attname):
+    """
+    Finds the relation behind a serializer source on `model`.
+
+    Forward relations are matched by field name, reverse relations by their
+    accessor name (e.g. 'solutionitem_set' or 'vehicles'). Returns None when the
+    attribute is not a relation (plain fields, properties, methods).
+    """
+    for field in model._meta.get_fields():
+        if not field.is_relation:
+            continue
+        if field.auto_created and not field.concrete:
+            if field.get_accessor_name() == attname:
+                return field
+        elif field.name == attname:
+            return field
+    return None
+
+def _is_single_valued(relation):
+    """
+    True for relations that can be followed with select_related().
+    """
+    return relation.many_to_one or relation.one_to_one
+
+def _collect(model, serializer, prefix, select, prefetch):
+    """
+    Walks the readable nested fields of `serializer` and records the lookups
+    needed to render it without extra queries.
+    """
+    paths = []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        child = field.child if isinstance(field, serializers.ListSerializer) else field
+        if isinstance(child, serializers.BaseSerializer):
+            nested = child
+        elif isinstance(child, serializers.RelatedField) and not child.use_pk_only_optimization():
+            nested = None
+        else:
+            continue
+        paths.append((field.source_attrs, nested))
+
+    # Relations read inside SerializerMethodFields cannot be discovered, so
+    # serializers declare them on Meta.prefetch_hints instead.
+    meta = getattr(serializer, 'Meta', None)
+    for hint in getattr(meta, 'prefetch_hints', ()):
+        paths.append((hint.split('__'), None))
+
+    for source_attrs, nested in paths:
+        _collect_path(model, list(source_attrs), nested, prefix, select, prefetch)
+
+def _collect_path(model, source_attrs, nested, prefix, select, prefetch):
+    relation = _resolve_relation(model, source_attrs[0])
+    if relation is None:
+        return
+    related_model = relation.related_model
+
+    if _is_single_valued(relation):
+        # select_related() takes the query name, which for reverse one-to-ones
+        # is the related_name rather than the attribute on the parent.
+        lookup = prefix + relation.name
+        select.append(lookup)
+        if len(source_attrs) > 1:
+            _collect_path(related_model, source_attrs[1:], nested, lookup + '__', select, prefetch)
+        elif nested is not None:
+            _collect(related_model, nested, lookup + '__', select, prefetch)
+        return
+
+    lookup = prefix + source_attrs[0]
+    queryset = related_model._default_manager.all()
+    if len(source_attrs) > 1:
+        child_select, child_prefetch = [], []
+        _collect_path(related_model, source_attrs[1:], nested, '', child_select, child_prefetch)
+        queryset = _apply(queryset, child_select, child_prefetch)
+    elif nested is not None:
+        queryset = plan_queryset(queryset, type(nested), serializer=nested)
+    prefetch.append(Prefetch(lookup, queryset=queryset))
+
+def _apply(queryset, select, prefetch):
+    if select:
+        queryset = queryset.select_related(*dict.fromkeys(select))
+    if prefetch:
+        # The same relation can be reached by a nested field and a hint; keep the first plan.
+        unique = {}
+        for item in prefetch:
+            unique.setdefault(item.prefetch_to, item)
+        queryset = queryset.prefetch_related(*unique.values())
+    return queryset
+
+def plan_queryset(queryset, serializer_class, serializer=None):
+    """
+    Returns `queryset` with the select_related()/Prefetch tree that
+    `serializer_class` needs, derived from its declared nested fields.
+
+    Single-valued relations (FKs, one-to-ones) are joined with select_related();
+    to-many relations become Prefetch objects whose querysets are planned
+    recursively, so rendering any number of rows costs a fixed number of queries.
+
+    A serializer can also name a queryset method in Meta.annotate_with (e.g.
+    'with_totals'); it is applied at every level the serializer is planned for,
+    so computed columns arrive with the rows instead of being derived per object.
+    """
+    if serializer is None:
+        serializer = serializer_class()
+    annotate_with = getattr(getattr(serializer, 'Meta', None), 'annotate_with', None)
+    if annotate_with:
+        queryset = getattr(queryset, annotate_with)()
+    select, prefetch = [], []
+    _collect(queryset.model, serializer, '', select, prefetch)
+    return _apply(queryset, select, prefetch)
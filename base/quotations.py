@@ -0,0 +1,315 @@
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from django.conf import settings
+from django.db import connection, transaction
+from rest_framework import status
+from base.cache import get_app_settings
+from base.dashboard import record_rollups
+from base.mailer import queue_emails
+from base.models import *
+from base.prefetch import plan_queryset
+from base.serializers import QuotedMechanicSerializer
+
+class QuotationError(Exception):
+    """
+    A quotation could not be created; `detail` is safe to return to the client.
+    """
+    def __init__(self, detail, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+def parse_mechanic_shares(input_mechanics):
+    """
+    Validates the `quoted_mechanics` payload and returns {mechanic_id: labor_share}.
+    """
+    if not input_mechanics:
+        raise QuotationError("quoted_mechanics is required.")
+    shares = {}
+    for mech_data in input_mechanics:
+        try:
+            mechanic_id = int(mech_data['mechanic_id'])
+            labor_share = Decimal(str(mech_data['labor_share']))
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            raise QuotationError(f"Invalid mechanic data: {mech_data}")
+        if not labor_share.is_finite() or labor_share < 0 or mechanic_id in shares:
+            raise QuotationError(f"Invalid mechanic data: {mech_data}")
+        shares[mechanic_id] = labor_share
+    return shares
+
+def load_mechanics(mechanic_ids):
+    """
+    Fetches the mechanics for `mechanic_ids` in one query, keyed by id.
+
+    The queryset is planned for QuotedMechanicSerializer's nested mechanic, so
+    quotations built from these objects serialize without further queries.
+    """
+    mechanic_field = QuotedMechanicSerializer().fields['mechanic']
+    queryset = User.objects.filter(id__in=mechanic_ids, role='Mechanic')
+    return plan_queryset(queryset, type(mechanic_field), serializer=mechanic_field).in_bulk()
+
+def build_quotation(solution, solution_items, shares, mechanics):
+    """
+    Prices a solution into unsaved Quotation, QuotedItem and QuotedMechanic objects.
+
+    `solution_items` must be annotated with line_total (SolutionItemQuerySet.with_totals())
+    and carry their inventory_item; nothing here touches the database.
+    """
+    missing = [mechanic_id for mechanic_id in shares if mechanic_id not in mechanics]
+    if missing:
+        raise QuotationError(f"Invalid mechanic data: mechanic(s) {missing} not found.")
+
+    quoted_items = [
+        QuotedItem(
+            inventory_item=item.inventory_item,
+            quantity_used=item.quantity_used,
+            unit_price=item.inventory_item.unit_price,
+            item_total=item.line_total,
+        )
+        for item in solution_items
+    ]
+    quoted_mechanics = [
+        QuotedMechanic(mechanic=mechanics[mechanic_id], labor_share=labor_share)
+        for mechanic_id, labor_share in shares.items()
+    ]
+    parts_total = sum((qi.item_total for qi in quoted_items), Decimal('0.00'))
+    labor_total = sum((qm.labor_share for qm in quoted_mechanics), Decimal('0.00'))
+    quotation = Quotation(vehicle_solution=solution, grand_total=parts_total + labor_total)
+    return quotation, quoted_items, quoted_mechanics
+
+def attach_lines(quotation, quoted_items, quoted_mechanics):
+    """
+    Points the quotation's related managers at the in-memory lines, so serializing
+    it does not query them back.
+    """
+    quotation._prefetched_objects_cache = {
+        'quoted_items': quoted_items,
+        'quoted_mechanics': quoted_mechanics,
+    }
+    return quotation
+
+def save_quotations(quotations, quoted_items, quoted_mechanics):
+    """
+    Inserts quotations and all of their lines with one bulk_create per table.
+
+    Lines must already point at their (unsaved) quotation. On backends that do
+    not return ids from a multi-row INSERT (MySQL) the ids are read back with
+    one query per table. bulk_create() sends no signals, so the dashboard
+    rollup is updated here.
+    """
+    Quotation.objects.bulk_create(quotations)
+    if not connection.features.can_return_rows_from_bulk_insert:
+        quotation_ids = dict(
+            Quotation.objects.filter(vehicle_solution_id__in=[q.vehicle_solution_id for q in quotations])
+            .values_list('vehicle_solution_id', 'id')
+        )
+        for quotation in quotations:
+            quotation.pk = quotation_ids[quotation.vehicle_solution_id]
+    record_rollups(quotations)
+
+    # bulk_create copies each line's quotation.pk into quotation_id
+    QuotedItem.objects.bulk_create(quoted_items)
+    QuotedMechanic.objects.bulk_create(quoted_mechanics)
+
+    if not connection.features.can_return_rows_from_bulk_insert:
+        quotation_ids = [quotation.pk for quotation in quotations]
+        # Rows of one INSERT get ascending ids in the order they were given
+        item_ids = QuotedItem.objects.filter(quotation_id__in=quotation_ids).order_by('id').values_list('id', flat=True)
+        for quoted_item, item_id in zip(quoted_items, item_ids):
+            quoted_item.pk = item_id
+        mechanic_ids = {
+            (quotation_id, mechanic_id): pk
+            for pk, quotation_id, mechanic_id in QuotedMechanic.objects.filter(quotation_id__in=quotation_ids)
+            .values_list('id', 'quotation_id', 'mechanic_id')
+        }
+        for quoted_mechanic in quoted_mechanics:
+            quoted_mechanic.pk = mechanic_ids.get((quoted_mechanic.quotation_id, quoted_mechanic.mechanic_id))
+
+def quotation_email(quotation, quoted_items, quoted_mechanics):
+    """
+    Returns (subject, body, recipients) for the customer's quotation email.
+    """
+    solution = quotation.vehicle_solution
+    vehicle = solution.vehicle_issue.vehicle
+    customer = vehicle.customer
+    parts_total = sum((qi.item_total for qi in quoted_items), Decimal('0.00'))
+    labor_total = sum((qm.labor_share for qm in quoted_mechanics), Decimal('0.00'))
+
+    subject = f"Your Quotation is Ready – Vehicle {vehicle.license_plate}"
+    body_lines = [
+        f"Dear {customer.name},",
+        "",
+        "Thank you for entrusting us with your vehicle. Your detailed quotation is now available:",
+        "",
+        "— Parts & Materials —"
+    ]
+    for qi in quoted_items:
+        body_lines.append(
+            f"• {qi.inventory_item.item_name}: {qi.quantity_used} × {qi.unit_price:.2f} = {qi.item_total:.2f}"
+        )
+    body_lines += [
+        "",
+        "— Labor Breakdown —"
+    ]
+    for qm in quoted_mechanics:
+        body_lines.append(
+            f"• {qm.mechanic.name}: labor share = {qm.labor_share:.2f}"
+        )
+    body_lines += [
+        "",
+        f"Total Parts Cost: {parts_total:.2f}",
+        f"Total Labor Cost: {labor_total:.2f}",
+        f"Grand Total (before tax): {quotation.grand_total:.2f}",
+        "",
+        "Please let us know when you would like to proceed, or if you have any questions.",
+        "",
+        "Best regards,",
+        f"{settings.DEFAULT_FROM_EMAIL}"
+    ]
+    return subject, "\n".join(body_lines), [customer.email]
+
+def create_quotations(entries):
+    """
+    Creates quotations for many vehicle solutions and queues the customer emails.
+
+    `entries` is a list of (solution_id, quoted_mechanics payload). Returns one
+    (quotation, error) pair per entry, in order; exactly one of the two is None.
+    An invalid entry is reported and skipped without affecting the others.
+
+    Everything runs in a single transaction with a fixed number of queries
+    however many solutions and lines there are: the solutions are locked in id
+    order, read with their customers and existing quotations in one join, all
+    priced items are read in one query, all mechanics in one `id__in` query, and
+    the quotations, lines and emails are written with bulk_create.
+    """
+    errors = {}
+    pending = {}
+    for index, (solution_id, input_mechanics) in enumerate(entries):
+        try:
+            try:
+                solution_id = int(solution_id)
+            except (TypeError, ValueError):
+                raise QuotationError(f"Invalid solution id: {solution_id}")
+            if solution_id in pending:
+                raise QuotationError("Solution appears more than once in this batch.")
+            pending[solution_id] = (index, parse_mechanic_shares(input_mechanics))
+        except QuotationError as e:
+            errors[index] = e
+
+    created = {}
+    if pending:
+        with transaction.atomic():
+            # Lock first so concurrent requests for the same solutions queue up
+            locked = list(
+                VehicleSolution.objects.select_for_update().filter(id__in=pending).order_by('id').values_list('id', flat=True)
+            )
+            solutions = VehicleSolution.objects.select_related('vehicle_issue__vehicle__customer', 'quotation').in_bulk(locked)
+            items_by_solution = defaultdict(list)
+            solution_items = (
+                SolutionItem.objects.filter(vehicle_solution_id__in=locked)
+                .with_totals().select_related('inventory_item').order_by('id')
+            )
+            for item in solution_items:
+                items_by_solution[item.vehicle_solution_id].append(item)
+            mechanics = load_mechanics({mechanic_id for _, shares in pending.values() for mechanic_id in shares})
+
+            built = {}
+            for solution_id, (index, shares) in pending.items():
+                solution = solutions.get(solution_id)
+                try:
+                    if solution is None:
+                        raise QuotationError("Vehicle solution not found.", status.HTTP_404_NOT_FOUND)
+                    if hasattr(solution, 'quotation'):
+                        raise QuotationError("Quotation already exists for this solution.")
+                    built[index] = build_quotation(solution, items_by_solution[solution_id], shares, mechanics)
+                except QuotationError as e:
+                    errors[index] = e
+
+            if built:
+                quotations, quoted_items, quoted_mechanics = [], [], []
+                for quotation, items, quotation_mechanics in built.values():
+                    for line in items + quotation_mechanics:
+                        line.quotation = quotation
+                    quotations.append(quotation)
+                    quoted_items += items
+                    quoted_mechanics += quotation_mechanics
+                save_quotations(quotations, quoted_items, quoted_mechanics)
+                queue_emails([quotation_email(*parts) for parts in built.values()])
+                created = {index: attach_lines(*parts) for index, parts in built.items()}
+
+    return [(created.get(index), errors.get(index)) for index in range(len(entries))]
+
+def create_quotation(solution_id, input_mechanics):
+    """
+    Creates a quotation for one vehicle solution; raises QuotationError when it cannot.
+    """
+    [(quotation, error)] = create_quotations([(solution_id, input_mechanics)])
+    if error is not None:
+        raise error
+    return quotation
+
+# Payment.tax_rate holds up to 999.99 (%)
+MAX_TAX_RATE = Decimal('999.99')
+CENT = Decimal('0.01')
+PAYMENT_METHODS = {value for value, _ in Payment.PAYMENT_METHODS}
+
+def parse_tax_rate(raw):
+    """
+    Returns the tax rate (%) as a Decimal rounded to the cent; the configured
+    Settings rate, read from the cache, when `raw` is empty.
+    """
+    if raw is None or raw == '':
+        app_settings = get_app_settings()
+        if app_settings is None or app_settings.tax_rate is None:
+            raise QuotationError("tax_rate is required when no default tax rate is configured.")
+        return app_settings.tax_rate
+    try:
+        rate = Decimal(str(raw).strip())
+    except InvalidOperation:
+        raise QuotationError("Invalid tax_rate value.")
+    if not rate.is_finite() or not 0 <= rate <= MAX_TAX_RATE:
+        raise QuotationError("Invalid tax_rate value.")
+    return rate.quantize(CENT, rounding=ROUND_HALF_UP)
+
+def payment_total(grand_total, tax_rate):
+    """
+    grand_total plus tax at `tax_rate` percent, the tax rounded half up to the cent.
+    """
+    tax = (grand_total * tax_rate / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+    return grand_total + tax
+
+def capture_payment(quotation_id, tax_rate, payment_method, paid_by_id):
+    """
+    Records the payment of a quotation and marks it paid; raises QuotationError when it cannot.
+
+    The quotation row is locked before the paid check, so of two concurrent
+    submissions the second waits for the first to commit and is then refused
+    as already paid, instead of failing on Payment's one-to-one constraint.
+    Amounts are computed in Decimal, never float.
+    """
+    with transaction.atomic():
+        quotation = Quotation.objects.select_for_update().filter(id=quotation_id).first()
+        if quotation is None:
+            raise QuotationError("Quotation not found.", status.HTTP_404_NOT_FOUND)
+        if quotation.payment_status == 'Paid':
+            raise QuotationError("This quotation has already been paid.")
+        if not payment_method or not paid_by_id:
+            raise QuotationError("payment_method and paid_by are required.")
+        if payment_method not in PAYMENT_METHODS:
+            raise QuotationError(f"payment_method must be one of: {', '.join(value for value, _ in Payment.PAYMENT_METHODS)}.")
+        tax_rate = parse_tax_rate(tax_rate)
+        try:
+            customer = User.objects.get(id=int(paid_by_id), role='Customer')
+        except (TypeError, ValueError, User.DoesNotExist):
+            raise QuotationError("Paid_by must be a valid customer.")
+
+        payment = Payment.objects.create(
+            quotation=quotation,
+            amount_paid=payment_total(quotation.grand_total, tax_rate),
+            tax_rate=tax_rate,
+            payment_method=payment_method,
+            paid_by=customer,
+        )
+        quotation.payment_status = 'Paid'
+        quotation.save(update_fields=['payment_status', 'updated_at'])
+    return payment
@@ -0,0 +1,268 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import transaction
+from django.db.models import Count, DateField, DecimalField, ExpressionWrapper, F, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from base.filters import choice_of, day
+from base.models import *
+
+REPORT_PERIODS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+ZERO = Decimal('0.00')
+
+def _cents(value):
+    return Decimal(value or 0).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+def _midnight(value):
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+def _next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def report_range(request):
+    """
+    Inclusive `date_from`/`date_to` (YYYY-MM-DD) from the query string; defaults to the year to date.
+    """
+    today = timezone.localdate()
+    values, errors = {}, {}
+    for param, default in (('date_from', today.replace(month=1, day=1)), ('date_to', today)):
+        raw = request.query_params.get(param)
+        try:
+            values[param] = day(raw) if raw else default
+        except ValueError as e:
+            errors[param] = str(e)
+    if not errors and values['date_from'] > values['date_to']:
+        errors['date_to'] = "Must not be before date_from."
+    if errors:
+        raise ValidationError(errors)
+    return values['date_from'], values['date_to']
+
+def report_period(request, default='month'):
+    raw = request.query_params.get('period')
+    try:
+        return choice_of([(period, period) for period in REPORT_PERIODS])(raw) if raw else default
+    except ValueError as e:
+        raise ValidationError({'period': str(e)})
+
+def tax_included():
+    """
+    Tax contained in amount_paid, which includes it: amount * rate / (100 + rate).
+    """
+    rate = Coalesce('tax_rate', Value(Decimal('0')), output_field=DecimalField(max_digits=5, decimal_places=2))
+    return ExpressionWrapper(F('amount_paid') * rate / (rate + 100), output_field=DecimalField(max_digits=14, decimal_places=4))
+
+def payment_totals(condition, period):
+    """
+    Payment count, revenue and tax per (period start, payment method) in one grouped query.
+    """
+    return (
+        Payment.objects.filter(condition)
+        .annotate(period=REPORT_PERIODS[period]('payment_date', output_field=DateField()))
+        .values('period', 'payment_method')
+        .order_by()
+        .annotate(payments=Count('id'), revenue=Sum('amount_paid'), tax=Sum(tax_included()))
+    )
+
+def _lock_months(months):
+    # In month order, so concurrent lockers of overlapping months queue instead of deadlocking
+    list(RevenueMonth.objects.select_for_update().filter(month__in=months).order_by('month').values_list('id'))
+
+def _store_months(months):
+    totals = {(month, method): (0, ZERO, ZERO) for month in months for method, _ in Payment.PAYMENT_METHODS}
+    window = Q(payment_date__gte=_midnight(min(months)), payment_date__lt=_midnight(_next_month(max(months))))
+    for row in payment_totals(window, 'month'):
+        if row['period'] in months:
+            totals[(row['period'], row['payment_method'])] = (row['payments'], row['revenue'], row['tax'])
+    rows = [
+        MonthlyRevenue(month=month, payment_method=method, payments=payments, revenue=_cents(revenue), tax=_cents(tax))
+        for (month, method), (payments, revenue, tax) in sorted(totals.items())
+    ]
+    # A concurrent report may have closed the same months first
+    MonthlyRevenue.objects.bulk_create(rows, ignore_conflicts=True)
+    return rows
+
+def close_months(months):
+    """
+    Computes and stores MonthlyRevenue rows for closed `months` (first days) in one grouped query.
+
+    The payments are read and the totals stored under a lock on each month's
+    RevenueMonth row, which reopen_months() takes as well: a payment write
+    either commits before the totals are read, or deletes them after they are
+    stored. Call it outside any transaction, so the payments read are the latest.
+    """
+    if not months:
+        return []
+    # Created in autocommit beforehand, so the locks below always find their row
+    RevenueMonth.objects.bulk_create([RevenueMonth(month=month) for month in months], ignore_conflicts=True)
+    with transaction.atomic():
+        _lock_months(months)
+        return _store_months(months)
+
+def reopen_months(dates):
+    """
+    Drops the stored totals of closed months containing `dates`, after a payment in them changed.
+
+    Run inside the payment write's transaction, which keeps the months locked until it commits.
+    """
+    current = timezone.localdate().replace(day=1)
+    months = {value.replace(day=1) for value in dates if value.replace(day=1) < current}
+    if months:
+        with transaction.atomic(savepoint=False):
+            _lock_months(months)
+            MonthlyRevenue.objects.filter(month__in=months).delete()
+
+def rebuild_monthly_revenue():
+    """
+    Recomputes MonthlyRevenue for every closed month since the first payment or
+    the start of the year, whichever is earlier; returns the number of months.
+    """
+    current = timezone.localdate().replace(day=1)
+    first = Payment.objects.aggregate(first=Min('payment_date'))['first']
+    month = current.replace(month=1)
+    if first:
+        month = min(month, timezone.localdate(first).replace(day=1))
+    months = []
+    while month < current:
+        months.append(month)
+        month = _next_month(month)
+    RevenueMonth.objects.bulk_create([RevenueMonth(month=month) for month in months], ignore_conflicts=True)
+    with transaction.atomic():
+        _lock_months(months)
+        MonthlyRevenue.objects.all().delete()
+        if months:
+            _store_months(months)
+    return len(months)
+
+def _summary(methods):
+    payments = sum(values[0] for values in methods.values())
+    revenue = _cents(sum((values[1] for values in methods.values()), ZERO))
+    tax = _cents(sum((values[2] for values in methods.values()), ZERO))
+    return {
+        "payments": payments,
+        "revenue": revenue,
+        "tax": tax,
+        "net": revenue - tax,
+        "methods": {
+            method: {"payments": count, "revenue": _cents(amount)}
+            for method, (count, amount, _) in sorted(methods.items()) if count
+        },
+    }
+
+def revenue_report(period, date_from, date_to):
+    """
+    Revenue, tax collected and payment method mix per day, week or month between two dates (inclusive).
+
+    Live figures come from one grouped query over the payment_date index. For
+    monthly reports, months that are over and fully inside the range are read
+    from MonthlyRevenue instead (closing any not stored yet), so a year-to-date
+    report only scans the current month's payments.
+    """
+    buckets = defaultdict(lambda: defaultdict(lambda: (0, ZERO, ZERO)))
+
+    def add(key, method, payments, revenue, tax):
+        count, amount, taxed = buckets[key][method]
+        buckets[key][method] = (count + payments, amount + (revenue or ZERO), taxed + (tax or ZERO))
+
+    start, end = _midnight(date_from), _midnight(date_to + timedelta(days=1))
+    live = Q(payment_date__gte=start, payment_date__lt=end)
+    scan_live = True
+    if period == 'month':
+        current = timezone.localdate().replace(day=1)
+        months = []
+        month = date_from if date_from.day == 1 else _next_month(date_from)
+        while month < current and _next_month(month) - timedelta(days=1) <= date_to:
+            months.append(month)
+            month = _next_month(month)
+        if months:
+            stored = list(MonthlyRevenue.objects.filter(month__gte=months[0], month__lte=months[-1]))
+            stored += close_months(sorted(set(months) - {row.month for row in stored}))
+            for row in stored:
+                add(row.month, row.payment_method, row.payments, row.revenue, row.tax)
+            # Only the partial months at either end are left to scan, as two index ranges
+            rolled_start, rolled_end = _midnight(months[0]), _midnight(_next_month(months[-1]))
+            live = Q(payment_date__gte=start, payment_date__lt=rolled_start) | Q(payment_date__gte=rolled_end, payment_date__lt=end)
+            scan_live = start < rolled_start or rolled_end < end
+
+    if scan_live:
+        for row in payment_totals(live, period):
+            add(row['period'], row['payment_method'], row['payments'], row['revenue'], row['tax'])
+
+    overall = defaultdict(lambda: (0, ZERO, ZERO))
+    for methods in buckets.values():
+        for method, (count, amount, taxed) in methods.items():
+            total = overall[method]
+            overall[method] = (total[0] + count, total[1] + amount, total[2] + taxed)
+    return {
+        "period": period,
+        "date_from": date_from,
+        "date_to": date_to,
+        "totals": _summary(overall),
+        "periods": [
+            {"period": key, **_summary(methods)}
+            for key, methods in sorted(buckets.items()) if any(values[0] for values in methods.values())
+        ],
+    }
+
+# Header -> mechanic_payouts() field, in column order for the payroll CSV
+PAYOUT_COLUMNS = [
+    ('mechanic_id', 'id'),
+    ('mechanic_name', 'name'),
+    ('jobs_assigned', 'jobs_assigned'),
+    ('jobs_completed', 'jobs_completed'),
+    ('open_assignments', 'open_assignments'),
+    ('labor_quoted', 'labor_quoted'),
+    ('labor_earned', 'labor_earned'),
+]
+
+def _per_mechanic(queryset, aggregate, default):
+    """
+    Correlated subquery of `aggregate` over `queryset` rows belonging to the outer mechanic.
+    """
+    total = queryset.filter(mechanic_id=OuterRef('pk')).order_by().values('mechanic_id').annotate(total=aggregate).values('total')
+    return Coalesce(Subquery(total), default, output_field=default.output_field)
+
+def mechanic_payouts(date_from, date_to):
+    """
+    Workload and labor pay per mechanic between two dates (inclusive), in one query.
+
+    - jobs_assigned: solutions dated in the range the mechanic is assigned to
+    - jobs_completed / labor_earned: quoted labor on quotations paid in the range
+    - labor_quoted: labor share on quotations created in the range, paid or not
+    - open_assignments: assignments, of any date, whose solution is not paid yet
+
+    Each figure is a correlated subquery over the mechanic's own rows (the
+    foreign key indexes), so the joins cannot multiply each other's counts.
+    Returns a values() queryset ordered by labor earned.
+    """
+    start, end = _midnight(date_from), _midnight(date_to + timedelta(days=1))
+    money = Value(ZERO, output_field=DecimalField(max_digits=14, decimal_places=2))
+    paid = QuotedMechanic.objects.filter(quotation__payment__payment_date__gte=start, quotation__payment__payment_date__lt=end)
+    return (
+        User.objects.filter(role='Mechanic')
+        .annotate(
+            jobs_assigned=_per_mechanic(
+                VehicleSolutionMechanic.objects.filter(vehicle_solution__solution_date__gte=start, vehicle_solution__solution_date__lt=end),
+                Count('id'), Value(0),
+            ),
+            jobs_completed=_per_mechanic(paid, Count('id'), Value(0)),
+            open_assignments=_per_mechanic(
+                VehicleSolutionMechanic.objects.exclude(vehicle_solution__quotation__payment_status='Paid'), Count('id'), Value(0),
+            ),
+            labor_quoted=_per_mechanic(
+                QuotedMechanic.objects.filter(quotation__created_at__gte=start, quotation__created_at__lt=end),
+                Sum('labor_share'), money,
+            ),
+            labor_earned=_per_mechanic(paid, Sum('labor_share'), money),
+        )
+        .order_by('-labor_earned', 'name', 'id')
+        .values(*[field for _, field in PAYOUT_COLUMNS])
+    )
+
+def payout_rows(date_from, date_to):
+    """
+    Streams mechanic_payouts() rows with money rounded to cents (SQLite returns bare sums).
+    """
+    for row in mechanic_payouts(date_from, date_to).iterator():
+        yield {**row, 'labor_quoted': _cents(row['labor_quoted']), 'labor_earned': _cents(row['labor_earned'])}
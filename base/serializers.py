@@ -1,5 +1,7 @@
+from base.stock import *
 from base.models import *
 from account.models import *
+from django.db import transaction
 from rest_framework import serializers
 from decimal import Decimal, InvalidOperation
 from django.contrib.auth import get_user_model
@@ -20,6 +22,8 @@ class VehicleSerializer(serializers.ModelSerializer):
         fields = ('id', 'customer', 'customer_id', 'make', 'model', 'year', 'color', 'license_plate', 'vin', 'created_at', 'updated_at')
 
 class VehicleSolutionMechanicSerializer(serializers.ModelSerializer):
+    # Writable so a solution update can match existing assignments
+    id = serializers.IntegerField(required=False)
     mechanic_id = serializers.IntegerField(write_only=True)
     mechanic = UserSerializer(read_only=True)
 
@@ -29,9 +33,12 @@ class VehicleSolutionMechanicSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         # Directly create the mechanic assignment
+        validated_data.pop('id', None)
         return VehicleSolutionMechanic.objects.create(**validated_data)
 
 class SolutionItemSerializer(serializers.ModelSerializer):
+    # Writable so a solution update can match existing items
+    id = serializers.IntegerField(required=False)
     inventory_item = serializers.SerializerMethodField(read_only=True)
     inventory_item_id = serializers.IntegerField(write_only=True)
     item_total = serializers.SerializerMethodField(read_only=True)
@@ -39,6 +46,9 @@ class SolutionItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = SolutionItem
         fields = ['id', 'inventory_item', 'inventory_item_id', 'quantity_used', 'item_cost', 'item_total']
+        # Read by get_inventory_item/get_item_total; see base.prefetch.plan_queryset
+        prefetch_hints = ('inventory_item',)
+        annotate_with = 'with_totals'
 
     def get_inventory_item(self, obj):
         # Minimal representation of inventory item details
@@ -50,12 +60,11 @@ class SolutionItemSerializer(serializers.ModelSerializer):
         }
 
     def get_item_total(self, obj):
-        # Calculate total based on unit_price and quantity_used
-        try:
-            unit_price = float(obj.inventory_item.unit_price)
-        except (ValueError, TypeError):
-            unit_price = 0.0
-        return unit_price * obj.quantity_used
+        # Annotated by SolutionItemQuerySet.with_totals() when the item was loaded through the planner
+        line_total = getattr(obj, 'line_total', None)
+        if line_total is None:
+            line_total = obj.inventory_item.unit_price * obj.quantity_used
+        return line_total
 
     def validate_quantity_used(self, value):
         if value <= 0:
@@ -63,55 +72,32 @@ class SolutionItemSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
+        validated_data.pop('id', None)
         inventory_item_id = validated_data.pop('inventory_item_id')
         quantity_used = validated_data.get('quantity_used')
-        try:
-            inventory_item = Inventory.objects.get(id=inventory_item_id)
-        except Inventory.DoesNotExist:
-            raise serializers.ValidationError("Inventory item not found.")
 
-        try:
-            available_quantity = int(inventory_item.quantity)
-        except (TypeError, ValueError):
-            raise serializers.ValidationError("Inventory quantity is invalid.")
+        with transaction.atomic():
+            # Deduct the quantity used from the inventory under a row lock
+            shortfalls = deduct_stock([(inventory_item_id, quantity_used)], solution=validated_data.get('vehicle_solution'))
+            if shortfalls:
+                raise serializers.ValidationError(shortfall_messages(shortfalls))
 
-        if quantity_used > available_quantity:
-            raise serializers.ValidationError(f"Not enough quantity available. Only {available_quantity} left.")
-
-        # Deduct the quantity used from the inventory
-        inventory_item.quantity = str(available_quantity - quantity_used)
-        inventory_item.save()
-
-        validated_data['inventory_item'] = inventory_item
-        return SolutionItem.objects.create(**validated_data)
+            validated_data['inventory_item_id'] = inventory_item_id
+            return SolutionItem.objects.create(**validated_data)
 
     def update(self, instance, validated_data):
         new_quantity = validated_data.get('quantity_used', instance.quantity_used)
-        inventory_item = instance.inventory_item
-        try:
-            available_quantity = int(inventory_item.quantity)
-        except (TypeError, ValueError):
-            raise serializers.ValidationError("Inventory quantity is invalid.")
-
-        # Restore the previous quantity before applying update
-        available_quantity += instance.quantity_used
         delta = new_quantity - instance.quantity_used
 
-        if delta > 0:
-            # Check if additional quantity required is available
-            if delta > available_quantity:
-                raise serializers.ValidationError(f"Not enough quantity available. Only {available_quantity} left.")
-            available_quantity -= delta
-        else:
-            # Negative delta means quantity reduced, so add back to inventory
-            available_quantity -= delta  # subtracting a negative number
-
-        inventory_item.quantity = str(available_quantity)
-        inventory_item.save()
-
-        instance.quantity_used = new_quantity
-        instance.item_cost = validated_data.get('item_cost', instance.item_cost)
-        instance.save()
+        with transaction.atomic():
+            # A positive delta takes more stock, a negative one gives some back
+            shortfalls = apply_stock_changes({instance.inventory_item_id: -delta}, solution=instance.vehicle_solution_id)
+            if shortfalls:
+                raise serializers.ValidationError(shortfall_messages(shortfalls))
+
+            instance.quantity_used = new_quantity
+            instance.item_cost = validated_data.get('item_cost', instance.item_cost)
+            instance.save(update_fields=['quantity_used', 'item_cost'])
         return instance
 
 class VehicleSolutionSerializer(serializers.ModelSerializer):
@@ -131,27 +117,47 @@ class VehicleSolutionSerializer(serializers.ModelSerializer):
             'mechanic_assignments',
             'grand_total'
         ]
+        annotate_with = 'with_totals'
 
     def get_grand_total(self, obj):
-        total = 0.0
-        for item in obj.solution_items.all():
-            try:
-                unit_price = float(item.inventory_item.unit_price)
-            except (ValueError, TypeError):
-                unit_price = 0.0
-            total += unit_price * item.quantity_used
-        return total
-
+        # Annotated by VehicleSolutionQuerySet.with_totals() when the solution is the planned queryset
+        items_total = getattr(obj, 'items_total', None)
+        if items_total is not None:
+            return items_total
+        # Reached through select_related(): the items are already prefetched with their line totals
+        if 'solution_items' in getattr(obj, '_prefetched_objects_cache', {}):
+            return sum((self.fields['solution_items'].child.get_item_total(item) for item in obj.solution_items.all()), Decimal('0.00'))
+        return obj.solution_items.total()
+
+    def create_solution_items(self, vehicle_solution, solution_items_data):
+        """
+        Deducts stock for every item in one locked batch, then inserts the items.
+        """
+        shortfalls = deduct_stock(
+            ((item_data['inventory_item_id'], item_data['quantity_used']) for item_data in solution_items_data),
+            solution=vehicle_solution
+        )
+        if shortfalls:
+            raise serializers.ValidationError({'solution_items': shortfall_messages(shortfalls)})
+
+        SolutionItem.objects.bulk_create([
+            SolutionItem(
+                vehicle_solution=vehicle_solution,
+                inventory_item_id=item_data['inventory_item_id'],
+                quantity_used=item_data['quantity_used'],
+                item_cost=item_data.get('item_cost'),
+            )
+            for item_data in solution_items_data
+        ])
+
+    @transaction.atomic
     def create(self, validated_data):
         solution_items_data = validated_data.pop('solution_items', [])
         mechanics_data = validated_data.pop('mechanic_assignments', [])
         vehicle_solution = VehicleSolution.objects.create(**validated_data)
 
         # Create nested solution items
-        for item_data in solution_items_data:
-            serializer = SolutionItemSerializer(data=item_data, context=self.context)
-            serializer.is_valid(raise_exception=True)
-            serializer.save(vehicle_solution=vehicle_solution)
+        self.create_solution_items(vehicle_solution, solution_items_data)
 
         # Create nested mechanic assignments
         for mech_data in mechanics_data:
@@ -161,39 +167,106 @@ class VehicleSolutionSerializer(serializers.ModelSerializer):
 
         return vehicle_solution
 
-    def update(self, instance, validated_data):
-        solution_items_data = validated_data.pop('solution_items', [])
-        mechanics_data = validated_data.pop('mechanic_assignments', [])
-
-        # Update basic fields of vehicle solution
-        instance.solution_description = validated_data.get('solution_description', instance.solution_description)
-        instance.solution_date = validated_data.get('solution_date', instance.solution_date)
-        instance.total_cost = validated_data.get('total_cost', instance.total_cost)
-        instance.save()
-
-        # Restore inventory for existing solution items before update
-        for item in instance.solution_items.all():
-            inventory_item = item.inventory_item
-            try:
-                available_quantity = int(inventory_item.quantity)
-            except (TypeError, ValueError):
-                available_quantity = 0
-            inventory_item.quantity = str(available_quantity + item.quantity_used)
-            inventory_item.save()
-        # Delete old solution items and recreate from new data
-        instance.solution_items.all().delete()
+    def update_solution_items(self, instance, solution_items_data):
+        """
+        Brings the solution's items in line with `solution_items_data`, matching rows by id.
+
+        Items without an id are added and existing items left out are removed.
+        Only the net stock change per inventory item is applied, in one locked
+        batch, and the changed rows are written with one bulk INSERT, UPDATE and
+        DELETE at most; unchanged items are not touched.
+        """
+        existing = {item.id: item for item in instance.solution_items.select_for_update()}
+        changes, errors, new_items, changed_items = {}, [], [], []
         for item_data in solution_items_data:
-            serializer = SolutionItemSerializer(data=item_data, context=self.context)
-            serializer.is_valid(raise_exception=True)
-            serializer.save(vehicle_solution=instance)
-
-        # Update mechanic assignments: Clear and recreate
-        instance.mechanic_assignments.all().delete()
+            inventory_id, quantity = item_data['inventory_item_id'], item_data['quantity_used']
+            if item_data.get('id') is None:
+                new_items.append(SolutionItem(
+                    vehicle_solution=instance,
+                    inventory_item_id=inventory_id,
+                    quantity_used=quantity,
+                    item_cost=item_data.get('item_cost'),
+                ))
+                changes[inventory_id] = changes.get(inventory_id, 0) - quantity
+                continue
+
+            item = existing.pop(item_data['id'], None)
+            if item is None:
+                # Unknown, belonging to another solution or listed twice
+                errors.append(f"Solution item {item_data['id']} is not part of this solution.")
+                continue
+            item_cost = item_data.get('item_cost', item.item_cost)
+            if (inventory_id, quantity, item_cost) == (item.inventory_item_id, item.quantity_used, item.item_cost):
+                continue
+            changes[item.inventory_item_id] = changes.get(item.inventory_item_id, 0) + item.quantity_used
+            changes[inventory_id] = changes.get(inventory_id, 0) - quantity
+            item.inventory_item_id, item.quantity_used, item.item_cost = inventory_id, quantity, item_cost
+            changed_items.append(item)
+        if errors:
+            raise serializers.ValidationError({'solution_items': errors})
+
+        removed = list(existing.values())
+        for item in removed:
+            changes[item.inventory_item_id] = changes.get(item.inventory_item_id, 0) + item.quantity_used
+        shortfalls = apply_stock_changes(changes, solution=instance)
+        if shortfalls:
+            raise serializers.ValidationError({'solution_items': shortfall_messages(shortfalls)})
+
+        if removed:
+            SolutionItem.objects.filter(id__in=[item.id for item in removed]).delete()
+        if changed_items:
+            SolutionItem.objects.bulk_update(changed_items, ['inventory_item', 'quantity_used', 'item_cost'])
+        if new_items:
+            SolutionItem.objects.bulk_create(new_items)
+
+    def update_mechanic_assignments(self, instance, mechanics_data):
+        """
+        Same as update_solution_items() for mechanic assignments, without the stock.
+        """
+        existing = {assignment.id: assignment for assignment in instance.mechanic_assignments.all()}
+        errors, new_assignments, changed_assignments = [], [], []
         for mech_data in mechanics_data:
-            serializer = VehicleSolutionMechanicSerializer(data=mech_data, context=self.context)
-            serializer.is_valid(raise_exception=True)
-            serializer.save(vehicle_solution=instance)
-
+            if mech_data.get('id') is None:
+                new_assignments.append(VehicleSolutionMechanic(vehicle_solution=instance, mechanic_id=mech_data['mechanic_id']))
+                continue
+            assignment = existing.pop(mech_data['id'], None)
+            if assignment is None:
+                errors.append(f"Mechanic assignment {mech_data['id']} is not part of this solution.")
+            elif assignment.mechanic_id != mech_data['mechanic_id']:
+                assignment.mechanic_id = mech_data['mechanic_id']
+                changed_assignments.append(assignment)
+        # Omitted rows are deleted, so the payload is the final set and must not repeat a mechanic
+        mechanic_ids = [mech_data['mechanic_id'] for mech_data in mechanics_data]
+        for mechanic_id in sorted({m for m in mechanic_ids if mechanic_ids.count(m) > 1}):
+            errors.append(f"Mechanic {mechanic_id} is assigned more than once.")
+        if errors:
+            raise serializers.ValidationError({'mechanic_assignments': errors})
+
+        # Removals go first so a mechanic can move between rows without tripping unique_together
+        if existing:
+            VehicleSolutionMechanic.objects.filter(id__in=list(existing)).delete()
+        if changed_assignments:
+            VehicleSolutionMechanic.objects.bulk_update(changed_assignments, ['mechanic'])
+        if new_assignments:
+            VehicleSolutionMechanic.objects.bulk_create(new_assignments)
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        # Only fields that actually changed are written
+        changed = [
+            field for field in ('solution_description', 'solution_date', 'total_cost')
+            if field in validated_data and validated_data[field] != getattr(instance, field)
+        ]
+        for field in changed:
+            setattr(instance, field, validated_data[field])
+        if changed:
+            instance.save(update_fields=changed)
+
+        # Children are only reconciled when the request lists them
+        if 'solution_items' in validated_data:
+            self.update_solution_items(instance, validated_data['solution_items'])
+        if 'mechanic_assignments' in validated_data:
+            self.update_mechanic_assignments(instance, validated_data['mechanic_assignments'])
         return instance
 
 class VehicleIssueSerializer(serializers.ModelSerializer):
@@ -254,27 +327,129 @@ class CustomerSerializer(serializers.ModelSerializer):
         model = User
         fields = ('id', 'name', 'username', 'email', 'phone_number', 'image', 'role', 'address', 'created_at', 'vehicles')
 
+class VehicleSummarySerializer(serializers.ModelSerializer):
+    """
+    Flat vehicle row without the owner or the issue history.
+    """
+    class Meta:
+        model = Vehicle
+        fields = ('id', 'make', 'model', 'year', 'color', 'license_plate', 'vin', 'created_at', 'updated_at')
+
+class UserListSerializer(serializers.ModelSerializer):
+    """
+    Flat user row used by the paginated user list (depth 0).
+    """
+    class Meta:
+        model = User
+        fields = ('id', 'name', 'username', 'email', 'phone_number', 'image', 'role', 'created_at')
+
+class UserVehiclesSerializer(UserListSerializer):
+    """
+    User row with its vehicles, without the issue history (depth 1).
+    """
+    vehicles = VehicleSummarySerializer(many=True, read_only=True)
+
+    class Meta(UserListSerializer.Meta):
+        fields = UserListSerializer.Meta.fields + ('vehicles',)
+
+class CustomerListSerializer(serializers.ModelSerializer):
+    """
+    Flat customer row used by the paginated customer list (depth 0).
+    """
+    class Meta:
+        model = User
+        fields = ('id', 'name', 'username', 'email', 'phone_number', 'image', 'role', 'address', 'created_at')
+
+class CustomerVehiclesSerializer(CustomerListSerializer):
+    """
+    Customer row with its vehicles, without the issue history (depth 1).
+    """
+    vehicles = VehicleSummarySerializer(many=True, read_only=True)
+
+    class Meta(CustomerListSerializer.Meta):
+        fields = CustomerListSerializer.Meta.fields + ('vehicles',)
+
+class InventoryListSerializer(serializers.ModelSerializer):
+    """
+    Flat inventory row used by the inventory list; every extra column is a DB annotation.
+    """
+    created_by = serializers.IntegerField(source='created_by_id', read_only=True)
+    created_by_name = serializers.CharField(read_only=True)
+    total = serializers.DecimalField(source='stock_value', max_digits=14, decimal_places=2, read_only=True)
+    usage_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Inventory
+        fields = (
+            'id', 'item_name', 'item_type', 'quantity', 'unit_price', 'reorder_level', 'is_low_stock',
+            'created_by', 'created_by_name', 'total', 'usage_count', 'created_at'
+        )
+        annotate_with = 'with_summary'
+
 class InventorySerializer(serializers.ModelSerializer):
     created_by = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), write_only=True)
     created_by_details = UserSerializer(source='created_by', read_only=True)
     total = serializers.SerializerMethodField(read_only=True)
-    # Retrieve related solution items using the default reverse accessor "solutionitem_set"
-    solution_items = SolutionItemSerializer(many=True, read_only=True, source='solutionitem_set')
 
     class Meta:
         model = Inventory
-        fields = ('id', 'item_name', 'item_type', 'quantity', 'unit_price', 'created_by', 'created_by_details', 'total', 'solution_items')
+        fields = ('id', 'item_name', 'item_type', 'quantity', 'unit_price', 'reorder_level', 'created_by', 'created_by_details', 'total')
+        annotate_with = 'with_totals'
+        # The UniqueTogetherValidator DRF derives from the (item_name, item_type)
+        # constraint would make both fields required; validate() checks it instead
+        validators = []
+
+    def validate(self, attrs):
+        # Like the database constraint, rows missing a name or type never collide
+        item_name = attrs.get('item_name', getattr(self.instance, 'item_name', None))
+        item_type = attrs.get('item_type', getattr(self.instance, 'item_type', None))
+        if item_name is not None and item_type is not None and ('item_name' in attrs or 'item_type' in attrs):
+            duplicates = Inventory.objects.filter(item_name=item_name, item_type=item_type)
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError({'item_name': "An item with this name and type already exists."})
+        return attrs
 
     def get_total(self, obj):
-        try:
-            qty = float(obj.quantity) if obj.quantity is not None else 0
-        except (TypeError, ValueError):
-            qty = 0
-        try:
-            price = float(obj.unit_price) if obj.unit_price is not None else 0
-        except (TypeError, ValueError):
-            price = 0
-        return qty * price
+        # Annotated by InventoryQuerySet.with_totals() when loaded through the planner
+        stock_value = getattr(obj, 'stock_value', None)
+        if stock_value is None:
+            stock_value = obj.quantity * obj.unit_price
+        return stock_value
+
+    @transaction.atomic
+    def create(self, validated_data):
+        inventory = super().create(validated_data)
+        record_movements({inventory.id: inventory.quantity}, 'Initial')
+        return inventory
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        # Stock edits go through the ledger; only the other submitted fields are saved,
+        # so a stale in-memory quantity never overwrites concurrent stock changes
+        quantity = validated_data.pop('quantity', None)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        if validated_data:
+            instance.save(update_fields=list(validated_data))
+        if quantity is not None:
+            set_stock_level(instance, quantity)
+        return instance
+
+class InventoryUsageSerializer(serializers.ModelSerializer):
+    """
+    One use of an inventory item in a vehicle solution, for the paginated usage history.
+    """
+    solution_date = serializers.DateTimeField(source='vehicle_solution.solution_date', read_only=True)
+    license_plate = serializers.CharField(source='vehicle_solution.vehicle_issue.vehicle.license_plate', read_only=True, default=None)
+    item_total = serializers.DecimalField(source='line_total', max_digits=14, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = SolutionItem
+        fields = ('id', 'vehicle_solution', 'solution_date', 'license_plate', 'quantity_used', 'item_cost', 'item_total')
+        prefetch_hints = ('vehicle_solution__vehicle_issue__vehicle',)
+        annotate_with = 'with_totals'
 
 class SettingsSerializer(serializers.ModelSerializer):
     class Meta:
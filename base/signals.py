@@ -0,0 +1,56 @@
+from base.cache import invalidate_app_settings
+from base.dashboard import ROLLUP_FIELDS, apply_rollup, contribution, rollup_difference
+from base.models import Payment, Settings
+from base.reports import reopen_months
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+@receiver([post_save, post_delete], sender=Settings)
+def settings_changed(sender, **kwargs):
+    """
+    Any write to Settings (API, admin or shell) invalidates the cached copy.
+    """
+    invalidate_app_settings()
+
+def lock_rollup_state(sender, instance, update_fields=None, **kwargs):
+    """
+    Reads the stored ROLLUP_FIELDS values under a row lock held until the save commits.
+
+    The old contribution must come from the row being overwritten, not from
+    the instance as it was loaded: two concurrent saves of the same row would
+    otherwise both take the same stale values off the rollup. Saves whose
+    update_fields leave the rollup fields alone skip the read.
+    """
+    fields = ROLLUP_FIELDS[sender]
+    if instance.pk is None or (update_fields is not None and not set(update_fields) & set(fields)):
+        instance._rollup_state = None
+        return
+    instance._rollup_state = sender.objects.select_for_update().filter(pk=instance.pk).values_list(*fields).first()
+
+def update_rollup(sender, instance, created, update_fields=None, **kwargs):
+    fields = ROLLUP_FIELDS[sender]
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return
+    old = None if created else instance._rollup_state
+    new = tuple(getattr(instance, field) for field in fields)
+    if old is not None and update_fields is not None:
+        # Fields a partial save did not write keep their stored values
+        new = tuple(value if field in update_fields else stored for field, value, stored in zip(fields, new, old))
+    apply_rollup(rollup_difference(contribution(sender, new), contribution(sender, old)))
+    if sender is Payment:
+        # Any change (method included) invalidates the stored totals of a closed month
+        reopen_months([timezone.localdate(state[0]) for state in (old, new) if state])
+
+def remove_from_rollup(sender, instance, **kwargs):
+    state = tuple(getattr(instance, field) for field in ROLLUP_FIELDS[sender])
+    apply_rollup(rollup_difference({}, contribution(sender, state)))
+    if sender is Payment:
+        reopen_months([timezone.localdate(state[0])])
+
+# Issue, quotation and payment writes keep the dashboard rollup current; their
+# saves run in a transaction (TransactionalSaveModel) so the pre_save lock holds
+for model in ROLLUP_FIELDS:
+    pre_save.connect(lock_rollup_state, sender=model)
+    post_save.connect(update_rollup, sender=model)
+    post_delete.connect(remove_from_rollup, sender=model)
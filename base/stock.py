@@ -0,0 +1,214 @@
+from collections import namedtuple
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Sum, When
+from django.utils import timezone
+from base.mailer import queue_email
+from base.models import Inventory, StockMovement, User
+
+StockShortfall = namedtuple('StockShortfall', ['inventory_id', 'requested', 'available'])
+StockShortfall.__doc__ = """
+A stock line that could not be satisfied. `available` is None when the inventory item does not exist.
+"""
+
+def _net_changes(lines, sign):
+    """
+    Folds (inventory_id, quantity) lines into one signed delta per inventory item.
+    """
+    changes = {}
+    for inventory_id, quantity in lines:
+        changes[inventory_id] = changes.get(inventory_id, 0) + sign * quantity
+    return changes
+
+def record_movements(changes, reason=None, solution=None):
+    """
+    Appends one StockMovement per {inventory_id: delta} with a single INSERT.
+
+    Without a `reason`, negative deltas are recorded as Usage and positive ones
+    as Return. `solution` is a VehicleSolution or its id. Callers must already
+    have applied the deltas to Inventory.quantity.
+    """
+    StockMovement.objects.bulk_create([
+        StockMovement(
+            inventory_item_id=inventory_id,
+            delta=delta,
+            reason=reason or ('Usage' if delta < 0 else 'Return'),
+            vehicle_solution_id=getattr(solution, 'pk', solution),
+        )
+        for inventory_id, delta in changes.items() if delta
+    ])
+
+def apply_stock_changes(changes, reason=None, solution=None):
+    """
+    Applies signed quantity deltas ({inventory_id: delta}) to inventory as one unit.
+
+    Rows are locked with select_for_update() in primary-key order, so concurrent
+    callers touching overlapping items queue up instead of deadlocking, and all
+    deltas are applied with a single UPDATE ... SET quantity = quantity + delta.
+    Each delta is also appended to the stock ledger (see record_movements()).
+    If any item would drop below zero (or does not exist) nothing is changed and
+    the shortfalls are returned; an empty list means every change was applied.
+    """
+    changes = {inventory_id: delta for inventory_id, delta in changes.items() if delta}
+    if not changes:
+        return []
+
+    with transaction.atomic():
+        rows = list(
+            Inventory.objects.select_for_update()
+            .filter(id__in=changes)
+            .order_by('id')
+            .only('id', 'quantity')
+        )
+        found = {row.id for row in rows}
+        shortfalls = [
+            StockShortfall(inventory_id, -delta, None)
+            for inventory_id, delta in changes.items()
+            if inventory_id not in found
+        ]
+        for row in rows:
+            if row.quantity + changes[row.id] < 0:
+                shortfalls.append(StockShortfall(row.id, -changes[row.id], row.quantity))
+
+        if shortfalls:
+            return sorted(shortfalls)
+        Inventory.objects.filter(id__in=changes).update(
+            quantity=Case(*[When(id=inventory_id, then=F('quantity') + delta) for inventory_id, delta in changes.items()])
+        )
+        record_movements(changes, reason, solution)
+    return []
+
+def set_stock_level(inventory, quantity, reason='Adjustment'):
+    """
+    Sets an item's stock to `quantity`, recording the difference in the ledger.
+    """
+    with transaction.atomic():
+        current = Inventory.objects.select_for_update().values_list('quantity', flat=True).get(id=inventory.id)
+        if quantity != current:
+            Inventory.objects.filter(id=inventory.id).update(quantity=F('quantity') + (quantity - current))
+            record_movements({inventory.id: quantity - current}, reason)
+    inventory.quantity = quantity
+    return inventory
+
+def deduct_stock(lines, solution=None):
+    """
+    Takes stock for (inventory_id, quantity) lines; see apply_stock_changes().
+    """
+    return apply_stock_changes(_net_changes(lines, -1), 'Usage', solution)
+
+def restore_stock(lines, solution=None):
+    """
+    Returns stock for (inventory_id, quantity) lines; see apply_stock_changes().
+    """
+    return apply_stock_changes(_net_changes(lines, 1), 'Return', solution)
+
+def shortfall_messages(shortfalls):
+    """
+    Human readable validation messages for a list of shortfalls.
+    """
+    messages = []
+    for shortfall in shortfalls:
+        if shortfall.available is None:
+            messages.append(f"Inventory item {shortfall.inventory_id} not found.")
+        else:
+            messages.append(
+                f"Not enough quantity available for inventory item {shortfall.inventory_id}. "
+                f"Only {shortfall.available} left."
+            )
+    return messages
+
+# Roles that receive the low-stock digest
+STOCK_ALERT_ROLES = ('Admin', 'Storekeeper')
+
+def low_stock_digest(items):
+    """
+    Returns (subject, body) for a digest listing newly low inventory items.
+    """
+    subject = f"Low stock: {len(items)} item{'s' if len(items) != 1 else ''} at or below reorder level"
+    body_lines = ["The following items have reached their reorder level:", ""]
+    for item in items:
+        body_lines.append(
+            f"• {item.item_name} ({item.item_type or 'Uncategorised'}): {item.quantity} left, reorder level {item.reorder_level}"
+        )
+    body_lines += ["", "Best regards,", f"{settings.DEFAULT_FROM_EMAIL}"]
+    return subject, "\n".join(body_lines)
+
+def scan_low_stock(dry_run=False):
+    """
+    Alerts on items that reached their reorder level since the previous scan.
+
+    An item is alerted once: it is stamped with low_stock_alerted_at when it
+    goes into the digest, and the stamp is cleared once stock moves back above
+    the reorder level, so the next drop alerts again. Both lookups run on the
+    (is_low_stock, low_stock_alerted_at) index and only read items whose state
+    changed, never the whole table. Newly low items are locked with
+    skip_locked, so overlapping scans cannot alert twice.
+
+    Queues one digest email for all new items to active admins and
+    storekeepers. Returns (newly low items, number of alerts cleared).
+    """
+    with transaction.atomic():
+        items = list(
+            Inventory.objects.select_for_update(skip_locked=True)
+            .filter(is_low_stock=True, low_stock_alerted_at__isnull=True)
+            .order_by('item_name', 'id')
+        )
+        recovered = Inventory.objects.filter(is_low_stock=False, low_stock_alerted_at__isnull=False)
+        if dry_run:
+            return items, recovered.count()
+
+        cleared = recovered.update(low_stock_alerted_at=None)
+        if items:
+            Inventory.objects.filter(id__in=[item.id for item in items]).update(low_stock_alerted_at=timezone.now())
+            recipients = list(
+                User.objects.filter(is_active=True, role__in=STOCK_ALERT_ROLES).order_by('id').values_list('email', flat=True)
+            )
+            if recipients:
+                queue_email(*low_stock_digest(items), recipients)
+    return items, cleared
+
+def stock_drift(queryset=None):
+    """
+    Items whose stored quantity differs from the sum of their ledger.
+
+    Returns a list of (inventory_id, quantity, ledger_balance). The ledger is
+    summed in one grouped query over the (inventory_item, delta) index and
+    compared with the stored quantities, streamed by a second one; items
+    without movements have a balance of 0.
+    """
+    movements = StockMovement.objects.all()
+    if queryset is None:
+        queryset = Inventory.objects.all()
+    else:
+        movements = movements.filter(inventory_item__in=queryset.values('id'))
+    balances = dict(
+        movements.order_by().values('inventory_item').annotate(balance=Sum('delta')).values_list('inventory_item', 'balance')
+    )
+    return [
+        (inventory_id, quantity, balances.get(inventory_id, 0))
+        for inventory_id, quantity in queryset.order_by('id').values_list('id', 'quantity').iterator()
+        if quantity != balances.get(inventory_id, 0)
+    ]
+
+def reconcile_stock():
+    """
+    Rewrites drifted quantities to their ledger balances and returns the drift that was fixed.
+
+    Drift is found without locks; only the drifted rows are then locked, in id
+    order, and compared again, so no stock change can slip in between the
+    comparison and the single UPDATE that fixes them. Stock cannot go below
+    zero, so a ledger summing to less is brought back to zero with an
+    Adjustment movement, and both sides agree afterwards.
+    """
+    candidates = [inventory_id for inventory_id, _, _ in stock_drift()]
+    if not candidates:
+        return []
+    with transaction.atomic():
+        list(Inventory.objects.select_for_update().filter(id__in=candidates).order_by('id').values_list('id'))
+        drift = stock_drift(Inventory.objects.filter(id__in=candidates))
+        if drift:
+            Inventory.objects.filter(id__in=[inventory_id for inventory_id, _, _ in drift]).update(
+                quantity=Case(*[When(id=inventory_id, then=max(balance, 0)) for inventory_id, _, balance in drift])
+            )
+            record_movements({inventory_id: -balance for inventory_id, _, balance in drift if balance < 0}, 'Adjustment')
+    return drift
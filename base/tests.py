@@ -1,3 +1,1306 @@
-from django.test import TestCase
+import os
+import json
+import time
+import tempfile
+from unittest import mock
+from datetime import timedelta
+from io import StringIO
+from decimal import Decimal
+from base.models import *
+from account.authentication import local_tokens, shared_cache_key, user_cache_key
+from account.throttling import CacheRateLimitBackend, DatabaseRateLimitBackend, get_backend, scope_counts
+from base.cache import get_app_settings
+from base.dashboard import dashboard_summary, rebuild_rollups
+from base.exports import export_rows
+from base.idempotency import purge_expired_keys
+from base.imports import import_inventory
+from base.mailer import queue_email
+from base.reports import mechanic_payouts, rebuild_monthly_revenue, revenue_report
+from base.stock import StockShortfall, deduct_stock, reconcile_stock, restore_stock, scan_low_stock, stock_drift
+from account.models import *
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
 
-# Create your tests here.
+import account.urls
+import base.urls
+
+# Stored per-route baseline, one file per database vendor since query counts differ
+# between them; regenerate with `UPDATE_BENCHMARKS=1 python manage.py test base`
+# (plus TEST_MYSQL=1 for the MySQL file)
+def baseline_path():
+    suffix = '' if connection.vendor == 'sqlite' else f'.{connection.vendor}'
+    return os.path.join(os.path.dirname(__file__), f'benchmark_baseline{suffix}.json')
+
+# Allowed drift before a route counts as regressed. Query counts must not grow at all;
+# response size and wall time get some headroom because they vary with timestamps and machines.
+BYTES_TOLERANCE = 0.10
+TIME_TOLERANCE = 3.0
+TIME_SLACK_MS = 250
+
+# Size of the synthetic dataset. Large enough that a per-row query shows up as
+# dozens of extra queries on the list endpoints.
+CUSTOMERS = 40
+VEHICLES_PER_CUSTOMER = 2
+ISSUES_PER_VEHICLE = 2
+INVENTORY_ITEMS = 30
+MECHANICS = 5
+ITEMS_PER_SOLUTION = 3
+
+PASSWORD = 'Bench@Pass123'
+
+
+def seed_benchmark_data():
+    """
+    Seeds a fixed, deterministic dataset covering every model the API touches.
+    """
+    admin = User.objects.create_user(
+        email='admin@bench.test', name='Bench Admin', phone_number='0700000000',
+        password=PASSWORD, role='Admin'
+    )
+    mechanics = User.objects.bulk_create([
+        User(
+            name=f'Mechanic {i}', username=f'mechanic-{i}', slug=f'mechanic-{i}',
+            email=f'mechanic{i}@bench.test', phone_number=f'0710000{i:03d}', role='Mechanic'
+        )
+        for i in range(MECHANICS)
+    ])
+    customers = User.objects.bulk_create([
+        User(
+            name=f'Customer {i}', username=f'customer-{i}', slug=f'customer-{i}',
+            email=f'customer{i}@bench.test', phone_number=f'0720000{i:03d}', role='Customer',
+            address=f'{i} Bench Street'
+        )
+        for i in range(CUSTOMERS)
+    ])
+    inventory = Inventory.objects.bulk_create([
+        Inventory(
+            item_name=f'Part {i}', item_type=Inventory.ITEM_TYPES[i % 3][0],
+            quantity=100000, unit_price=Decimal(f'{1000 + i * 25}.50'), created_by=admin
+        )
+        for i in range(INVENTORY_ITEMS)
+    ])
+    vehicles = Vehicle.objects.bulk_create([
+        Vehicle(
+            customer=customer, make='Toyota', model=f'Model {j}', year=2010 + j, color='Blue',
+            license_plate=f'RA{c:03d}{j}B', vin=f'VIN{c:05d}{j:02d}'
+        )
+        for c, customer in enumerate(customers)
+        for j in range(VEHICLES_PER_CUSTOMER)
+    ])
+    statuses = [choice for choice, _ in VehicleIssue.STATUS_CHOICES]
+    issues = VehicleIssue.objects.bulk_create([
+        VehicleIssue(
+            vehicle=vehicle, reported_issue=f'Noise {k}', diagnosed_issue='Worn part',
+            status=statuses[(v + k) % len(statuses)], estimated_cost=Decimal('15000.00')
+        )
+        for v, vehicle in enumerate(vehicles)
+        for k in range(ISSUES_PER_VEHICLE)
+    ])
+    # Three out of four issues get a solution, half of those a quotation, half of those a payment.
+    solutions = VehicleSolution.objects.bulk_create([
+        VehicleSolution(vehicle_issue=issue, solution_description=f'Replaced part {i}', total_cost=Decimal('20000.00'))
+        for i, issue in enumerate(issues) if i % 4
+    ])
+    SolutionItem.objects.bulk_create([
+        SolutionItem(
+            vehicle_solution=solution, inventory_item=inventory[(s + n) % INVENTORY_ITEMS],
+            quantity_used=n + 1, item_cost=Decimal('1000.00')
+        )
+        for s, solution in enumerate(solutions)
+        for n in range(ITEMS_PER_SOLUTION)
+    ])
+    VehicleSolutionMechanic.objects.bulk_create([
+        VehicleSolutionMechanic(vehicle_solution=solution, mechanic=mechanics[(s + n) % MECHANICS])
+        for s, solution in enumerate(solutions)
+        for n in range(2)
+    ])
+    quotations = Quotation.objects.bulk_create([
+        Quotation(vehicle_solution=solution, grand_total=Decimal('25000.00'))
+        for s, solution in enumerate(solutions) if s % 2 == 0
+    ])
+    QuotedItem.objects.bulk_create([
+        QuotedItem(
+            quotation=quotation, inventory_item=inventory[q % INVENTORY_ITEMS], quantity_used=2,
+            unit_price=Decimal('1000.00'), item_total=Decimal('2000.00')
+        )
+        for q, quotation in enumerate(quotations)
+    ])
+    QuotedMechanic.objects.bulk_create([
+        QuotedMechanic(quotation=quotation, mechanic=mechanics[q % MECHANICS], labor_share=Decimal('5000.00'))
+        for q, quotation in enumerate(quotations)
+    ])
+    paid = quotations[::2]
+    Payment.objects.bulk_create([
+        Payment(
+            quotation=quotation, amount_paid=Decimal('29500.00'), tax_rate=Decimal('18.00'),
+            payment_method='Cash', paid_by=quotation.vehicle_solution.vehicle_issue.vehicle.customer
+        )
+        for quotation in paid
+    ])
+    Quotation.objects.filter(id__in=[q.id for q in paid]).update(payment_status='Paid')
+    # Spread payments over the last few months so reports cover closed months
+    for n, payment_id in enumerate(Payment.objects.order_by('id').values_list('id', flat=True)):
+        Payment.objects.filter(id=payment_id).update(payment_date=timezone.now() - timedelta(days=31 * (n % 4)))
+    Settings.objects.create(name='Bench Garage', tax_rate=Decimal('18.00'), labor_rate=Decimal('5000.00'))
+    rebuild_rollups()
+    rebuild_monthly_revenue()
+
+    return {
+        'admin': admin,
+        'mechanics': mechanics,
+        'customers': customers,
+        'inventory': inventory,
+        'vehicles': vehicles,
+        'issues': issues,
+        'solutions': solutions,
+        'quotations': quotations,
+        'paid': paid,
+    }
+
+
+def route_names():
+    """
+    Every named route exposed by the base and auth URLconfs, as 'namespace:name'.
+    """
+    names = set()
+    for module in (base.urls, account.urls):
+        for pattern in module.urlpatterns:
+            if getattr(pattern, 'name', None):
+                names.add(f'{module.app_name}:{pattern.name}')
+    return names
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class EndpointBenchmarkTests(TestCase):
+    """
+    Hits every API route against the seeded dataset and compares query count,
+    wall time and response size with the stored baseline.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_benchmark_data()
+        cls.token = Token.objects.create(user=cls.data['admin'])
+
+    def setUp(self):
+        # Cached data and rate-limit windows do not roll back with the test transaction
+        cache.clear()
+        local_tokens.clear()
+        get_backend().reset()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def benchmark_cases(self):
+        """
+        One request per route: (route, method, url kwargs, payload, query string).
+        """
+        d = self.data
+        customer = d['customers'][-1]
+        unquoted = next(s for s in d['solutions'] if not Quotation.objects.filter(vehicle_solution=s).exists())
+        unpaid = next(q for q in d['quotations'] if q not in d['paid'])
+        free_issue = next(i for i in d['issues'] if not VehicleSolution.objects.filter(vehicle_issue=i).exists())
+        spare_inventory = Inventory.objects.create(item_name='Unused Part', item_type='Tools', quantity=5, unit_price=Decimal('10.00'))
+        spare_user = User.objects.create(name='Spare Clerk', email='spare@bench.test', phone_number='0730000000', role='Cashier')
+        spare_customer = User.objects.create(name='Spare Customer', email='sparec@bench.test', phone_number='0730000001', role='Customer')
+        Inventory.objects.filter(id__in=[item.id for item in d['inventory'][:5]]).update(reorder_level=200000)
+        d['admin'].reset_otp = '12345'
+        d['admin'].otp_created_at = timezone.now()
+        d['admin'].save()
+
+        return [
+            ('base:Dashboard', 'get', {}, None, ''),
+
+            ('base:GetUsers', 'get', {}, None, ''),
+            ('base:AddUser', 'post', {}, {'name': 'New Clerk', 'email': 'new@bench.test', 'phone_number': '0740000000', 'role': 'Cashier'}, ''),
+            ('base:UserDetails', 'get', {'pk': d['mechanics'][0].pk}, None, ''),
+            ('base:UpdateUser', 'put', {'pk': d['mechanics'][0].pk}, {'name': 'Renamed Mechanic'}, ''),
+            ('base:DeleteUser', 'delete', {'pk': spare_user.pk}, None, ''),
+
+            ('base:GetCustomers', 'get', {}, None, ''),
+            ('base:AddCustomer', 'post', {}, {'name': 'New Customer', 'email': 'newc@bench.test', 'phone_number': '0740000001'}, ''),
+            ('base:CustomerDetails', 'get', {'pk': customer.pk}, None, ''),
+            ('base:UpdateCustomer', 'put', {'pk': customer.pk}, {'address': 'Moved'}, ''),
+            ('base:DeleteCustomer', 'delete', {'pk': spare_customer.pk}, None, ''),
+
+            ('base:GetVehicles', 'get', {}, None, ''),
+            ('base:AddVehicle', 'post', {}, {'customer_id': customer.pk, 'make': 'Honda', 'license_plate': 'RZ999Z', 'vin': 'VINNEW'}, ''),
+            ('base:VehicleDetails', 'get', {'pk': d['vehicles'][0].pk}, None, ''),
+            ('base:UpdateVehicle', 'put', {'pk': d['vehicles'][0].pk}, {'color': 'Red'}, ''),
+            ('base:DeleteVehicle', 'delete', {'pk': d['vehicles'][0].pk}, None, ''),
+
+            ('base:GetVehicleIssues', 'get', {}, None, ''),
+            ('base:AddVehicleIssue', 'post', {}, {'vehicle_id': d['vehicles'][0].pk, 'reported_issue': 'Rattle'}, ''),
+            ('base:VehicleIssueDetails', 'get', {'pk': d['issues'][1].pk}, None, ''),
+            ('base:UpdateVehicleIssue', 'put', {'pk': d['issues'][1].pk}, {'status': 'Completed'}, ''),
+            ('base:DeleteVehicleIssue', 'delete', {'pk': d['issues'][1].pk}, None, ''),
+
+            ('base:GetInventory', 'get', {}, None, ''),
+            ('base:AddInventory', 'post', {}, {'item_name': 'Brake Pad', 'item_type': 'Spare Part', 'quantity': '10', 'unit_price': '5000'}, ''),
+            ('base:ImportInventory', 'post', {}, {'mode': 'add', 'items': [
+                {'item_name': f'Part {i}', 'item_type': Inventory.ITEM_TYPES[i % 3][0], 'quantity': 5, 'unit_price': '1200.00'}
+                for i in range(0, 40, 2)
+            ] + [
+                {'item_name': f'Imported Part {i}', 'item_type': 'Materials', 'quantity': 10, 'unit_price': '99.90'}
+                for i in range(20)
+            ]}, ''),
+            ('base:InventoryDetails', 'get', {'pk': d['inventory'][0].pk}, None, ''),
+            ('base:UpdateInventory', 'put', {'pk': d['inventory'][0].pk}, {'unit_price': '1200'}, ''),
+            ('base:DeleteInventory', 'delete', {'pk': spare_inventory.pk}, None, ''),
+
+            ('base:GetVehicleSolutions', 'get', {}, None, ''),
+            ('base:AddVehicleSolution', 'post', {}, {
+                'vehicle_issue': free_issue.pk,
+                'solution_description': 'Fixed',
+                'solution_items': [
+                    {'inventory_item_id': d['inventory'][n].pk, 'quantity_used': 1} for n in range(ITEMS_PER_SOLUTION)
+                ],
+                'mechanic_assignments': [{'mechanic_id': d['mechanics'][0].pk}],
+            }, ''),
+            ('base:VehicleSolutionDetails', 'get', {'pk': d['solutions'][0].pk}, None, ''),
+            ('base:UpdateVehicleSolution', 'put', {'pk': d['solutions'][0].pk}, {
+                'solution_description': 'Fixed again',
+                # Existing items matched by id: one quantity changes, one item is swapped out
+                'solution_items': [
+                    {'id': item.pk, 'inventory_item_id': item.inventory_item_id, 'quantity_used': item.quantity_used + (n == 0)}
+                    for n, item in enumerate(d['solutions'][0].solution_items.all()[1:])
+                ] + [{'inventory_item_id': d['inventory'][-1].pk, 'quantity_used': 2}],
+                'mechanic_assignments': [{'mechanic_id': d['mechanics'][1].pk}],
+            }, ''),
+            ('base:DeleteVehicleSolution', 'delete', {'pk': unquoted.pk}, None, ''),
+
+            ('base:Settings', 'get', {}, None, ''),
+
+            ('base:GetQuotationBySolution', 'get', {'solution_id': d['quotations'][0].vehicle_solution_id}, None, ''),
+            ('base:CreateQuotationFromSolution', 'post', {'solution_id': unquoted.pk}, {
+                'quoted_mechanics': [{'mechanic_id': m.pk, 'labor_share': '2500'} for m in d['mechanics'][:2]],
+            }, ''),
+            ('base:CreateQuotationsBatch', 'post', {}, {
+                'quotations': [
+                    {
+                        'solution_id': s.pk,
+                        'quoted_mechanics': [{'mechanic_id': m.pk, 'labor_share': '2500'} for m in d['mechanics'][:2]],
+                    }
+                    for s in d['solutions'] if s.pk != unquoted.pk and not Quotation.objects.filter(vehicle_solution=s).exists()
+                ][:20],
+            }, ''),
+
+            ('base:RevenueReport', 'get', {}, None, ''),
+            ('base:MechanicPayoutReport', 'get', {}, None, ''),
+
+            ('base:GetPaymentByQuotation', 'get', {'quotation_id': d['paid'][0].pk}, None, ''),
+            ('base:CreatePayment', 'post', {'quotation_id': unpaid.pk}, {
+                'tax_rate': '18', 'payment_method': 'Cash',
+                'paid_by': unpaid.vehicle_solution.vehicle_issue.vehicle.customer_id,
+            }, ''),
+
+            ('base:GetLowStockInventory', 'get', {}, None, ''),
+            ('base:ExportInventory', 'get', {}, None, ''),
+            ('base:ExportVehicles', 'get', {}, None, '?output=ndjson'),
+            ('base:ExportVehicleIssues', 'get', {}, None, ''),
+            ('base:ExportQuotations', 'get', {}, None, ''),
+            ('base:ExportPayments', 'get', {}, None, '?output=ndjson'),
+
+            ('auth:login', 'post', {}, {'identifier': d['admin'].email, 'password': PASSWORD}, ''),
+            ('auth:logout', 'post', {}, None, ''),
+            ('auth:update', 'patch', {}, {'address': 'Head Office'}, ''),
+            ('auth:updatePassword', 'post', {}, {
+                'old_password': PASSWORD, 'new_password': 'Bench@Pass456', 'confirm_new_password': 'Bench@Pass456',
+            }, ''),
+            ('auth:passwordResetRequest', 'post', {}, {'email': d['admin'].email}, ''),
+            ('auth:passwordResetConfirm', 'post', {}, {
+                'email': d['admin'].email, 'otp': '12345',
+                'new_password': 'Bench@Pass789', 'confirm_new_password': 'Bench@Pass789',
+            }, ''),
+            ('auth:rateLimitStats', 'get', {}, None, ''),
+        ]
+
+    def measure(self, route, method, kwargs, payload, query):
+        """
+        Performs one request inside a rolled-back transaction and returns its metrics.
+        """
+        url = reverse(route, kwargs=kwargs) + query
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(self.client, method)(url, payload, format='json')
+                # Streaming responses only run their queries while being consumed
+                content = b''.join(response.streaming_content) if response.streaming else response.content
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+        return response, {
+            'queries': len(queries.captured_queries),
+            'time_ms': round(elapsed_ms, 2),
+            'bytes': len(content),
+        }
+
+    def test_every_route_has_a_benchmark_case(self):
+        covered = {case[0] for case in self.benchmark_cases()}
+        self.assertEqual(route_names() - covered, set(), "Add a benchmark case for every new route.")
+
+    def test_endpoints_within_baseline(self):
+        results = {}
+        for route, method, kwargs, payload, query in self.benchmark_cases():
+            # The first pass warms imports and caches; the second pass is the one recorded.
+            self.measure(route, method, kwargs, payload, query)
+            response, results[route] = self.measure(route, method, kwargs, payload, query)
+            with self.subTest(route=route, check='status'):
+                self.assertLess(response.status_code, 500, None if response.streaming else response.content[:500])
+
+        if os.environ.get('UPDATE_BENCHMARKS'):
+            with open(baseline_path(), 'w') as fh:
+                json.dump(dict(sorted(results.items())), fh, indent=2)
+                fh.write('\n')
+            return
+
+        if not os.path.exists(baseline_path()):
+            self.skipTest(f"No {connection.vendor} baseline recorded; rerun with UPDATE_BENCHMARKS=1.")
+        with open(baseline_path()) as fh:
+            baseline = json.load(fh)
+
+        for route, metrics in results.items():
+            expected = baseline.get(route)
+            with self.subTest(route=route, check='baseline'):
+                self.assertIsNotNone(expected, f"No baseline for {route}; rerun with UPDATE_BENCHMARKS=1.")
+            if expected is None:
+                continue
+            with self.subTest(route=route, check='queries'):
+                self.assertLessEqual(metrics['queries'], expected['queries'])
+            with self.subTest(route=route, check='bytes'):
+                self.assertLessEqual(metrics['bytes'], expected['bytes'] * (1 + BYTES_TOLERANCE))
+            with self.subTest(route=route, check='time_ms'):
+                self.assertLessEqual(metrics['time_ms'], expected['time_ms'] * TIME_TOLERANCE + TIME_SLACK_MS)
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError("SMTP server unavailable")
+
+
+class OutboundEmailQueueTests(TestCase):
+    """
+    Queued emails are written after commit and delivered by send_queued_emails.
+    """
+
+    def test_email_is_queued_on_commit_and_delivered_by_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                queue_email("Hello", "Body", ['customer@bench.test'])
+                self.assertFalse(OutboundEmail.objects.exists())
+
+        call_command('send_queued_emails', stdout=StringIO())
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, 'Sent')
+        self.assertEqual([m.to for m in mail.outbox], [['customer@bench.test']])
+
+    @override_settings(EMAIL_BACKEND='base.tests.FailingEmailBackend')
+    def test_failed_delivery_is_retried_with_backoff(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_email("Hello", "Body", ['customer@bench.test'])
+
+        call_command('send_queued_emails', '--max-attempts=2', '--backoff=60', stdout=StringIO())
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('Pending', 1))
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_queued_emails', '--max-attempts=2', stdout=StringIO(), stderr=StringIO())
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('Failed', 2))
+
+
+class SettingsCacheTests(TestCase):
+    """
+    get_app_settings() serves repeat reads without queries and sees every save.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeat_reads_are_query_free_and_saves_invalidate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Settings.objects.create(name='Garage', tax_rate=Decimal('18.00'))
+        self.assertEqual(get_app_settings().tax_rate, Decimal('18.00'))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_app_settings().name, 'Garage')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            instance = Settings.objects.first()
+            instance.tax_rate = Decimal('16.00')
+            instance.save()
+        self.assertEqual(get_app_settings().tax_rate, Decimal('16.00'))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """
+    Repeat requests with the same token skip the auth query; logout revokes at once.
+    """
+
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+        self.user = User.objects.create(name='Cache Clerk', email='cache@bench.test', phone_number='0750000000', role='Cashier')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cached_token_skips_auth_query_until_logout(self):
+        url = reverse('base:Settings')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(url)
+        local_tokens.clear()
+        with CaptureQueriesContext(connection) as shared:
+            self.client.get(url)
+        self.assertFalse([q for q in cold.captured_queries + shared.captured_queries if 'authtoken_token' in q['sql']])
+
+        # The cached copy is dropped only once the delete commits
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(self.client.post(reverse('auth:logout')).status_code, 200)
+        self.assertIsNotNone(cache.get(shared_cache_key(self.token.key)))
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(shared_cache_key(self.token.key)))
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_password_change_revokes_cached_tokens_on_commit(self):
+        self.user.set_password('s3cret-pass')
+        self.user.save()
+        self.client.get(reverse('base:Settings'))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('auth:updatePassword'), {
+                'old_password': 's3cret-pass', 'new_password': 'N3w-pass!', 'confirm_new_password': 'N3w-pass!',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(shared_cache_key(self.token.key)))
+        self.assertEqual(self.client.get(reverse('base:Settings')).status_code, 401)
+
+    def test_login_revokes_cached_old_token_on_commit(self):
+        self.user.set_password('s3cret-pass')
+        self.user.save()
+        url = reverse('base:Settings')
+        self.assertNotEqual(self.client.get(url).status_code, 401)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post(reverse('auth:login'), {'identifier': 'cache@bench.test', 'password': 's3cret-pass'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_shared_cache_holds_no_secrets(self):
+        self.client.get(reverse('base:Settings'))
+        snapshot = cache.get(shared_cache_key(self.token.key))
+        self.assertNotIn('password', snapshot['user'])
+        self.assertNotIn(self.token.key, repr(snapshot))
+        self.assertEqual(cache.get(user_cache_key(self.user.pk)), shared_cache_key(self.token.key))
+
+        # A cached user has its password deferred, so saving the profile keeps the stored hash
+        local_tokens.clear()
+        self.user.set_password('s3cret-pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertIsNone(cache.get(shared_cache_key(self.token.key)))
+        self.client.get(reverse('base:Settings'))
+        local_tokens.clear()
+        response = self.client.patch(reverse('auth:update'), {'name': 'Cache Clerk II'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('s3cret-pass'))
+
+
+@override_settings(RATE_LIMIT={'RATES': {'login': '3/min', 'password_reset': '5/min'}})
+class LoginRateLimitTests(TestCase):
+    """
+    Attempts over the limit are rejected with 429 before any work beyond the counters.
+    """
+
+    def setUp(self):
+        cache.clear()
+        # The in-memory windows outlive a test's transaction
+        get_backend().reset()
+        self.addCleanup(get_backend().reset)
+        User.objects.create(name='Limit Clerk', email='limit@bench.test', phone_number='0760000000', role='Cashier')
+
+    def test_login_attempts_over_limit_are_rejected_without_queries(self):
+        # Pin the clock mid-minute so the attempts cannot straddle two windows
+        self.enterContext(mock.patch('account.throttling.time.time', return_value=1_800_000_030.0))
+        url = reverse('auth:login')
+        payload = {'identifier': 'LIMIT@bench.test', 'password': 'wrong'}
+        for _ in range(3):
+            self.assertEqual(self.client.post(url, payload).status_code, 400)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, payload)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(len(queries), 0)
+
+        # The identifier is limited on its own, whichever client address tries it
+        response = self.client.post(url, {'identifier': 'limit@bench.test', 'password': 'wrong'}, REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(response.status_code, 429)
+        latest = next(iter(scope_counts('login', 1).values()))
+        self.assertEqual(latest, {'allowed': 3, 'rejected': 2})
+
+    def test_reset_request_and_confirm_have_separate_budgets(self):
+        self.enterContext(mock.patch('account.throttling.time.time', return_value=1_800_000_030.0))
+        payload = {'email': 'limit@bench.test'}
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(5):
+                self.assertEqual(self.client.post(reverse('auth:passwordResetRequest'), payload).status_code, 200)
+        self.assertEqual(self.client.post(reverse('auth:passwordResetRequest'), payload).status_code, 429)
+        response = self.client.post(reverse('auth:passwordResetConfirm'), {**payload, 'otp': '00000'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cache_backend_requires_atomic_increments(self):
+        file_cache = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.gettempdir()}}
+        with override_settings(CACHES=file_cache):
+            with self.assertRaises(ImproperlyConfigured):
+                CacheRateLimitBackend()
+        # LocMemCache increments atomically within the process
+        backend = CacheRateLimitBackend()
+        results = [backend.attempt('login', ['ip:10.0.0.1'], 2, 60)[0] for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+
+    def test_database_backend_counts_shared_attempts(self):
+        self.enterContext(mock.patch('account.throttling.time.time', return_value=1_800_000_030.0))
+        backend = DatabaseRateLimitBackend()
+        results = [backend.attempt('login', ['ip:10.0.0.1', 'id:limit'], 2, 60)[0] for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(backend.counts('login', [30_000_000]), {30_000_000: {'allowed': 2, 'rejected': 1}})
+
+
+class StreamingExportTests(TestCase):
+    """
+    Exports stream every row in fixed-size chunks as CSV or NDJSON.
+    """
+
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+        user = User.objects.create(name='Export Clerk', email='export@bench.test', phone_number='0770000000', role='Cashier')
+        Inventory.objects.bulk_create([
+            Inventory(item_name=f'Part {i}', item_type='Tools', quantity=i, unit_price=Decimal('2.50'), created_by=user)
+            for i in range(5)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_export_rows_reads_in_keyset_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(export_rows(Inventory, ['id', 'item_name'], chunk_size=2))
+        self.assertEqual([name for _, name in rows], [f'Part {i}' for i in range(5)])
+        self.assertEqual(len(queries.captured_queries), 3)
+
+    def test_csv_and_ndjson_outputs(self):
+        url = reverse('base:ExportInventory')
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,item_name,item_type,quantity,unit_price,reorder_level,created_by,created_at')
+        self.assertEqual(len(lines), 6)
+        self.assertIn('Part 4,Tools,4,2.50,0,Export Clerk', lines[-1])
+
+        response = self.client.get(url + '?output=ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows[0]['item_name'], 'Part 0')
+        self.assertEqual(rows[0]['unit_price'], '2.50')
+
+        self.assertEqual(self.client.get(url + '?output=xml').status_code, 400)
+
+
+class InventoryImportTests(TestCase):
+    """
+    Imports upsert by item name and type, and reject the whole file on any invalid row.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(name='Import Clerk', email='import@bench.test', phone_number='0780000000', role='Cashier')
+        self.existing = Inventory.objects.create(item_name='Oil Filter', item_type='Spare Part', quantity=4, unit_price=Decimal('12.00'))
+
+    def test_upsert_sets_or_adds_quantities(self):
+        rows = [
+            {'item_name': 'Oil Filter', 'item_type': 'spare part', 'quantity': '6', 'unit_price': '13.5'},
+            {'item_name': 'Coolant', 'item_type': 'Materials', 'quantity': 2, 'unit_price': '8'},
+        ]
+        report = import_inventory(rows, user=self.user, mode='add')
+        self.assertEqual((report['created'], report['updated'], report['failed']), (1, 1, 0))
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.quantity, self.existing.unit_price), (10, Decimal('13.50')))
+
+        import_inventory(rows[:1], mode='set')
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.quantity, 6)
+        self.assertEqual(Inventory.objects.get(item_name='Coolant').created_by, self.user)
+
+    def test_invalid_rows_are_reported_and_nothing_is_saved(self):
+        rows = [
+            {'item_name': 'Coolant', 'item_type': 'Materials', 'quantity': 2, 'unit_price': '8'},
+            {'item_name': '', 'item_type': 'Gadgets', 'quantity': '-1', 'unit_price': 'abc'},
+            {'item_name': 'Coolant', 'item_type': 'Materials', 'quantity': 3, 'unit_price': '8'},
+        ]
+        report = import_inventory(rows)
+        self.assertEqual(report['failed'], 2)
+        self.assertEqual(set(report['errors'][0]['errors']), {'item_name', 'item_type', 'quantity', 'unit_price'})
+        self.assertEqual(report['errors'][1], {'row': 3, 'errors': {'item_name': 'Duplicate of row 1.'}})
+        self.assertFalse(Inventory.objects.filter(item_name='Coolant').exists())
+
+        # Names that differ only in case are the same item where the unique index ignores case
+        report = import_inventory([rows[0], {**rows[2], 'item_name': 'COOLANT'}], dry_run=True)
+        if connection.vendor == 'mysql':
+            self.assertEqual(report['errors'], [{'row': 2, 'errors': {'item_name': 'Duplicate of row 1.'}}])
+        else:
+            self.assertEqual((report['created'], report['failed']), (2, 0))
+
+    def test_case_variants_match_as_the_unique_index_does(self):
+        movements = self.existing.stock_movements.count()
+        report = import_inventory([{'item_name': 'OIL FILTER', 'item_type': 'Spare Part', 'quantity': 9, 'unit_price': '12.00'}])
+        self.existing.refresh_from_db()
+        if connection.vendor == 'mysql':
+            self.assertEqual((report['created'], report['updated'], self.existing.quantity), (0, 1, 9))
+        else:
+            # A separate row, so the stored item and its ledger are left alone
+            self.assertEqual((report['created'], report['updated'], self.existing.quantity), (1, 0, 4))
+            self.assertEqual(self.existing.stock_movements.count(), movements)
+            variant = Inventory.objects.get(item_name='OIL FILTER')
+            self.assertEqual(list(variant.stock_movements.values_list('reason', 'delta')), [('Import', 9)])
+
+    def test_add_inventory_keeps_item_type_optional(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('base:AddInventory')
+        payload = {'item_name': 'Shop Rags', 'quantity': 3, 'unit_price': '1.00', 'created_by': self.user.pk}
+        self.assertEqual(client.post(url, payload, format='json').status_code, 201)
+        response = client.post(url, {**payload, 'item_name': 'Oil Filter', 'item_type': 'Spare Part'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('item_name', response.json()['errors'])
+
+    def test_command_imports_csv(self):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'stock.csv')
+        with open(path, 'w') as fh:
+            fh.write('item_name,item_type,quantity,unit_price\nOil Filter,Spare Part,1,12.00\nWiper Blade,Spare Part,7,"1,050.00"\n')
+        out = StringIO()
+        call_command('import_inventory', path, '--mode', 'add', stdout=out)
+        self.assertIn('Created 1 and updated 1', out.getvalue())
+        self.assertEqual(Inventory.objects.get(item_name='Wiper Blade').unit_price, Decimal('1050.00'))
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.quantity, 5)
+
+
+class ListFilterTests(TestCase):
+    """
+    List endpoints filter, search and sort server-side on whitelisted parameters.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_benchmark_data()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.data['admin'])
+
+    def get_data(self, route, query, key='data'):
+        response = self.client.get(reverse(route) + query)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response.json()[key]
+
+    def test_filters_and_search(self):
+        issues = self.get_data('base:GetVehicleIssues', '?status=completed&search=ra00')
+        self.assertTrue(issues)
+        self.assertTrue(all(issue['status'] == 'Completed' for issue in issues))
+
+        solutions = self.get_data('base:GetVehicleSolutions', '?payment_status=Paid')
+        self.assertEqual(len(solutions), len(self.data['paid']))
+
+        vehicles = self.get_data('base:GetVehicles', f"?customer={self.data['customers'][3].pk}")
+        self.assertEqual({vehicle['license_plate'] for vehicle in vehicles}, {'RA0030B', 'RA0031B'})
+
+    def test_ordering_and_cursor_pages(self):
+        items = self.get_data('base:GetInventory', '?item_type=tools&ordering=-unit_price')
+        prices = [Decimal(item['unit_price']) for item in items]
+        self.assertEqual(prices, sorted(prices, reverse=True))
+        self.assertTrue(all(item['item_type'] == 'Tools' for item in items))
+
+        response = self.client.get(reverse('base:GetCustomers') + '?ordering=-name&page_size=25').json()
+        names = [row['name'] for row in response['data']]
+        names += [row['name'] for row in self.client.get(response['next']).json()['data']]
+        self.assertEqual(names, sorted((c.name for c in self.data['customers']), reverse=True))
+
+    def test_invalid_parameters_are_rejected(self):
+        for route, query in [
+            ('base:GetVehicles', '?ordering=vin'),
+            ('base:GetInventory', '?item_type=Gadgets'),
+            ('base:GetVehicleIssues', '?created_from=2024-02-30'),
+            ('base:GetCustomers', '?ordering=password'),
+        ]:
+            with self.subTest(route=route, query=query):
+                self.assertEqual(self.client.get(reverse(route) + query).status_code, 400)
+
+
+class LowStockScanTests(TestCase):
+    """
+    The scanner alerts each item once per drop to its reorder level, in one digest.
+    """
+
+    def setUp(self):
+        User.objects.create(name='Store Keeper', email='store@bench.test', phone_number='0790000000', role='Storekeeper')
+        self.items = Inventory.objects.bulk_create([
+            Inventory(item_name='Brake Pad', item_type='Spare Part', quantity=12, reorder_level=10),
+            Inventory(item_name='Coolant', item_type='Materials', quantity=3, reorder_level=5),
+            Inventory(item_name='Jack', item_type='Tools', quantity=50, reorder_level=5),
+        ])
+
+    def scan(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return scan_low_stock()
+
+    def test_items_are_alerted_once_per_drop(self):
+        brake_pad, coolant, _ = self.items
+        items, _ = self.scan()
+        self.assertEqual([item.item_name for item in items], ['Coolant'])
+        digest = OutboundEmail.objects.get()
+        self.assertEqual(digest.recipients, ['store@bench.test'])
+        self.assertIn('Coolant (Materials): 3 left, reorder level 5', digest.body)
+
+        # Already alerted items stay quiet; a new drop joins the next digest
+        self.assertEqual(deduct_stock([(brake_pad.id, 2)]), [])
+        items, _ = self.scan()
+        self.assertEqual([item.item_name for item in items], ['Brake Pad'])
+
+        # Restocking clears the alert, so the next drop alerts again
+        self.assertEqual(restore_stock([(coolant.id, 10)]), [])
+        self.assertEqual(self.scan(), ([], 1))
+        self.assertEqual(deduct_stock([(coolant.id, 10)]), [])
+        items, _ = self.scan()
+        self.assertEqual([item.item_name for item in items], ['Coolant'])
+        self.assertEqual(OutboundEmail.objects.count(), 3)
+        self.assertEqual(self.scan(), ([], 0))
+
+    def test_low_stock_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(role='Storekeeper'))
+        rows = client.get(reverse('base:GetLowStockInventory')).json()['data']
+        self.assertEqual([(row['item_name'], row['is_low_stock']) for row in rows], [('Coolant', True)])
+
+
+class StockMovementServiceTests(TestCase):
+    """
+    Stock is taken or returned for a whole batch of lines, or not at all.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(name='Stock Clerk', email='stock@bench.test', phone_number='0793000000', role='Storekeeper')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.pads, self.discs = Inventory.objects.bulk_create([
+            Inventory(item_name='Brake Pad', item_type='Spare Part', quantity=5, unit_price=Decimal('20.00')),
+            Inventory(item_name='Brake Disc', item_type='Spare Part', quantity=2, unit_price=Decimal('60.00')),
+        ])
+        vehicle = Vehicle.objects.create(customer=self.user, make='Kia', license_plate='RAC003C', vin='VINSTOCK')
+        self.issue = VehicleIssue.objects.create(vehicle=vehicle, reported_issue='Grinding brakes')
+
+    def quantities(self):
+        return dict(Inventory.objects.values_list('id', 'quantity'))
+
+    def test_shortfalls_reject_the_whole_batch(self):
+        before = self.quantities()
+        # Lines for the same item are added up before they are checked
+        shortfalls = deduct_stock([(self.pads.id, 3), (self.discs.id, 2), (self.discs.id, 1), (999999, 1)])
+        self.assertEqual(shortfalls, [StockShortfall(self.discs.id, 3, 2), StockShortfall(999999, 1, None)])
+        self.assertEqual(self.quantities(), before)
+        self.assertFalse(StockMovement.objects.exists())
+
+        self.assertEqual(deduct_stock([(self.pads.id, 5), (self.discs.id, 2)]), [])
+        self.assertEqual(self.quantities(), {self.pads.id: 0, self.discs.id: 0})
+
+    def test_solution_over_stock_is_refused_without_partial_writes(self):
+        response = self.client.post(reverse('base:AddVehicleSolution'), {
+            'vehicle_issue': self.issue.pk, 'solution_description': 'Pads and discs',
+            'solution_items': [{'inventory_item_id': self.pads.pk, 'quantity_used': 4}, {'inventory_item_id': self.discs.pk, 'quantity_used': 3}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(VehicleSolution.objects.exists())
+        self.assertFalse(SolutionItem.objects.exists())
+        self.assertEqual(self.quantities(), {self.pads.id: 5, self.discs.id: 2})
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_deleting_a_solution_restores_its_stock(self):
+        response = self.client.post(reverse('base:AddVehicleSolution'), {
+            'vehicle_issue': self.issue.pk, 'solution_description': 'Pads and discs',
+            'solution_items': [{'inventory_item_id': self.pads.pk, 'quantity_used': 4}, {'inventory_item_id': self.discs.pk, 'quantity_used': 2}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        solution_id = response.json()['data']['id']
+        self.assertEqual(self.quantities(), {self.pads.id: 1, self.discs.id: 0})
+
+        response = self.client.delete(reverse('base:DeleteVehicleSolution', kwargs={'pk': solution_id}))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.quantities(), {self.pads.id: 5, self.discs.id: 2})
+        returns = StockMovement.objects.filter(reason='Return').order_by('inventory_item_id')
+        self.assertEqual(list(returns.values_list('inventory_item_id', 'delta', 'vehicle_solution_id')), [
+            (self.pads.id, 4, solution_id), (self.discs.id, 2, solution_id),
+        ])
+
+
+class StockLedgerTests(TestCase):
+    """
+    Every stock change lands in the ledger, so balances can be rebuilt from it.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(name='Ledger Clerk', email='ledger@bench.test', phone_number='0791000000', role='Storekeeper')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_stock_changes_are_recorded_and_reconcile(self):
+        response = self.client.post(reverse('base:AddInventory'), {
+            'item_name': 'Spark Plug', 'item_type': 'Spare Part', 'quantity': 20, 'unit_price': '3.00',
+        }, format='json')
+        item = Inventory.objects.get(pk=response.json()['data']['id'])
+        self.assertEqual(deduct_stock([(item.id, 5)], solution=7), [])
+        self.assertEqual(restore_stock([(item.id, 2)]), [])
+        self.client.put(reverse('base:UpdateInventory', kwargs={'pk': item.pk}), {'quantity': 30}, format='json')
+        import_inventory([{'item_name': 'Spark Plug', 'item_type': 'Spare Part', 'quantity': 4, 'unit_price': '3.00'}], mode='add')
+
+        movements = list(item.stock_movements.values_list('reason', 'delta', 'vehicle_solution_id'))
+        self.assertEqual(movements, [
+            ('Initial', 20, None), ('Usage', -5, 7), ('Return', 2, None), ('Adjustment', 13, None), ('Import', 4, None),
+        ])
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 34)
+        self.assertEqual(stock_drift(), [])
+
+        # A direct write bypassing the ledger is caught and repaired
+        Inventory.objects.filter(pk=item.pk).update(quantity=1)
+        with self.assertRaises(CommandError):
+            call_command('reconcile_stock', stdout=StringIO())
+        call_command('reconcile_stock', '--fix', stdout=StringIO())
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 34)
+
+        # A ledger summing below zero is adjusted back to zero, so the drift does not come back
+        StockMovement.objects.create(inventory_item=item, delta=-40, reason='Usage')
+        drift = reconcile_stock()
+        self.assertEqual(drift, [(item.id, 34, -6)])
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 0)
+        self.assertEqual(item.stock_movements.last().delta, 6)
+        self.assertEqual(stock_drift(), [])
+
+    def test_admin_stock_edits_are_recorded(self):
+        admin_user = User.objects.create_superuser('stock-admin@bench.test', 'Stock Admin', '0791000009', role='Admin')
+        self.client.force_login(admin_user)
+        form = {'item_name': 'Brake Fluid', 'item_type': 'Materials', 'quantity': 25, 'unit_price': '4.00', 'reorder_level': 0, 'created_at': '2026-10-17'}
+        self.assertEqual(self.client.post(reverse('admin:base_inventory_add'), form).status_code, 302)
+        item = Inventory.objects.get(item_name='Brake Fluid')
+        response = self.client.post(reverse('admin:base_inventory_change', args=[item.pk]), {**form, 'quantity': 40, 'unit_price': '4.50'})
+        self.assertEqual(response.status_code, 302)
+
+        item.refresh_from_db()
+        self.assertEqual((item.quantity, item.unit_price), (40, Decimal('4.50')))
+        self.assertEqual(list(item.stock_movements.values_list('reason', 'delta')), [('Initial', 25), ('Adjustment', 15)])
+        self.assertEqual(reconcile_stock(), [])
+
+    def test_solution_update_applies_only_the_net_change(self):
+        plug, filter_ = Inventory.objects.bulk_create([
+            Inventory(item_name='Spark Plug', item_type='Spare Part', quantity=20, unit_price=Decimal('3.00')),
+            Inventory(item_name='Oil Filter', item_type='Spare Part', quantity=20, unit_price=Decimal('8.00')),
+        ])
+        vehicle = Vehicle.objects.create(customer=self.user, make='Toyota', license_plate='RAA001A', vin='VINLEDGER')
+        issue = VehicleIssue.objects.create(vehicle=vehicle, reported_issue='Misfire')
+        response = self.client.post(reverse('base:AddVehicleSolution'), {
+            'vehicle_issue': issue.pk, 'solution_description': 'Replaced plugs',
+            'solution_items': [{'inventory_item_id': plug.pk, 'quantity_used': 4}, {'inventory_item_id': filter_.pk, 'quantity_used': 1}],
+        }, format='json')
+        solution = response.json()['data']
+        plug_line, filter_line = solution['solution_items']
+        url = reverse('base:UpdateVehicleSolution', kwargs={'pk': solution['id']})
+
+        # Editing the description leaves items and stock alone
+        before = StockMovement.objects.count()
+        self.client.put(url, {'solution_description': 'Replaced all plugs'}, format='json')
+        self.assertEqual(StockMovement.objects.count(), before)
+
+        response = self.client.put(url, {'solution_items': [
+            {'id': plug_line['id'], 'inventory_item_id': plug.pk, 'quantity_used': 6},
+            {'inventory_item_id': filter_.pk, 'quantity_used': 2},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        items = response.json()['data']['solution_items']
+        self.assertEqual(items[0]['id'], plug_line['id'])
+        self.assertNotEqual(items[1]['id'], filter_line['id'])
+        # The filter line was swapped for a two-unit one, so only the net change is recorded
+        self.assertEqual(list(StockMovement.objects.filter(id__gt=before).values_list('inventory_item_id', 'delta')), [
+            (plug.pk, -2), (filter_.pk, -1),
+        ])
+        self.assertEqual(dict(Inventory.objects.values_list('id', 'quantity')), {plug.pk: 14, filter_.pk: 18})
+
+        response = self.client.put(url, {'solution_items': [{'id': filter_line['id'], 'inventory_item_id': plug.pk, 'quantity_used': 1}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(SolutionItem.objects.filter(vehicle_solution_id=solution['id']).count(), 2)
+        self.assertEqual(dict(Inventory.objects.values_list('id', 'quantity')), {plug.pk: 14, filter_.pk: 18})
+
+        # A mechanic listed twice is refused before any assignment is written
+        ann = User.objects.create(name='Ann Mechanic', email='ann@bench.test', phone_number='0791000001', role='Mechanic')
+        response = self.client.put(url, {'mechanic_assignments': [{'mechanic_id': ann.pk}]}, format='json')
+        kept = response.json()['data']['mechanic_assignments'][0]['id']
+        response = self.client.put(url, {'mechanic_assignments': [
+            {'id': kept, 'mechanic_id': ann.pk}, {'mechanic_id': ann.pk},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(VehicleSolutionMechanic.objects.filter(vehicle_solution_id=solution['id']).values_list('id', flat=True)), [kept])
+
+
+class DashboardRollupTests(TestCase):
+    """
+    Signals keep the daily rollup equal to a rebuild from the source tables.
+    """
+
+    def setUp(self):
+        # The stock value is cached and does not roll back with the test transaction
+        cache.clear()
+
+    def rollup_rows(self):
+        return list(DailyRollup.objects.order_by('date').values())
+
+    def test_incremental_rollup_matches_rebuild(self):
+        customer = User.objects.create(name='Dash Customer', email='dash@bench.test', phone_number='0792000000', role='Customer')
+        vehicle = Vehicle.objects.create(customer=customer, make='Mazda', license_plate='RAB002B', vin='VINDASH')
+        issues = [VehicleIssue.objects.create(vehicle=vehicle, reported_issue=f'Noise {n}') for n in range(3)]
+        issues[0].status = 'In Progress'
+        issues[0].save()
+        # Loaded with the status deferred: the old state is read back before saving
+        issue = VehicleIssue.objects.only('id', 'created_at').get(pk=issues[1].pk)
+        issue.status = 'Completed'
+        issue.save()
+        # A stale copy saved after another write takes off what is stored, not what it loaded
+        stale = VehicleIssue.objects.get(pk=issues[2].pk)
+        issues[2].status = 'Rejected'
+        issues[2].save(update_fields=['status'])
+        stale.status = 'In Progress'
+        stale.save()
+        issues[2].refresh_from_db()
+        issues[2].delete()
+
+        solution = VehicleSolution.objects.create(vehicle_issue=issues[0], solution_description='Fixed')
+        quotation = Quotation.objects.create(vehicle_solution=solution, grand_total=Decimal('150.00'))
+        Inventory.objects.create(item_name='Hose', item_type='Materials', quantity=4, unit_price=Decimal('2.50'))
+
+        summary = dashboard_summary()
+        self.assertEqual(summary['issues_by_status'], {'Pending': 0, 'In Progress': 1, 'Completed': 1, 'Rejected': 0})
+        self.assertEqual(summary['open_issues'], 1)
+        self.assertEqual(summary['awaiting_payment'], {'count': 1, 'value': Decimal('150.00')})
+        self.assertEqual(summary['today']['issues_opened'], 2)
+        self.assertEqual(summary['stock_value'], Decimal('10.00'))
+        # Only the rollup is read again while the stock value is cached
+        with self.assertNumQueries(1):
+            self.assertEqual(dashboard_summary()['stock_value'], Decimal('10.00'))
+
+        Payment.objects.create(quotation=quotation, amount_paid=177.0, tax_rate=18, payment_method='Cash', paid_by=customer)
+        quotation.payment_status = 'Paid'
+        quotation.save()
+        summary = dashboard_summary()
+        self.assertEqual(summary['awaiting_payment'], {'count': 0, 'value': Decimal('0.00')})
+        self.assertEqual(summary['today']['revenue'], Decimal('177.00'))
+
+        incremental = self.rollup_rows()
+        rebuild_rollups()
+        self.assertEqual(
+            [{k: v for k, v in row.items() if k != 'id'} for row in self.rollup_rows()],
+            [{k: v for k, v in row.items() if k != 'id'} for row in incremental],
+        )
+
+        # Cascaded deletes take their rows back off
+        vehicle.delete()
+        summary = dashboard_summary()
+        self.assertEqual(sum(summary['issues_by_status'].values()), 0)
+        self.assertEqual(summary['today']['revenue'], Decimal('0.00'))
+
+    def test_dashboard_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(name='Desk', email='desk@bench.test', phone_number='0792000001', role='Cashier'))
+        response = client.get(reverse('base:Dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['open_issues'], 0)
+
+
+def _at_noon(value):
+    return timezone.make_aware(timezone.datetime.combine(value, timezone.datetime.min.time()).replace(hour=12))
+
+
+class RevenueReportTests(TestCase):
+    """
+    Reports group payments by period; closed months are served from MonthlyRevenue.
+    """
+
+    def setUp(self):
+        self.customer = User.objects.create(name='Report Customer', email='report@bench.test', phone_number='0793000000', role='Customer')
+        vehicle = Vehicle.objects.create(customer=self.customer, make='Subaru', license_plate='RAC003C', vin='VINREPORT')
+        self.today = timezone.localdate()
+        self.last_month = (self.today.replace(day=1) - timedelta(days=1)).replace(day=1)
+        # Two payments last month, one today
+        for n, (paid_on, method, amount, rate) in enumerate([
+            (self.last_month, 'Cash', '118.00', '18.00'),
+            (self.last_month, 'Card', '50.00', None),
+            (self.today, 'Cash', '236.00', '18.00'),
+        ]):
+            issue = VehicleIssue.objects.create(vehicle=vehicle, reported_issue=f'Report {n}')
+            solution = VehicleSolution.objects.create(vehicle_issue=issue, solution_description='Done')
+            quotation = Quotation.objects.create(vehicle_solution=solution, grand_total=Decimal(amount))
+            payment = Payment.objects.create(
+                quotation=quotation, amount_paid=Decimal(amount), tax_rate=rate and Decimal(rate),
+                payment_method=method, paid_by=self.customer
+            )
+            Payment.objects.filter(pk=payment.pk).update(payment_date=_at_noon(paid_on))
+
+    def test_monthly_report_closes_past_months(self):
+        report = revenue_report('month', self.last_month, self.today)
+        self.assertEqual(report['totals']['revenue'], Decimal('404.00'))
+        self.assertEqual(report['totals']['tax'], Decimal('54.00'))
+        self.assertEqual(report['totals']['net'], Decimal('350.00'))
+        self.assertEqual(report['totals']['methods']['Card'], {'payments': 1, 'revenue': Decimal('50.00')})
+        self.assertEqual([row['period'] for row in report['periods']], [self.last_month, self.today.replace(day=1)])
+        self.assertEqual(MonthlyRevenue.objects.filter(month=self.last_month).count(), len(Payment.PAYMENT_METHODS))
+        # The month's lock row, shared with payment writes that reopen it
+        self.assertTrue(RevenueMonth.objects.filter(month=self.last_month).exists())
+
+        # Stored now: one read for the closed month, one scan of the current one
+        with self.assertNumQueries(2):
+            self.assertEqual(revenue_report('month', self.last_month, self.today), report)
+
+        # Changing a payment in a closed month drops its stored totals
+        payment = Payment.objects.get(payment_method='Card')
+        payment.payment_method = 'Mobile Money'
+        payment.save()
+        self.assertFalse(MonthlyRevenue.objects.filter(month=self.last_month).exists())
+        methods = revenue_report('month', self.last_month, self.today)['totals']['methods']
+        self.assertEqual(sorted(methods), ['Cash', 'Mobile Money'])
+
+    def test_daily_report_and_parameters(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        url = reverse('base:RevenueReport')
+        response = client.get(url, {'period': 'day', 'date_from': self.today.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        periods = response.json()['data']['periods']
+        self.assertEqual([(row['period'], row['revenue'], row['tax']) for row in periods], [(self.today.isoformat(), 236.0, 36.0)])
+        response = client.get(url, {'period': 'year', 'date_from': '2024-02-30'})
+        self.assertEqual(set(response.json()), {'period'})
+        response = client.get(url, {'date_from': '2024-02-30'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date_from', response.json())
+
+
+class MechanicPayoutReportTests(TestCase):
+    """
+    Per-mechanic workload and pay, computed in one query and streamed as CSV for payroll.
+    """
+
+    def setUp(self):
+        self.ann = User.objects.create(name='Ann Mechanic', email='ann@bench.test', phone_number='0794000000', role='Mechanic')
+        self.bob = User.objects.create(name='Bob Mechanic', email='bob@bench.test', phone_number='0794000001', role='Mechanic')
+        customer = User.objects.create(name='Payout Customer', email='payout@bench.test', phone_number='0794000002', role='Customer')
+        vehicle = Vehicle.objects.create(customer=customer, make='Kia', license_plate='RAD004D', vin='VINPAYOUT')
+        quotations = []
+        for n in range(3):
+            issue = VehicleIssue.objects.create(vehicle=vehicle, reported_issue=f'Job {n}')
+            solution = VehicleSolution.objects.create(vehicle_issue=issue, solution_description='Done')
+            VehicleSolutionMechanic.objects.bulk_create([
+                VehicleSolutionMechanic(vehicle_solution=solution, mechanic=self.ann),
+                VehicleSolutionMechanic(vehicle_solution=solution, mechanic=self.bob),
+            ][:1 if n else 2])
+            quotation = Quotation.objects.create(vehicle_solution=solution, grand_total=Decimal('100.00'))
+            QuotedMechanic.objects.create(quotation=quotation, mechanic=self.ann, labor_share=Decimal('30.00'))
+            if not n:
+                QuotedMechanic.objects.create(quotation=quotation, mechanic=self.bob, labor_share=Decimal('20.00'))
+            quotations.append(quotation)
+        # Ann and Bob's shared job and one of Ann's are paid
+        for quotation in quotations[:2]:
+            Payment.objects.create(quotation=quotation, amount_paid=Decimal('100.00'), payment_method='Cash', paid_by=customer)
+            quotation.payment_status = 'Paid'
+            quotation.save()
+        self.today = timezone.localdate()
+
+    def test_payouts_per_mechanic(self):
+        with self.assertNumQueries(1):
+            rows = list(mechanic_payouts(self.today, self.today))
+        self.assertEqual(rows, [
+            {'id': self.ann.pk, 'name': 'Ann Mechanic', 'jobs_assigned': 3, 'jobs_completed': 2, 'open_assignments': 1,
+             'labor_quoted': Decimal('90.00'), 'labor_earned': Decimal('60.00')},
+            {'id': self.bob.pk, 'name': 'Bob Mechanic', 'jobs_assigned': 1, 'jobs_completed': 1, 'open_assignments': 0,
+             'labor_quoted': Decimal('20.00'), 'labor_earned': Decimal('20.00')},
+        ])
+        # Nothing was paid yesterday, but the open assignment is still open
+        rows = list(mechanic_payouts(self.today - timedelta(days=1), self.today - timedelta(days=1)))
+        self.assertEqual([(row['labor_earned'], row['open_assignments']) for row in rows], [(Decimal('0.00'), 1), (Decimal('0.00'), 0)])
+
+    def test_csv_output(self):
+        client = APIClient()
+        client.force_authenticate(self.ann)
+        response = client.get(reverse('base:MechanicPayoutReport'), {'output': 'csv'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'mechanic_id,mechanic_name,jobs_assigned,jobs_completed,open_assignments,labor_quoted,labor_earned')
+        self.assertEqual(lines[1], f'{self.ann.pk},Ann Mechanic,3,2,1,90.00,60.00')
+        response = client.get(reverse('base:MechanicPayoutReport'))
+        self.assertEqual(response.json()['data']['totals']['jobs_completed'], 3)
+
+
+class PaymentCaptureTests(TestCase):
+    """
+    Payments are computed in Decimal under a lock on the quotation.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create(name='Paying Customer', email='pay@bench.test', phone_number='0795000000', role='Customer')
+        vehicle = Vehicle.objects.create(customer=self.customer, make='Ford', license_plate='RAE005E', vin='VINPAY')
+        issue = VehicleIssue.objects.create(vehicle=vehicle, reported_issue='Brakes')
+        solution = VehicleSolution.objects.create(vehicle_issue=issue, solution_description='Pads')
+        self.quotation = Quotation.objects.create(vehicle_solution=solution, grand_total=Decimal('99.99'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+        self.url = reverse('base:CreatePayment', kwargs={'quotation_id': self.quotation.pk})
+
+    def test_amount_is_exact_and_second_submit_is_refused(self):
+        payload = {'tax_rate': '16', 'payment_method': 'Card', 'paid_by': self.customer.pk}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        # 99.99 * 16% = 15.9984, rounded half up to 16.00
+        self.assertEqual(response.json()['data']['amount_paid'], '115.99')
+        self.quotation.refresh_from_db()
+        self.assertEqual(self.quotation.payment_status, 'Paid')
+
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['detail'], "This quotation has already been paid.")
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_quotation_totals_are_decimal(self):
+        mechanic = User.objects.create(name='Pay Mechanic', email='paymech@bench.test', phone_number='0795000001', role='Mechanic')
+        part = Inventory.objects.create(item_name='Pad Set', item_type='Spare Part', quantity=9, unit_price=Decimal('0.10'))
+        QuotedItem.objects.bulk_create([
+            QuotedItem(quotation=self.quotation, inventory_item=part, quantity_used=1, unit_price=price, item_total=price)
+            for price in (Decimal('0.10'), Decimal('0.20'), Decimal('33.33'))
+        ])
+        QuotedMechanic.objects.create(quotation=self.quotation, mechanic=mechanic, labor_share=Decimal('66.36'))
+        response = self.client.get(reverse('base:GetQuotationBySolution', kwargs={'solution_id': self.quotation.vehicle_solution_id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totals'], {
+            'total_parts_cost': Decimal('33.63'), 'total_labor_cost': Decimal('66.36'), 'grand_total': Decimal('99.99'),
+        })
+
+    def test_tax_rate_defaults_to_settings(self):
+        payload = {'payment_method': 'Cash', 'paid_by': self.customer.pk}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tax_rate is required', response.json()['detail'])
+        self.assertEqual(self.client.post(self.url, {**payload, 'tax_rate': 'NaN'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {**payload, 'payment_method': 'Cheque', 'tax_rate': '5'}, format='json').status_code, 400)
+
+        # The cached settings are invalidated on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            Settings.objects.create(name='Garage', tax_rate=Decimal('18.00'))
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['data']['tax_rate'], '18.00')
+        self.assertEqual(response.json()['data']['amount_paid'], '117.99')
+
+class IdempotencyKeyTests(TestCase):
+    """
+    Retried POSTs with the same Idempotency-Key replay the first response instead of running again.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create(name='Retrying Customer', email='retry@bench.test', phone_number='0796000000', role='Customer')
+        vehicle = Vehicle.objects.create(customer=self.customer, make='Mazda', license_plate='RAF006F', vin='VINRETRY')
+        issue = VehicleIssue.objects.create(vehicle=vehicle, reported_issue='Clutch')
+        solution = VehicleSolution.objects.create(vehicle_issue=issue, solution_description='Clutch plate')
+        self.quotation = Quotation.objects.create(vehicle_solution=solution, grand_total=Decimal('50.00'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+        self.url = reverse('base:CreatePayment', kwargs={'quotation_id': self.quotation.pk})
+        self.payload = {'tax_rate': '16', 'payment_method': 'Card', 'paid_by': self.customer.pk}
+
+    def pay(self, key, payload=None, client=None):
+        return (client or self.client).post(self.url, payload or self.payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_first_response(self):
+        first = self.pay('pay-1')
+        self.assertEqual(first.status_code, 201)
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.pay('pay-1')
+        # Answered from the stored response alone; without the key this would be a 400 "already paid"
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertFalse(any('base_payment' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(Payment.objects.count(), 1)
+
+        # A new key runs the handler again
+        self.assertEqual(self.pay('pay-2').status_code, 400)
+
+    def test_key_reused_for_other_request_or_user(self):
+        self.assertEqual(self.pay('pay-1').status_code, 201)
+        response = self.pay('pay-1', {**self.payload, 'payment_method': 'Cash'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.pay('', client=self.client).status_code, 400)
+        self.assertEqual(self.pay('x' * 256).status_code, 400)
+
+        # Keys are scoped per user
+        other = User.objects.create(name='Other Clerk', email='clerk@bench.test', phone_number='0796000001', role='Admin')
+        client = APIClient()
+        client.force_authenticate(other)
+        response = self.pay('pay-1', client=client)
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+    def test_errors_are_stored_but_not_raised_exceptions(self):
+        Quotation.objects.filter(pk=self.quotation.pk).update(payment_status='Paid')
+        self.assertEqual(self.pay('pay-1').status_code, 400)
+        Quotation.objects.filter(pk=self.quotation.pk).update(payment_status='Pending')
+        # The stored 400 is replayed for the same key
+        self.assertEqual(self.pay('pay-1').status_code, 400)
+        self.assertEqual(IdempotencyKey.objects.get(key='pay-1').status_code, 400)
+
+        with mock.patch('base.views.capture_payment', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.pay('pay-2')
+        self.assertFalse(IdempotencyKey.objects.filter(key='pay-2').exists())
+        self.assertEqual(self.pay('pay-2').status_code, 201)
+
+    def test_deadlocked_claim_asks_client_to_retry(self):
+        with mock.patch('base.idempotency._claim', side_effect=OperationalError(1213, 'Deadlock found')):
+            response = self.pay('pay-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(self.pay('pay-1').status_code, 201)
+
+    def test_expired_keys_run_again_and_are_purged(self):
+        self.assertEqual(self.pay('pay-1').status_code, 201)
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        expired = IdempotencyKey.objects.get(key='pay-1')
+        response = self.pay('pay-1')
+        self.assertEqual(response.status_code, 400)
+        # The expired row is taken over in place rather than deleted and inserted again
+        self.assertEqual(IdempotencyKey.objects.get(key='pay-1').pk, expired.pk)
+        self.assertEqual(IdempotencyKey.objects.get(key='pay-1').status_code, 400)
+
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(purge_expired_keys(), 1)
+        self.pay('pay-2')
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('Purged 0 expired', out.getvalue())
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
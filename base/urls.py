@@ -6,6 +6,8 @@ from django.conf.urls.static import static
 app_name = 'base'
 
 urlpatterns = [
+    path('dashboard/', DashboardView.as_view(), name='Dashboard'),
+
     path('users/', GetUsers.as_view(), name='GetUsers'),
     path('user/add/', AddUser.as_view(), name='AddUser'),
     path('user/<int:pk>/', UserDetails.as_view(), name='UserDetails'),
@@ -19,19 +21,24 @@ urlpatterns = [
     path('customer/<int:pk>/delete/', DeleteCustomer.as_view(), name='DeleteCustomer'),
 
     path('vehicles/', GetVehicles.as_view(), name='GetVehicles'),
+    path('vehicles/export/', ExportVehicles.as_view(), name='ExportVehicles'),
     path('vehicle/add/', AddVehicle.as_view(), name='AddVehicle'),
     path('vehicle/<int:pk>/', VehicleDetails.as_view(), name='VehicleDetails'),
     path('vehicle/<int:pk>/update/', UpdateVehicle.as_view(), name='UpdateVehicle'),
     path('vehicle/<int:pk>/delete/', DeleteVehicle.as_view(), name='DeleteVehicle'),
 
     path('vehicle-issues/', GetVehicleIssues.as_view(), name='GetVehicleIssues'),
+    path('vehicle-issues/export/', ExportVehicleIssues.as_view(), name='ExportVehicleIssues'),
     path('vehicle-issue/add/', AddVehicleIssue.as_view(), name='AddVehicleIssue'),
     path('vehicle-issue/<int:pk>/', VehicleIssueDetails.as_view(), name='VehicleIssueDetails'),
     path('vehicle-issue/<int:pk>/update/', UpdateVehicleIssue.as_view(), name='UpdateVehicleIssue'),
     path('vehicle-issue/<int:pk>/delete/', DeleteVehicleIssue.as_view(), name='DeleteVehicleIssue'),
 
     path('inventories/', GetInventory.as_view(), name='GetInventory'),
+    path('inventories/export/', ExportInventory.as_view(), name='ExportInventory'),
+    path('inventories/low-stock/', GetLowStockInventory.as_view(), name='GetLowStockInventory'),
     path('inventory/add/', AddInventory.as_view(), name='AddInventory'),
+    path('inventory/import/', ImportInventory.as_view(), name='ImportInventory'),
     path('inventory/<int:pk>/', InventoryDetails.as_view(), name='InventoryDetails'),
     path('inventory/<int:pk>/update/', UpdateInventory.as_view(), name='UpdateInventory'),
     path('inventory/<int:pk>/delete/', DeleteInventory.as_view(), name='DeleteInventory'),
@@ -46,9 +53,15 @@ urlpatterns = [
 
     path('quotation/<int:solution_id>/', GetQuotationBySolutionView.as_view(), name='GetQuotationBySolution'),
     path('quotation/create/<int:solution_id>/', CreateQuotationFromSolutionView.as_view(), name='CreateQuotationFromSolution'),
+    path('quotations/create/', CreateQuotationsBatchView.as_view(), name='CreateQuotationsBatch'),
+    path('quotations/export/', ExportQuotations.as_view(), name='ExportQuotations'),
 
     path('quotation/<int:quotation_id>/payment/', GetPaymentByQuotationView.as_view(), name='GetPaymentByQuotation'),
     path('quotation/<int:quotation_id>/pay/', CreatePaymentView.as_view(), name='CreatePayment'),
+    path('payments/export/', ExportPayments.as_view(), name='ExportPayments'),
+
+    path('reports/revenue/', RevenueReport.as_view(), name='RevenueReport'),
+    path('reports/mechanics/', MechanicPayoutReport.as_view(), name='MechanicPayoutReport'),
 ] 
 
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
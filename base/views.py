@@ -1,9 +1,22 @@
 import random
 import string
+from decimal import Decimal, ROUND_HALF_UP
 from base.models import *
+from base.pagination import *
+from base.cache import get_app_settings
+from base.dashboard import dashboard_summary
+from base.exports import EXPORT_FORMATS, stream_export, streaming_download
+from base.filters import ListQuery, choice_of, day, day_end, day_start, positive_int
+from base.idempotency import idempotent
+from base.imports import InventoryImportError, import_inventory, read_rows
+from base.mailer import queue_email
+from base.prefetch import plan_queryset
+from base.quotations import CENT, QuotationError, capture_payment, create_quotation, create_quotations
+from base.reports import PAYOUT_COLUMNS, payout_rows, report_period, report_range, revenue_report
 from base.serializers import *
+from base.stock import restore_stock
 from django.conf import settings
-from django.core.mail import send_mail
+from django.db import transaction
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -12,18 +25,27 @@ from rest_framework.exceptions import NotFound, ValidationError
 
 class GetUsers(APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
+    expand_levels = ['vehicles', 'vehicles.issues']
+    serializer_classes = [UserListSerializer, UserVehiclesSerializer, UserSerializer]
 
     def get(self, request, *args, **kwargs):
         """
-        Retrieves all users, excluding superadmin users and users with the role 'Customer'.
+        Retrieves users page by page, excluding superadmin users and users with the role 'Customer'.
+        Rows are flat by default; pass `?expand=vehicles` / `?expand=vehicles.issues` (or `?depth=1|2`)
+        to nest related records, and follow the `next` cursor for further pages.
         """
+        serializer_class = self.serializer_classes[resolve_expand_depth(request, self.expand_levels)]
         # Exclude superadmin users (assuming is_staff=True) and users with role 'Customer'
-        users = User.objects.filter(is_staff=False).exclude(role='Customer').order_by('-id')
-        serializer = UserSerializer(users, many=True, context={'request': request})
-        return Response({
-            "detail": "Users retrieved successfully.",
-            "data": serializer.data
-        }, status=status.HTTP_200_OK)
+        users = plan_queryset(User.objects.filter(is_staff=False).exclude(role='Customer'), serializer_class)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(users, request, view=self)
+        serializer = serializer_class(page, many=True, context={'request': request})
+        return Response(
+            paginated_response_data(paginator, serializer.data, "Users retrieved successfully."),
+            status=status.HTTP_200_OK
+        )
 
 class AddUser(APIView):
     permission_classes = [permissions.AllowAny]
@@ -38,7 +60,7 @@ class AddUser(APIView):
 
     def send_welcome_email(self, user, password):
         """
-        Sends a welcome email to the user including their password in plaintext.
+        Queues a welcome email to the user including their password in plaintext.
         """
         subject = "Welcome to Our Service!"
         message = f"""
@@ -63,8 +85,8 @@ class AddUser(APIView):
         from_email = settings.DEFAULT_FROM_EMAIL  # Make sure this is set in your settings.py
         recipient_list = [user.email]
         
-        # Send the email using the same logic as PasswordResetRequestView
-        send_mail(subject, message, from_email, recipient_list)
+        # Delivered by the send_queued_emails worker once the user is committed
+        queue_email(subject, message, recipient_list, from_email)
 
     def post(self, request, *args, **kwargs):
         """
@@ -114,7 +136,7 @@ class UserDetails(APIView):
         Retrieves detailed information about a specific user based on the provided pk.
         """
         try:
-            user = User.objects.get(pk=pk)
+            user = plan_queryset(User.objects.all(), UserSerializer).get(pk=pk)
             serializer = UserSerializer(user, context={'request': request})
             return Response({
                 "detail": "User details retrieved successfully.",
@@ -166,17 +188,38 @@ class DeleteUser(APIView):
 
 class GetCustomers(APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
+    expand_levels = ['vehicles', 'vehicles.issues']
+    serializer_classes = [CustomerListSerializer, CustomerVehiclesSerializer, CustomerSerializer]
+    list_query = ListQuery(
+        filters={
+            'created_from': ('created_at__gte', day_start),
+            'created_to': ('created_at__lt', day_end),
+        },
+        search_fields=('name__icontains', 'email__istartswith', 'phone_number__startswith'),
+        ordering_fields=('name', 'created_at'),
+    )
 
     def get(self, request, *args, **kwargs):
         """
-        Retrieves all customers (users with role 'Customer').
+        Retrieves customers (users with role 'Customer') page by page.
+        Rows are flat by default; pass `?expand=vehicles` / `?expand=vehicles.issues` (or `?depth=1|2`)
+        to nest related records, and follow the `next` cursor for further pages.
+        Filter with `created_from`/`created_to` (YYYY-MM-DD), `search` by name, email
+        or phone number, and sort with `ordering` (name, created_at, id; '-' for descending).
         """
-        customers = User.objects.filter(role='Customer').order_by('-id')
-        serializer = CustomerSerializer(customers, many=True, context={'request': request})
-        return Response({
-            "detail": "Customers retrieved successfully.",
-            "data": serializer.data
-        }, status=status.HTTP_200_OK)
+        serializer_class = self.serializer_classes[resolve_expand_depth(request, self.expand_levels)]
+        customers = self.list_query.filter(User.objects.filter(role='Customer'), request)
+        customers = plan_queryset(customers, serializer_class)
+
+        paginator = self.pagination_class()
+        paginator.ordering = self.list_query.get_ordering(request)
+        page = paginator.paginate_queryset(customers, request, view=self)
+        serializer = serializer_class(page, many=True, context={'request': request})
+        return Response(
+            paginated_response_data(paginator, serializer.data, "Customers retrieved successfully."),
+            status=status.HTTP_200_OK
+        )
 
 class AddCustomer(APIView):
     permission_classes = [IsAuthenticated]
@@ -191,7 +234,7 @@ class AddCustomer(APIView):
 
     def send_welcome_email(self, user, password):
         """
-        Sends a welcome email to the customer including their password in plaintext.
+        Queues a welcome email to the customer including their password in plaintext.
         """
         subject = "Welcome to Our Service!"
         message = f"""
@@ -214,7 +257,7 @@ class AddCustomer(APIView):
         """
         from_email = settings.DEFAULT_FROM_EMAIL
         recipient_list = [user.email]
-        send_mail(subject, message, from_email, recipient_list)
+        queue_email(subject, message, recipient_list, from_email)
 
     def post(self, request, *args, **kwargs):
         """
@@ -251,7 +294,7 @@ class CustomerDetails(APIView):
         Retrieves detailed information about a specific customer.
         """
         try:
-            customer = User.objects.get(pk=pk, role='Customer')
+            customer = plan_queryset(User.objects.all(), CustomerSerializer).get(pk=pk, role='Customer')
             serializer = CustomerSerializer(customer, context={'request': request})
             return Response({
                 "detail": "Customer details retrieved successfully.",
@@ -305,11 +348,27 @@ class DeleteCustomer(APIView):
 class GetVehicles(APIView):
     """
     Retrieves all vehicles.
+
+    Filters: `customer` (id), `make`, `year`, `created_from`/`created_to` (YYYY-MM-DD).
+    `search` matches the start of the license plate or VIN; `ordering` sorts by
+    created_at (default, newest first), license_plate, year or id.
     """
     permission_classes = [permissions.IsAuthenticated]
+    list_query = ListQuery(
+        filters={
+            'customer': ('customer_id', positive_int),
+            'make': ('make__iexact', str.strip),
+            'year': ('year', positive_int),
+            'created_from': ('created_at__gte', day_start),
+            'created_to': ('created_at__lt', day_end),
+        },
+        search_fields=('license_plate__istartswith', 'vin__istartswith'),
+        ordering_fields=('created_at', 'license_plate', 'year'),
+        default_ordering='-created_at',
+    )
 
     def get(self, request, *args, **kwargs):
-        vehicles = Vehicle.objects.all().order_by('-created_at')
+        vehicles = plan_queryset(self.list_query.apply(Vehicle.objects.all(), request), VehicleSerializer)
         serializer = VehicleSerializer(vehicles, many=True, context={'request': request})
         return Response({
             "detail": "Vehicles retrieved successfully.",
@@ -345,7 +404,7 @@ class VehicleDetails(APIView):
 
     def get(self, request, pk, *args, **kwargs):
         try:
-            vehicle = Vehicle.objects.get(pk=pk)
+            vehicle = plan_queryset(Vehicle.objects.all(), VehicleSerializer).get(pk=pk)
         except Vehicle.DoesNotExist:
             raise NotFound(detail="Vehicle not found.")
         serializer = VehicleSerializer(vehicle, context={'request': request})
@@ -397,11 +456,28 @@ class DeleteVehicle(APIView):
 class GetVehicleIssues(APIView):
     """
     Retrieves all vehicle issues.
+
+    Filters: `status`, `vehicle` (id), `customer` (id), `created_from`/`created_to`
+    (YYYY-MM-DD). `search` matches the start of the vehicle's license plate or
+    VIN; `ordering` sorts by created_at (default, newest first), updated_at,
+    status, estimated_cost or id.
     """
     permission_classes = [permissions.IsAuthenticated]
+    list_query = ListQuery(
+        filters={
+            'status': ('status', choice_of(VehicleIssue.STATUS_CHOICES)),
+            'vehicle': ('vehicle_id', positive_int),
+            'customer': ('vehicle__customer_id', positive_int),
+            'created_from': ('created_at__gte', day_start),
+            'created_to': ('created_at__lt', day_end),
+        },
+        search_fields=('vehicle__license_plate__istartswith', 'vehicle__vin__istartswith'),
+        ordering_fields=('created_at', 'updated_at', 'status', 'estimated_cost'),
+        default_ordering='-created_at',
+    )
 
     def get(self, request, *args, **kwargs):
-        issues = VehicleIssue.objects.all().order_by('-created_at')
+        issues = plan_queryset(self.list_query.apply(VehicleIssue.objects.all(), request), VehicleIssueSerializer)
         serializer = VehicleIssueSerializer(issues, many=True, context={'request': request})
         return Response({
             "detail": "Vehicle issues retrieved successfully.",
@@ -415,6 +491,7 @@ class AddVehicleIssue(APIView):
     """
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         data = request.data.copy()
         serializer = VehicleIssueSerializer(data=data, context={'request': request})
@@ -437,7 +514,7 @@ class VehicleIssueDetails(APIView):
 
     def get(self, request, pk, *args, **kwargs):
         try:
-            issue = VehicleIssue.objects.get(pk=pk)
+            issue = plan_queryset(VehicleIssue.objects.all(), VehicleIssueSerializer).get(pk=pk)
         except VehicleIssue.DoesNotExist:
             raise NotFound(detail="Vehicle issue not found.")
         serializer = VehicleIssueSerializer(issue, context={'request': request})
@@ -487,22 +564,56 @@ class DeleteVehicleIssue(APIView):
         }, status=status.HTTP_204_NO_CONTENT)
 
 class GetInventory(APIView):
+    """
+    Retrieves all inventory items with the total stock valuation.
+
+    Filters: `item_type`, `created_from`/`created_to` (YYYY-MM-DD). `search`
+    matches part of the item name; `ordering` sorts by id (default, newest
+    first), item_name, quantity, unit_price or created_at.
+    """
     permission_classes = [IsAuthenticated]
+    list_query = ListQuery(
+        filters={
+            'item_type': ('item_type', choice_of(Inventory.ITEM_TYPES)),
+            'created_from': ('created_at__gte', day),
+            'created_to': ('created_at__lte', day),
+        },
+        search_fields=('item_name__icontains',),
+        ordering_fields=('item_name', 'quantity', 'unit_price', 'created_at'),
+    )
 
     def get(self, request, *args, **kwargs):
         try:
-            inventories = Inventory.objects.all().order_by('-id')
-            serializer = InventorySerializer(inventories, many=True)
+            inventories = plan_queryset(self.list_query.apply(Inventory.objects.all(), request), InventoryListSerializer)
+            serializer = InventoryListSerializer(inventories, many=True)
             return Response({
                 "detail": "Inventories retrieved successfully.",
-                "data": serializer.data
+                "data": serializer.data,
+                "valuation": Inventory.objects.valuation()
             }, status=status.HTTP_200_OK)
+        except ValidationError:
+            raise
         except Exception as e:
             return Response({
                 "detail": "An error occurred while retrieving inventories.",
                 "error": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class GetLowStockInventory(APIView):
+    """
+    Retrieves the items at or below their reorder level, lowest stock first.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        # Served by the index on the stored is_low_stock column
+        items = plan_queryset(Inventory.objects.filter(is_low_stock=True), InventoryListSerializer).order_by('quantity', 'id')
+        serializer = InventoryListSerializer(items, many=True)
+        return Response({
+            "detail": "Low stock items retrieved successfully.",
+            "data": serializer.data
+        }, status=status.HTTP_200_OK)
+
 class AddInventory(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -531,21 +642,31 @@ class AddInventory(APIView):
 
 class InventoryDetails(APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
 
     def get(self, request, pk, *args, **kwargs):
         """
         Retrieves detailed information about a specific inventory item, including user information.
+        Its usage history (the solution items that consumed it) is paginated under
+        `usage`; follow the `next` cursor for older uses.
         """
         try:
             # Retrieve the inventory item by its primary key (pk)
-            inventory = Inventory.objects.get(pk=pk)
+            inventory = plan_queryset(Inventory.objects.all(), InventorySerializer).get(pk=pk)
             
             # Serialize the inventory item data, including the nested created_by user information
             serializer = InventorySerializer(inventory)
+
+            usage = plan_queryset(SolutionItem.objects.filter(inventory_item=inventory), InventoryUsageSerializer)
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(usage, request, view=self)
             
             return Response({
                 "detail": "Inventory details retrieved successfully.",
-                "data": serializer.data
+                "data": serializer.data,
+                "usage": InventoryUsageSerializer(page, many=True).data,
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
             }, status=status.HTTP_200_OK)
         
         except Inventory.DoesNotExist:
@@ -621,11 +742,68 @@ class DeleteInventory(APIView):
                 "error": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class ImportInventory(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Creates or updates many inventory items at once, matched by item name and type.
+
+        Send a CSV or JSON `file` upload, or a JSON body `{"items": [...]}`. Pass
+        `mode=add` to add quantities to the current stock instead of replacing
+        them, and `dry_run=true` to only validate. Either every row is imported
+        or none is; the response is a summary with the first row errors.
+        """
+        mode = request.data.get('mode') or request.query_params.get('mode', 'set')
+        dry_run = str(request.data.get('dry_run') or request.query_params.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                output = 'json' if upload.name.lower().endswith('.json') else 'csv'
+                rows = read_rows(upload.read(), output)
+            else:
+                rows = request.data.get('items')
+                if not isinstance(rows, list):
+                    raise InventoryImportError("Upload a CSV/JSON file or send an 'items' list.")
+            report = import_inventory(rows, user=request.user, mode=mode, dry_run=dry_run)
+        except InventoryImportError as e:
+            return Response({"detail": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        if report['failed']:
+            return Response({
+                "detail": f"Import rejected: {report['failed']} invalid row(s); nothing was saved.",
+                "data": report
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "detail": "Import validated; nothing was saved." if dry_run else "Inventory imported successfully.",
+            "data": report
+        }, status=status.HTTP_200_OK)
+
 class GetVehicleSolutions(APIView):
+    """
+    Retrieves all vehicle solutions.
+
+    Filters: `status` (of the issue), `payment_status` (of the quotation),
+    `customer` (id), `date_from`/`date_to` (solution date, YYYY-MM-DD). `search`
+    matches the start of the license plate; `ordering` sorts by solution_date
+    (default, newest first), total_cost or id.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    list_query = ListQuery(
+        filters={
+            'status': ('vehicle_issue__status', choice_of(VehicleIssue.STATUS_CHOICES)),
+            'payment_status': ('quotation__payment_status', choice_of(Quotation.PAYMENT_STATUS_CHOICES)),
+            'customer': ('vehicle_issue__vehicle__customer_id', positive_int),
+            'date_from': ('solution_date__gte', day_start),
+            'date_to': ('solution_date__lt', day_end),
+        },
+        search_fields=('vehicle_issue__vehicle__license_plate__istartswith',),
+        ordering_fields=('solution_date', 'total_cost'),
+        default_ordering='-solution_date',
+    )
 
     def get(self, request, *args, **kwargs):
-        solutions = VehicleSolution.objects.all().order_by('-solution_date')
+        solutions = plan_queryset(self.list_query.apply(VehicleSolution.objects.all(), request), VehicleSolutionSerializer)
         serializer = VehicleSolutionSerializer(solutions, many=True, context={'request': request})
         return Response({
             "detail": "Vehicle solutions retrieved successfully.",
@@ -635,6 +813,7 @@ class GetVehicleSolutions(APIView):
 class AddVehicleSolution(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         serializer = VehicleSolutionSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
@@ -653,7 +832,7 @@ class VehicleSolutionDetails(APIView):
 
     def get(self, request, pk, *args, **kwargs):
         try:
-            solution = VehicleSolution.objects.get(pk=pk)
+            solution = plan_queryset(VehicleSolution.objects.all(), VehicleSolutionSerializer).get(pk=pk)
         except VehicleSolution.DoesNotExist:
             raise NotFound(detail="Vehicle solution not found.")
         serializer = VehicleSolutionSerializer(solution, context={'request': request})
@@ -691,17 +870,10 @@ class DeleteVehicleSolution(APIView):
         except VehicleSolution.DoesNotExist:
             raise NotFound(detail="Vehicle solution not found.")
 
-        # Restore inventory for each solution item before deletion
-        for item in solution.solution_items.all():
-            inventory_item = item.inventory_item
-            try:
-                available_quantity = int(inventory_item.quantity)
-            except (TypeError, ValueError):
-                available_quantity = 0
-            inventory_item.quantity = str(available_quantity + item.quantity_used)
-            inventory_item.save()
-
-        solution.delete()
+        with transaction.atomic():
+            # Restore inventory for every solution item in one locked batch before deletion
+            restore_stock(solution.solution_items.values_list('inventory_item_id', 'quantity_used'), solution=solution)
+            solution.delete()
         return Response({
             "detail": "Vehicle solution deleted successfully."
         }, status=status.HTTP_204_NO_CONTENT)
@@ -711,9 +883,9 @@ class SettingsView(APIView):
 
     def get(self, request, *args, **kwargs):
         """
-        Retrieve the singleton settings instance.
+        Retrieve the singleton settings instance from the settings cache.
         """
-        settings_instance = Settings.objects.first()
+        settings_instance = get_app_settings()
         if not settings_instance:
             return Response({
                 "detail": "Settings not configured yet."
@@ -778,22 +950,20 @@ class GetQuotationBySolutionView(APIView):
 
     def get(self, request, solution_id, *args, **kwargs):
         try:
-            solution = VehicleSolution.objects.get(id=solution_id)
-        except VehicleSolution.DoesNotExist:
-            raise NotFound("Vehicle solution not found.")
-
-        if not hasattr(solution, 'quotation'):
+            quotation = plan_queryset(Quotation.objects.all(), QuotationSerializer).get(vehicle_solution_id=solution_id)
+        except Quotation.DoesNotExist:
+            if not VehicleSolution.objects.filter(id=solution_id).exists():
+                raise NotFound("Vehicle solution not found.")
             return Response({"detail": "Quotation not found for this solution."}, status=status.HTTP_404_NOT_FOUND)
 
-        quotation = solution.quotation
         serializer = QuotationSerializer(quotation, context={'request': request})
 
-        # Compute totals
+        # Compute totals in Decimal, like capture_payment(), so they match what is charged
         total_parts_cost = sum(
-            float(item.item_total) for item in quotation.quoted_items.all()
+            (item.item_total for item in quotation.quoted_items.all()), Decimal('0.00')
         )
         total_labor_cost = sum(
-            float(mech.labor_share) for mech in quotation.quoted_mechanics.all()
+            (mech.labor_share for mech in quotation.quoted_mechanics.all()), Decimal('0.00')
         )
         grand_total = total_parts_cost + total_labor_cost
 
@@ -801,9 +971,9 @@ class GetQuotationBySolutionView(APIView):
             "detail": "Quotation retrieved successfully.",
             "data": serializer.data,
             "totals": {
-                "total_parts_cost": round(total_parts_cost, 2),
-                "total_labor_cost": round(total_labor_cost, 2),
-                "grand_total": round(grand_total, 2)
+                "total_parts_cost": total_parts_cost.quantize(CENT, rounding=ROUND_HALF_UP),
+                "total_labor_cost": total_labor_cost.quantize(CENT, rounding=ROUND_HALF_UP),
+                "grand_total": grand_total.quantize(CENT, rounding=ROUND_HALF_UP)
             }
         }, status=status.HTTP_200_OK)
 
@@ -814,110 +984,12 @@ class CreateQuotationFromSolutionView(APIView):
     """
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request, solution_id, *args, **kwargs):
-        # Fetch the solution
         try:
-            solution = VehicleSolution.objects.get(id=solution_id)
-        except VehicleSolution.DoesNotExist:
-            return Response({"detail": "Vehicle solution not found."}, status=status.HTTP_404_NOT_FOUND)
-
-        # Prevent duplicate quotations
-        if hasattr(solution, 'quotation'):
-            return Response({"detail": "Quotation already exists for this solution."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Calculate parts total and prepare quoted items data
-        item_total = 0
-        quoted_items_data = []
-        for item in solution.solution_items.all():
-            unit_price = float(item.inventory_item.unit_price or 0)
-            total = unit_price * item.quantity_used
-            item_total += total
-            quoted_items_data.append({
-                "inventory_item": item.inventory_item,
-                "quantity_used": item.quantity_used,
-                "unit_price": unit_price,
-                "item_total": total
-            })
-
-        # Validate mechanics input
-        input_mechanics = request.data.get('quoted_mechanics', [])
-        if not input_mechanics:
-            return Response({"detail": "quoted_mechanics is required."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Compute grand total
-        total_labor = sum(float(m.get('labor_share', 0)) for m in input_mechanics)
-        grand_total = item_total + total_labor
-
-        # Create the quotation record
-        quotation = Quotation.objects.create(vehicle_solution=solution, grand_total=grand_total)
-
-        # Persist quoted items
-        for qi in quoted_items_data:
-            QuotedItem.objects.create(
-                quotation=quotation,
-                inventory_item=qi["inventory_item"],
-                quantity_used=qi["quantity_used"],
-                unit_price=qi["unit_price"],
-                item_total=qi["item_total"]
-            )
-
-        # Persist quoted mechanics
-        for mech_data in input_mechanics:
-            try:
-                mechanic = User.objects.get(id=mech_data['mechanic_id'], role='Mechanic')
-                labor_share = float(mech_data['labor_share'])
-            except (KeyError, ValueError, User.DoesNotExist):
-                return Response({"detail": f"Invalid mechanic data: {mech_data}"}, status=status.HTTP_400_BAD_REQUEST)
-
-            QuotedMechanic.objects.create(
-                quotation=quotation,
-                mechanic=mechanic,
-                labor_share=labor_share
-            )
-
-        # --- NEW EMAIL NOTIFICATION LOGIC ---
-        customer = solution.vehicle_issue.vehicle.customer
-        subject = f"Your Quotation is Ready – Vehicle {solution.vehicle_issue.vehicle.license_plate}"
-        body_lines = [
-            f"Dear {customer.name},",
-            "",
-            "Thank you for entrusting us with your vehicle. Your detailed quotation is now available:",
-            "",
-            "— Parts & Materials —"
-        ]
-        for qi in quotation.quoted_items.all():
-            body_lines.append(
-                f"• {qi.inventory_item.item_name}: {qi.quantity_used} × {qi.unit_price:.2f} = {qi.item_total:.2f}"
-            )
-        body_lines += [
-            "",
-            "— Labor Breakdown —"
-        ]
-        for qm in quotation.quoted_mechanics.all():
-            body_lines.append(
-                f"• {qm.mechanic.name}: labor share = {qm.labor_share:.2f}"
-            )
-        body_lines += [
-            "",
-            f"Total Parts Cost: {item_total:.2f}",
-            f"Total Labor Cost: {total_labor:.2f}",
-            f"Grand Total (before tax): {grand_total:.2f}",
-            "",
-            "Please let us know when you would like to proceed, or if you have any questions.",
-            "",
-            "Best regards,",
-            f"{settings.DEFAULT_FROM_EMAIL}"
-        ]
-        body = "\n".join(body_lines)
-
-        send_mail(
-            subject,
-            body,
-            settings.DEFAULT_FROM_EMAIL,
-            [customer.email],
-            fail_silently=False,
-        )
-        # --- END EMAIL LOGIC ---
+            quotation = create_quotation(solution_id, request.data.get('quoted_mechanics', []))
+        except QuotationError as e:
+            return Response({"detail": e.detail}, status=e.status_code)
 
         serializer = QuotationSerializer(quotation, context={'request': request})
         return Response({
@@ -925,6 +997,47 @@ class CreateQuotationFromSolutionView(APIView):
             "data": serializer.data
         }, status=status.HTTP_201_CREATED)
 
+class CreateQuotationsBatchView(APIView):
+    """
+    Create quotations for many vehicle solutions in one request.
+
+    Expects {"quotations": [{"solution_id": ..., "quoted_mechanics": [...]}, ...]} and
+    reports, per solution, either the created quotation or why it was skipped.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_batch_size = 200
+
+    def post(self, request, *args, **kwargs):
+        entries = request.data.get('quotations')
+        if not isinstance(entries, list) or not entries:
+            return Response({"detail": "quotations must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(entries) > self.max_batch_size:
+            return Response({"detail": f"At most {self.max_batch_size} quotations can be created per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        outcomes = create_quotations([
+            (entry.get('solution_id'), entry.get('quoted_mechanics', [])) if isinstance(entry, dict) else (None, None)
+            for entry in entries
+        ])
+
+        results = []
+        created = 0
+        for entry, (quotation, error) in zip(entries, outcomes):
+            solution_id = entry.get('solution_id') if isinstance(entry, dict) else None
+            if error is not None:
+                results.append({"solution_id": solution_id, "created": False, "detail": error.detail})
+            else:
+                created += 1
+                results.append({
+                    "solution_id": solution_id,
+                    "created": True,
+                    "data": QuotationSerializer(quotation, context={'request': request}).data
+                })
+
+        return Response({
+            "detail": f"{created} of {len(entries)} quotations created.",
+            "data": results
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
 class GetPaymentByQuotationView(APIView):
     """
     Retrieve payment details for a specific quotation.
@@ -933,13 +1046,10 @@ class GetPaymentByQuotationView(APIView):
 
     def get(self, request, quotation_id, *args, **kwargs):
         try:
-            quotation = Quotation.objects.get(id=quotation_id)
-        except Quotation.DoesNotExist:
-            return Response({"detail": "Quotation not found."}, status=status.HTTP_404_NOT_FOUND)
-
-        try:
-            payment = quotation.payment
+            payment = plan_queryset(Payment.objects.all(), PaymentSerializer).get(quotation_id=quotation_id)
         except Payment.DoesNotExist:
+            if not Quotation.objects.filter(id=quotation_id).exists():
+                return Response({"detail": "Quotation not found."}, status=status.HTTP_404_NOT_FOUND)
             return Response({"detail": "No payment found for this quotation."}, status=status.HTTP_404_NOT_FOUND)
 
         serializer = PaymentSerializer(payment, context={'request': request})
@@ -951,52 +1061,125 @@ class GetPaymentByQuotationView(APIView):
 class CreatePaymentView(APIView):
     """
     Create a payment for a specific quotation, including tax rate.
+    `tax_rate` defaults to the rate configured in Settings.
     """
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request, quotation_id, *args, **kwargs):
         try:
-            quotation = Quotation.objects.get(id=quotation_id)
-        except Quotation.DoesNotExist:
-            return Response({"detail": "Quotation not found."}, status=status.HTTP_404_NOT_FOUND)
+            payment = capture_payment(
+                quotation_id,
+                request.data.get('tax_rate'),
+                request.data.get('payment_method'),
+                request.data.get('paid_by'),
+            )
+        except QuotationError as e:
+            return Response({"detail": e.detail}, status=e.status_code)
 
-        if quotation.payment_status == 'Paid':
-            return Response({"detail": "This quotation has already been paid."}, status=status.HTTP_400_BAD_REQUEST)
+        # Re-read through the planner so the nested payer serializes without per-relation queries
+        payment = plan_queryset(Payment.objects.all(), PaymentSerializer).get(pk=payment.pk)
+        serializer = PaymentSerializer(payment, context={'request': request})
+        return Response({
+            "detail": "Payment successful.",
+            "data": serializer.data
+        }, status=status.HTTP_201_CREATED)
 
-        tax_rate = request.data.get('tax_rate')
-        payment_method = request.data.get('payment_method')
-        paid_by_id = request.data.get('paid_by')
+class ExportView(APIView):
+    """
+    Streams a whole table as a download; subclasses set `export_name` (a key of base.exports.EXPORTS).
+    """
+    permission_classes = [IsAuthenticated]
+    export_name = None
 
-        if not tax_rate or not payment_method or not paid_by_id:
-            return Response({"detail": "tax_rate, payment_method, and paid_by are required."}, status=status.HTTP_400_BAD_REQUEST)
+    def get(self, request, *args, **kwargs):
+        """
+        Streams every row as CSV (default) or newline-delimited JSON with `?output=ndjson`.
+        Rows are read in fixed-size chunks, so the response starts at once and
+        memory stays flat regardless of table size.
+        """
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Unsupported output '{output}'. Use one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return stream_export(self.export_name, output)
 
-        try:
-            tax_rate = float(tax_rate)
-            tax_amount = (tax_rate / 100.0) * float(quotation.grand_total)
-            amount_paid = float(quotation.grand_total) + tax_amount
-        except ValueError:
-            return Response({"detail": "Invalid tax_rate value."}, status=status.HTTP_400_BAD_REQUEST)
+class ExportInventory(ExportView):
+    export_name = 'inventory'
 
-        try:
-            user = User.objects.get(id=paid_by_id, role='Customer')
-        except User.DoesNotExist:
-            return Response({"detail": "Paid_by must be a valid customer."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Create the payment
-        payment = Payment.objects.create(
-            quotation=quotation,
-            amount_paid=amount_paid,
-            tax_rate=tax_rate,
-            payment_method=payment_method,
-            paid_by=user
-        )
+class ExportVehicles(ExportView):
+    export_name = 'vehicles'
 
-        # Update quotation status
-        quotation.payment_status = 'Paid'
-        quotation.save()
+class ExportVehicleIssues(ExportView):
+    export_name = 'vehicle_issues'
 
-        serializer = PaymentSerializer(payment, context={'request': request})
+class ExportQuotations(ExportView):
+    export_name = 'quotations'
+
+class ExportPayments(ExportView):
+    export_name = 'payments'
+
+class DashboardView(APIView):
+    """
+    Front desk summary: issues by status, today's figures, quotations awaiting payment and stock value.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        # Served from the DailyRollup table rather than by scanning issues, quotations and payments
         return Response({
-            "detail": "Payment successful.",
-            "data": serializer.data
-        }, status=status.HTTP_201_CREATED)
\ No newline at end of file
+            "detail": "Dashboard retrieved successfully.",
+            "data": dashboard_summary()
+        }, status=status.HTTP_200_OK)
+
+class RevenueReport(APIView):
+    """
+    Revenue, tax collected and payment method mix per `period` (day, week or month; default month)
+    between `date_from` and `date_to` (YYYY-MM-DD, inclusive; default the year to date).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        period = report_period(request)
+        date_from, date_to = report_range(request)
+        return Response({
+            "detail": "Revenue report retrieved successfully.",
+            "data": revenue_report(period, date_from, date_to)
+        }, status=status.HTTP_200_OK)
+
+class MechanicPayoutReport(APIView):
+    """
+    Jobs, open assignments and labor pay per mechanic between `date_from` and `date_to`
+    (YYYY-MM-DD, inclusive; default the year to date). `?output=csv` streams the payroll sheet.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        date_from, date_to = report_range(request)
+        payouts = payout_rows(date_from, date_to)
+        output = request.query_params.get('output')
+        if output:
+            if output not in EXPORT_FORMATS:
+                return Response(
+                    {"detail": f"Unsupported output '{output}'. Use one of: {', '.join(EXPORT_FORMATS)}."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            rows = (tuple(row[field] for _, field in PAYOUT_COLUMNS) for row in payouts)
+            headers = [header for header, _ in PAYOUT_COLUMNS]
+            return streaming_download(f"mechanic-payouts-{date_from:%Y%m%d}-{date_to:%Y%m%d}", headers, rows, output)
+
+        mechanics = list(payouts)
+        return Response({
+            "detail": "Mechanic payout report retrieved successfully.",
+            "data": {
+                "date_from": date_from,
+                "date_to": date_to,
+                "totals": {
+                    field: sum(row[field] for row in mechanics)
+                    for field in ('jobs_completed', 'open_assignments', 'labor_quoted', 'labor_earned')
+                },
+                "mechanics": mechanics,
+            }
+        }, status=status.HTTP_200_OK)